@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""Latency benchmark for the security hook (security-read-blocker.py).
+
+The hook runs on every file-touching tool call (Read, Write, Edit,
+NotebookEdit, WebFetch, Bash, Grep, Glob...), so its latency is paid on
+nearly every agent action. This script replays a corpus of realistic
+hook inputs (allowed and blocked calls of each tool) through the hook
+in three modes:
+
+- ``cold``: a fresh hook process per call with no daemon running, the
+  way Claude Code runs it by default, each in a new log dir holding only
+  the compiled policy (as right after ``setup.py --claude-security``),
+  so no call is answered from a cache an earlier call filled.
+- ``daemon``: a fresh hook process per call answered by a running
+  ``--serve`` daemon (skipped where Unix sockets are unavailable).
+- ``inproc``: ``evaluate_cached()`` called in this process, i.e. the
+  policy cost alone, without interpreter start-up or logging.
+
+and reports p50/p95/p99 per mode and verdict, next to the bare
+interpreter and ``python3 -c "import json"`` (the floor for anything
+that has to parse the hook's JSON input). Every verdict is checked
+against the corpus's expectation, so a fast but wrong hook also fails.
+
+Budgets:
+- ``--budget-ms``: the cold allow path must add at most 10 ms (p50)
+  over the ``import json`` floor on a typical developer machine.
+- ``--p99-budget-ms``: no hook mode's p99 may exceed 1000 ms, well
+  inside the 5 s timeout ``setup.py --claude-security`` gives the hook.
+
+Usage:
+    python3 claude/bench_security_hook.py                 # 30 runs per input
+    python3 claude/bench_security_hook.py --runs 100 --json hook.json
+    python3 claude/bench_security_hook.py --budget-ms 5   # exit 1 if over
+    python3 claude/bench_security_hook.py --corpus calls.jsonl
+
+A ``--corpus`` file has one JSON object per line:
+``{"hook_input": {...}, "expect": "allow" | "block", "name": "..."}``;
+``expect`` and ``name`` are optional, and a bare hook input is accepted.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HOOK_SCRIPT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "security-read-blocker.py"
+)
+POLICY_MODULE = os.path.join(os.path.dirname(HOOK_SCRIPT), "security_policy.py")
+LOG_DIR_ENV = "DOTFILES_CLAUDE_SECURITY_LOG_DIR"
+DEFAULT_BUDGET_MS = 10.0
+DEFAULT_P99_BUDGET_MS = 1000.0
+HOOK_MODES = ("cold", "daemon", "inproc")
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+
+def default_corpus(project):
+    """Representative calls of each tool, allowed and blocked.
+
+    ``project`` is a scratch directory standing in for the session's
+    working directory; a source file and a secret-bearing .env are
+    written into it.
+    """
+    home = os.path.expanduser("~")
+    source = os.path.join(project, "src", "main.py")
+    env_file = os.path.join(project, ".env")
+    os.makedirs(os.path.dirname(source), exist_ok=True)
+    with open(source, "w", encoding="utf-8") as f:
+        f.write("def main():\n    return 0\n" * 200)
+    with open(env_file, "w", encoding="utf-8") as f:
+        f.write("DEBUG=1\nAWS_SECRET_ACCESS_KEY=abc123\n")
+
+    def call(name, expect, tool, **tool_input):
+        hook_input = {"session_id": "bench", "tool_name": tool}
+        hook_input["tool_input"] = tool_input
+        return {"name": name, "expect": expect, "hook_input": hook_input}
+
+    return [
+        call("read_source", "allow", "Read", file_path=source),
+        call("read_ssh_key", "block", "Read", file_path=f"{home}/.ssh/id_rsa"),
+        call("read_env_secrets", "block", "Read", file_path=env_file),
+        call("bash_git_status", "allow", "Bash", command="git status --short"),
+        call(
+            "bash_build",
+            "allow",
+            "Bash",
+            command=f"cd {project} && python3 -m pytest -q src > /tmp/out.txt 2>&1",
+        ),
+        call("bash_cat_aws", "block", "Bash", command="cat ~/.aws/credentials"),
+        call("grep_project", "allow", "Grep", pattern="def main", path=project),
+        call("grep_home", "block", "Grep", pattern="password", path=home),
+        call("glob_project", "allow", "Glob", pattern="**/*.py", path=project),
+        call("glob_ssh", "block", "Glob", pattern=f"{home}/.ssh/*"),
+        call("edit_source", "allow", "Edit", file_path=source, old_string="0"),
+        call("write_ssh_keys", "block", "Write", file_path="~/.ssh/authorized_keys"),
+        call("notebook", "allow", "NotebookEdit", notebook_path=f"{project}/a.ipynb"),
+        call("webfetch_https", "allow", "WebFetch", url="https://example.com/"),
+        call("webfetch_file_netrc", "block", "WebFetch", url=f"file://{home}/.netrc"),
+    ]
+
+
+def load_corpus(path):
+    """Corpus entries from a JSON-lines file (see the module docstring)."""
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "hook_input" not in item:
+                item = {"hook_input": item}
+            item.setdefault("name", f"line{n}")
+            item.setdefault("expect", None)
+            corpus.append(item)
+    return corpus
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    """Milliseconds summary of a list of second-valued samples."""
+    ms = [s * 1000 for s in samples]
+    return {
+        "runs": len(ms),
+        "min_ms": round(min(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+def time_process(cmd, stdin_bytes, env, cwd=None):
+    """(wall time in seconds, exit code) of one spawn of cmd."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        cmd,
+        input=stdin_bytes,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        cwd=cwd,
+    )
+    return time.perf_counter() - start, result.returncode
+
+
+def hook_env(log_dir):
+    env = os.environ.copy()
+    env[LOG_DIR_ENV] = log_dir
+    env.pop("DOTFILES_CLAUDE_SECURITY_DISABLED", None)
+    return env
+
+
+def start_daemon(log_dir):
+    """Start ``hook --serve`` on log_dir; return the process, or None."""
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    proc = subprocess.Popen(
+        [sys.executable, HOOK_SCRIPT, "--serve", "--idle-timeout", "600"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=hook_env(log_dir),
+    )
+    sock_path = os.path.join(log_dir, "security-hook.sock")
+    for _ in range(100):
+        if os.path.exists(sock_path):
+            return proc
+        time.sleep(0.05)
+    proc.kill()
+    proc.wait()
+    return None
+
+
+def fresh_log_dir(workdir):
+    """A new log dir under workdir with only the compiled policy in it."""
+    log_dir = tempfile.mkdtemp(prefix="log-cold-", dir=workdir)
+    subprocess.run(
+        [sys.executable, HOOK_SCRIPT, "--compile-policy"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=hook_env(log_dir),
+        check=True,
+    )
+    return log_dir
+
+
+def load_hook(log_dir):
+    """Import the hook's policy module with its state in log_dir."""
+    saved = os.environ.get(LOG_DIR_ENV)
+    os.environ[LOG_DIR_ENV] = log_dir  # read once, at import
+    try:
+        spec = importlib.util.spec_from_file_location("security_policy", POLICY_MODULE)
+        hook = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(hook)
+    finally:
+        if saved is None:
+            os.environ.pop(LOG_DIR_ENV, None)
+        else:
+            os.environ[LOG_DIR_ENV] = saved
+    return hook
+
+
+def run_benchmarks(workdir, corpus, runs):
+    """Time every corpus entry in every mode ``runs`` times.
+
+    Modes are interleaved within each run to spread machine noise.
+    Every cold call gets a log dir of its own (see fresh_log_dir), so
+    its decision, .env and sniff caches start empty. Returns (results,
+    mismatches): results maps ``<mode>_<verdict>`` to a summary,
+    mismatches lists verdicts that contradict the corpus.
+    """
+    log_dirs = {mode: os.path.join(workdir, f"log-{mode}") for mode in HOOK_MODES}
+    for log_dir in log_dirs.values():
+        os.makedirs(log_dir)
+    envs = {mode: hook_env(log_dirs[mode]) for mode in ("cold", "daemon")}
+    hook = [sys.executable, HOOK_SCRIPT]
+    payloads = [json.dumps(item["hook_input"]).encode() for item in corpus]
+    cwd = os.path.join(workdir, "project")
+    inproc = load_hook(log_dirs["inproc"])
+
+    daemon = start_daemon(log_dirs["daemon"])
+    modes = [m for m in HOOK_MODES if m != "daemon" or daemon is not None]
+    samples = {"interpreter": [], "json_floor": []}
+    for verdict in ("allow", "block"):
+        samples.update({f"{mode}_{verdict}": [] for mode in modes})
+    mismatches = []
+    try:
+        for _ in range(runs):
+            for name, code in (("interpreter", "pass"), ("json_floor", "import json")):
+                cmd = [sys.executable, "-c", code]
+                samples[name].append(time_process(cmd, b"", envs["cold"])[0])
+            for item, payload in zip(corpus, payloads):
+                for mode in modes:
+                    if mode == "inproc":
+                        start = time.perf_counter()
+                        block = inproc.evaluate_cached(item["hook_input"], cwd=cwd)
+                        blocked = bool(block)
+                        elapsed = time.perf_counter() - start
+                    elif mode == "cold":
+                        log_dir = fresh_log_dir(workdir)
+                        env = hook_env(log_dir)
+                        elapsed, code = time_process(hook, payload, env, cwd)
+                        shutil.rmtree(log_dir)
+                        blocked = code == 2
+                    else:
+                        elapsed, code = time_process(hook, payload, envs[mode], cwd)
+                        blocked = code == 2
+                    verdict = "block" if blocked else "allow"
+                    samples[f"{mode}_{verdict}"].append(elapsed)
+                    if item["expect"] and verdict != item["expect"]:
+                        mismatches.append((mode, item["name"], verdict))
+    finally:
+        if daemon is not None:
+            daemon.terminate()
+            daemon.wait()
+
+    results = {name: summarize(s) for name, s in samples.items() if s}
+    return results, sorted(set(mismatches))
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+
+def print_report(results, overhead_ms, budget_ms, p99_budget_ms):
+    header = (
+        f"{'mode':<14} {'runs':>6} {'min ms':>9} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(
+            f"{name:<14} {r['runs']:>6} {r['min_ms']:>9.2f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+        )
+    print(f"\nAllow-path overhead over json floor: {overhead_ms:.2f} ms (p50)")
+    print(f"Budget: {budget_ms:.2f} ms (p50 overhead), {p99_budget_ms:.2f} ms (p99)")
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog="bench_security_hook",
+        description="Benchmark security hook latency",
+    )
+    parser.add_argument("--runs", type=int, default=30, help="Runs per input (30)")
+    parser.add_argument(
+        "--corpus", metavar="PATH", help="JSON-lines corpus of hook inputs"
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help=f"Max allow-path overhead in ms ({DEFAULT_BUDGET_MS:g})",
+    )
+    parser.add_argument(
+        "--p99-budget-ms",
+        type=float,
+        default=DEFAULT_P99_BUDGET_MS,
+        help=f"Max p99 latency of any hook mode in ms ({DEFAULT_P99_BUDGET_MS:g})",
+    )
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON")
+    args = parser.parse_args(argv[1:])
+
+    with tempfile.TemporaryDirectory(prefix="bench-security-hook-") as workdir:
+        project = os.path.join(workdir, "project")
+        os.makedirs(project)
+        corpus = default_corpus(project)
+        if args.corpus:
+            corpus = load_corpus(args.corpus)
+        results, mismatches = run_benchmarks(workdir, corpus, args.runs)
+
+    overhead_ms = 0.0
+    if "cold_allow" in results:  # a custom corpus may have no allowed call
+        overhead_ms = results["cold_allow"]["p50_ms"] - results["json_floor"]["p50_ms"]
+    slow = [
+        name
+        for name, r in results.items()
+        if name.startswith(HOOK_MODES) and r["p99_ms"] > args.p99_budget_ms
+    ]
+    print_report(results, overhead_ms, args.budget_ms, args.p99_budget_ms)
+
+    if args.json:
+        report = {
+            "results": results,
+            "overhead_ms": round(overhead_ms, 3),
+            "budget_ms": args.budget_ms,
+            "p99_budget_ms": args.p99_budget_ms,
+            "corpus": [item["name"] for item in corpus],
+            "mismatches": mismatches,
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+        }
+        with open(args.json, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    status = 0
+    for mode, name, verdict in mismatches:
+        print(f"FAIL: {mode} {name}: unexpected {verdict}", file=sys.stderr)
+        status = 1
+    if overhead_ms > args.budget_ms:
+        print("FAIL: allow-path overhead exceeds budget", file=sys.stderr)
+        status = 1
+    if slow:
+        print(f"FAIL: p99 over budget: {', '.join(slow)}", file=sys.stderr)
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for claude-session-sync (session_sync.py).
+
+Generates a reproducible corpus of synthetic Claude Code sessions and
+times the hot paths against it:
+
+    scan_metadata, render_markdown, discover_sessions,
+    compute_project_paths, and a full ``sync-all``.
+
+Usage:
+    python3 claude/bench_session_sync.py                      # default corpus
+    python3 claude/bench_session_sync.py --sessions 200 --turns 400
+    python3 claude/bench_session_sync.py --giant-kb 2048 --subagents
+    python3 claude/bench_session_sync.py --json after.json --compare before.json
+
+The JSON written by --json can be fed back through --compare on a later
+commit to print per-benchmark speedups.
+
+Memory is reported per stage as the peak Python heap allocated during
+one extra, untimed run under tracemalloc ("Peak KiB"); the process's
+peak RSS is a lifetime high-water mark, so it is reported once for the
+whole run instead.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import session_sync
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ---------------------------------------------------------------------------
+# Synthetic transcript generator
+# ---------------------------------------------------------------------------
+
+DEFAULT_TOOL_MIX = {
+    "Bash": 30,
+    "Read": 30,
+    "Edit": 15,
+    "Grep": 10,
+    "Glob": 5,
+    "Write": 5,
+    "Task": 5,
+}
+
+_WORDS = (
+    "the decoder buffer frame media sample track audio video stream queue "
+    "thread promise state demuxer codec packet timestamp duration seek "
+    "config error result value update check parse render export session"
+).split()
+
+
+def _sentence(rng, n):
+    return " ".join(rng.choice(_WORDS) for _ in range(n))
+
+
+def _tool_input(rng, name, idx):
+    if name == "Bash":
+        return {"command": f"./mach test dom/media/{idx}", "description": "Run tests"}
+    if name in ("Read", "Write", "Edit"):
+        tool_input = {"file_path": f"/home/user/src/dom/media/File{idx}.cpp"}
+        if name == "Write":
+            tool_input["content"] = _sentence(rng, 200)
+        elif name == "Edit":
+            tool_input["old_string"] = _sentence(rng, 12)
+            tool_input["new_string"] = _sentence(rng, 14)
+        return tool_input
+    if name in ("Grep", "Glob"):
+        return {"pattern": rng.choice(_WORDS), "path": "/home/user/src/dom"}
+    if name == "Task":
+        return {"description": _sentence(rng, 6), "subagent_type": "Explore"}
+    return {"query": _sentence(rng, 5)}
+
+
+def _tool_result(rng, giant_bytes):
+    if giant_bytes and rng.random() < 0.02:
+        line = _sentence(rng, 12) + "\n"
+        return line * max(1, giant_bytes // len(line))
+    return "\n".join(_sentence(rng, 10) for _ in range(rng.randint(1, 40)))
+
+
+def generate_session(
+    path,
+    turns=200,
+    cwd="/home/user/src/project",
+    session_id=None,
+    tool_mix=None,
+    subagents=False,
+    giant_result_bytes=0,
+    seed=0,
+):
+    """Write one synthetic session JSONL to ``path``. Returns bytes written.
+
+    Each turn is a user prompt followed by an assistant reply carrying
+    thinking, text and one tool_use, then the matching tool_result.
+    ``tool_mix`` maps tool name -> relative weight. About 2% of tool
+    results are inflated to ``giant_result_bytes`` when it is non-zero.
+    """
+    rng = random.Random(seed)
+    tool_mix = tool_mix or DEFAULT_TOOL_MIX
+    names = list(tool_mix)
+    weights = [tool_mix[n] for n in names]
+    if session_id is None:
+        session_id = "%08x-0000-0000-0000-%012x" % (seed & 0xFFFFFFFF, seed)
+    base = {
+        "sessionId": session_id,
+        "cwd": cwd,
+        "version": "2.1.55",
+        "gitBranch": "main",
+        "timestamp": "2026-02-24T10:00:00Z",
+    }
+
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+
+        def emit(record):
+            nonlocal written
+            line = json.dumps(record) + "\n"
+            f.write(line)
+            written += len(line)
+
+        emit({"type": "file-history-snapshot", "snapshot": {"trackedFileBackups": {}}})
+        for turn in range(turns):
+            emit(
+                dict(
+                    base,
+                    type="user",
+                    isSidechain=False,
+                    message={"role": "user", "content": _sentence(rng, 25)},
+                )
+            )
+            tool = rng.choices(names, weights)[0]
+            tool_id = f"toolu_{seed}_{turn}"
+            emit(
+                {
+                    "type": "assistant",
+                    "isSidechain": False,
+                    "message": {
+                        "role": "assistant",
+                        "content": [
+                            {"type": "thinking", "thinking": _sentence(rng, 60)},
+                            {"type": "text", "text": _sentence(rng, 40)},
+                            {
+                                "type": "tool_use",
+                                "id": tool_id,
+                                "name": tool,
+                                "input": _tool_input(rng, tool, turn),
+                            },
+                        ],
+                    },
+                }
+            )
+            emit(
+                {
+                    "type": "user",
+                    "isSidechain": False,
+                    "message": {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "tool_result",
+                                "tool_use_id": tool_id,
+                                "is_error": rng.random() < 0.05,
+                                "content": _tool_result(rng, giant_result_bytes),
+                            }
+                        ],
+                    },
+                }
+            )
+            if turn % 25 == 0:
+                emit(
+                    {
+                        "type": "system",
+                        "message": {"role": "system", "content": _sentence(rng, 30)},
+                    }
+                )
+            if subagents and tool == "Task":
+                for step in range(rng.randint(2, 6)):
+                    emit(
+                        {
+                            "type": "progress",
+                            "data": {
+                                "type": "agent_progress",
+                                "agentId": f"agent_{seed}_{turn}",
+                                "prompt": _sentence(rng, 8),
+                                "message": {
+                                    "type": "assistant",
+                                    "message": {
+                                        "role": "assistant",
+                                        "content": [
+                                            {"type": "text", "text": _sentence(rng, 20)}
+                                        ],
+                                    },
+                                },
+                            },
+                        }
+                    )
+    return written
+
+
+def generate_corpus(
+    projects_dir,
+    sessions=50,
+    projects=8,
+    turns=200,
+    subagents=False,
+    giant_result_bytes=0,
+    seed=0,
+):
+    """Populate a fake ~/.claude/projects tree. Returns list of JSONL paths.
+
+    Project cwds deliberately share basenames (``.../a/app`` and
+    ``.../b/app``) so compute_project_paths has collisions to resolve.
+    """
+    paths = []
+    for i in range(sessions):
+        p = i % projects
+        cwd = f"/home/user/src/{'ab'[p % 2]}/proj{p // 2}"
+        slug = cwd.replace("/", "-")
+        proj_dir = os.path.join(projects_dir, slug)
+        os.makedirs(proj_dir, exist_ok=True)
+        path = os.path.join(proj_dir, f"session{i:05d}.jsonl")
+        generate_session(
+            path,
+            turns=turns,
+            cwd=cwd,
+            subagents=subagents,
+            giant_result_bytes=giant_result_bytes,
+            seed=seed * 100003 + i,
+        )
+        paths.append(path)
+    return paths
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process so far in KiB, or None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB on Linux.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _count_lines(paths):
+    total = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            total += sum(1 for _ in f)
+    return total
+
+
+def peak_alloc_kb(fn):
+    """Peak Python heap allocated while running fn() once, in KiB.
+
+    Tracing slows fn() down, so this is a separate run from the timed
+    ones; memory held before the call is not counted.
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, repeat, nbytes=0, nlines=0):
+    """Run fn() ``repeat`` times; report the best wall time and rates,
+    plus the peak allocation of one more (untimed) run."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    result = {"seconds": round(best, 6), "peak_alloc_kb": peak_alloc_kb(fn)}
+    if nbytes:
+        result["mb_per_s"] = round(nbytes / (1024 * 1024) / best, 3) if best else None
+    if nlines:
+        result["lines_per_s"] = round(nlines / best, 1) if best else None
+    return result
+
+
+def run_benchmarks(work_dir, args):
+    """Generate the corpus under work_dir and time each stage."""
+    projects_dir = os.path.join(work_dir, "projects")
+    dest_dir = os.path.join(work_dir, "dest")
+    paths = generate_corpus(
+        projects_dir,
+        sessions=args.sessions,
+        projects=args.projects,
+        turns=args.turns,
+        subagents=args.subagents,
+        giant_result_bytes=args.giant_kb * 1024,
+        seed=args.seed,
+    )
+    nbytes = sum(os.path.getsize(p) for p in paths)
+    nlines = _count_lines(paths)
+
+    orig_projects_dir = session_sync.CLAUDE_PROJECTS_DIR
+    session_sync.CLAUDE_PROJECTS_DIR = projects_dir
+    try:
+        results = {}
+        results["scan_metadata"] = measure(
+            lambda: [session_sync.scan_metadata(p) for p in paths], args.repeat
+        )
+
+        def render_all():
+            for p in paths:
+                session_sync.render_markdown(
+                    p, io.StringIO(), include_subagents=args.subagents
+                )
+
+        results["render_markdown"] = measure(render_all, args.repeat, nbytes, nlines)
+        results["discover_sessions"] = measure(
+            session_sync.discover_sessions, args.repeat
+        )
+        results["discover_sessions_filtered"] = measure(
+            lambda: session_sync.discover_sessions("/home/user/src/a"), args.repeat
+        )
+        cwds = [session_sync.scan_metadata(p)["cwd"] for p in paths]
+        results["compute_project_paths"] = measure(
+            lambda: session_sync.compute_project_paths(cwds), args.repeat
+        )
+
+        def sync_all():
+            shutil.rmtree(dest_dir, ignore_errors=True)
+            sync_args = argparse.Namespace(
+                dest=dest_dir,
+                format="markdown",
+                project_filter=None,
+                force=True,
+                include_subagents=args.subagents,
+            )
+            with contextlib.redirect_stdout(io.StringIO()):
+                session_sync.cmd_sync_all(sync_args)
+
+        results["sync_all"] = measure(sync_all, args.repeat, nbytes, nlines)
+    finally:
+        session_sync.CLAUDE_PROJECTS_DIR = orig_projects_dir
+
+    return {
+        "corpus": {
+            "sessions": len(paths),
+            "bytes": nbytes,
+            "lines": nlines,
+        },
+        "results": results,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+
+def print_report(report, baseline=None):
+    corpus = report["corpus"]
+    print(
+        "Corpus: {} sessions, {:.1f} MB, {} lines".format(
+            corpus["sessions"], corpus["bytes"] / (1024 * 1024), corpus["lines"]
+        )
+    )
+    header = (
+        f"{'benchmark':<28} {'seconds':>10} {'MB/s':>9} {'lines/s':>11}"
+        f" {'Peak KiB':>10}"
+    )
+    if baseline:
+        header += f" {'vs base':>9}"
+    print(header)
+    print("-" * len(header))
+    base_results = (baseline or {}).get("results", {})
+    for name, r in report["results"].items():
+        line = "{:<28} {:>10.4f} {:>9} {:>11} {:>10}".format(
+            name,
+            r["seconds"],
+            r.get("mb_per_s", "-"),
+            r.get("lines_per_s", "-"),
+            r.get("peak_alloc_kb", "-"),
+        )
+        if baseline:
+            old = base_results.get(name, {}).get("seconds")
+            line += (
+                " {:>8.2f}x".format(old / r["seconds"])
+                if old and r["seconds"]
+                else " {:>9}".format("-")
+            )
+        print(line)
+    if report.get("peak_rss_kb"):
+        print(f"Process peak RSS: {report['peak_rss_kb']} KiB")
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    parser = argparse.ArgumentParser(
+        prog="bench_session_sync",
+        description="Benchmark claude-session-sync on a synthetic corpus",
+    )
+    parser.add_argument("--sessions", type=int, default=50, help="Sessions (50)")
+    parser.add_argument("--projects", type=int, default=8, help="Projects (8)")
+    parser.add_argument("--turns", type=int, default=200, help="Turns/session (200)")
+    parser.add_argument(
+        "--giant-kb",
+        type=int,
+        default=0,
+        help="Inflate ~2%% of tool results to this many KiB (0 = off)",
+    )
+    parser.add_argument(
+        "--subagents", action="store_true", help="Emit subagent progress records"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed (0)")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N (3)")
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="Baseline JSON from an earlier run"
+    )
+    parser.add_argument(
+        "--keep", metavar="DIR", help="Generate the corpus in DIR and keep it"
+    )
+    args = parser.parse_args(argv[1:])
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        report = run_benchmarks(args.keep, args)
+    else:
+        with tempfile.TemporaryDirectory(prefix="bench-session-sync-") as work_dir:
+            report = run_benchmarks(work_dir, args)
+
+    report["meta"] = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            k: getattr(args, k)
+            for k in ("sessions", "projects", "turns", "giant_kb", "subagents", "seed")
+        },
+        "repeat": args.repeat,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
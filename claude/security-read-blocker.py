@@ -1,219 +1,164 @@
 #!/usr/bin/env python3
 """
 Claude Code Security Hook - Read Access Blocker
-Prevents Claude from reading sensitive files across all projects.
-
-Version: 1.0.0
+Prevents Claude from reading (or modifying) sensitive files across all projects.
+
+Usage:
+    security-read-blocker.py                 # Hook mode: hook JSON on stdin
+    security-read-blocker.py --serve [--idle-timeout SECONDS]
+    security-read-blocker.py --compile-policy
+
+In hook mode the script first asks a running ``--serve`` daemon (Unix
+socket under the log dir) for a verdict and evaluates in-process when no
+daemon answers, so the daemon is purely an optimization. The daemon
+client lives here and needs only os, sys, json, _socket and _blake2: an
+allow verdict from the daemon is acted on without importing the policy
+module at all, which is only imported to evaluate in-process or to log a
+block. Each verdict must carry a MAC under the policy key, which the
+agent's tools can neither read nor replace, so a forged socket is ignored.
+
+``--compile-policy`` (run by ``setup.py --claude-security``) writes the
+pre-expanded, pre-compiled policy to the log dir; the hook loads it with
+one read and checks it against the policy module's mtime.
+
+The policy itself lives in security_policy.py next to this script (which
+also offers a batch API and CLI); keeping this file a thin wrapper means
+the policy is imported from cached bytecode instead of being compiled
+on every tool call.
+
+Version: 1.3.0
 Part of: dotfiles (github.com/chunminchang/dotfiles)
 """
 
-import json
-import platform
+# This script runs on every tool call, so its imports are on the critical
+# path of every agent action: the daemon path needs only os, sys and json
+# (time is loaded at start-up), plus _socket and _blake2 once a socket
+# file exists.
+# _socket is the C module behind socket; the socket module itself would
+# also import enum, selectors and friends, adding milliseconds per call.
 import sys
 import os
-from pathlib import Path
-from datetime import datetime
-from fnmatch import fnmatch
+import json
+import time
 
 # Reconfigure stdout/stderr to utf-8 on Windows so unicode glyphs (the
 # lock emoji in the block message, etc.) don't crash on cp1252 consoles
 # when this hook runs under Claude Code's subprocess on Windows.
-if platform.system() == "Windows":
+if os.name == "nt":
     for _stream in (sys.stdout, sys.stderr):
         try:
             _stream.reconfigure(encoding="utf-8")
         except (AttributeError, OSError):
             pass
 
-# Configuration
-LOG_DIR_ENV = "DOTFILES_CLAUDE_SECURITY_LOG_DIR"
-LOG_DIR = Path(os.getenv(LOG_DIR_ENV, str(Path.home() / ".claude")))
-LOG_FILE = LOG_DIR / "security-blocks.log"
+# Configuration shared with security_policy.py, which owns it (the test
+# suite checks the two agree).
+LOG_DIR = os.getenv(
+    "DOTFILES_CLAUDE_SECURITY_LOG_DIR", os.path.join(os.path.expanduser("~"), ".claude")
+)
+SOCKET_FILE = os.path.join(LOG_DIR, "security-hook.sock")
+POLICY_KEY_FILE = os.path.join(LOG_DIR, "security-policy.key")
+METRICS_JOURNAL = os.path.join(LOG_DIR, "security-metrics.journal")
+METRICS_FOLD_BYTES = 64 * 1024
+DAEMON_TIMEOUT = 1.0
 DISABLE_ENV = "DOTFILES_CLAUDE_SECURITY_DISABLED"
 WHITELIST_ENV = "DOTFILES_CLAUDE_SECURITY_WHITELIST"
+SNIFF_ENV = "DOTFILES_CLAUDE_SECURITY_SNIFF"
+METRICS_ENV = "DOTFILES_CLAUDE_SECURITY_METRICS"
 
-# Sensitive file patterns (glob-style, ~ will be expanded)
-SENSITIVE_PATTERNS = [
-    # SSH keys
-    "~/.ssh/id_*",
-    "~/.ssh/*.pem",
-    "~/.ssh/*_rsa",
-    "~/.ssh/*_ed25519",
-    "~/.ssh/*_ecdsa",
-    "~/.ssh/*_dsa",
-    "~/.gnupg/*",
-    # Mozilla credentials
-    "~/.arcrc",
-    "~/.hgrc",
-    "~/.moz-phab-config",
-    "*/pernosco-submit",
-    # Cloud credentials
-    "~/.aws/credentials",
-    "~/.aws/config",
-    "~/.gcp/*.json",
-    "~/.azure/credentials",
-    "~/.config/gcloud/*credential*",
-    # Git credentials
-    "~/.git-credentials",
-    "~/.config/gh/hosts.yml",
-    "*/.git-credentials",
-    "~/AppData/Local/GitCredentialManager/*",
-    # API tokens
-    "~/.netrc",
-    "~/.npmrc",
-    "~/.pypirc",
-    # Password managers
-    "~/.password-store/*",
-    "~/Library/Keychains/*",
-    "~/.mozilla/firefox/*/key*.db",
-    "~/.mozilla/firefox/*/logins.json",
-    "~/AppData/Roaming/Mozilla/Firefox/Profiles/*/key*.db",
-    "~/AppData/Roaming/Mozilla/Firefox/Profiles/*/logins.json",
-    "~/.config/1Password/*",
-    "~/AppData/Local/Microsoft/Credentials/*",
-    "~/AppData/Roaming/Microsoft/Credentials/*",
-    # Containers & clusters
-    "~/.docker/config.json",
-    "~/.kube/config",
-    # Browser data
-    "*/Cookies",
-    "*/Login Data",
-    "*/Web Data",
-    # System
-    "/etc/shadow",
-]
-
-# Explicitly safe patterns (always allow)
-SAFE_PATTERNS = [
-    "~/.mozbuild/*",
-]
-
-# Sensitive keywords for .env files
-SENSITIVE_KEYWORDS = [
-    "API_KEY",
-    "APIKEY",
-    "API_SECRET",
-    "SECRET_KEY",
-    "SECRET",
-    "PRIVATE_KEY",
-    "PASSWORD",
-    "PASSWD",
-    "PWD",
-    "TOKEN",
-    "AUTH_TOKEN",
-    "ACCESS_TOKEN",
-    "CREDENTIAL",
-    "CLIENT_SECRET",
-    "AWS_SECRET",
-    "GCP_KEY",
-    "PERNOSCO_USER_SECRET_KEY",
-    "TASKCLUSTER_ACCESS_TOKEN",
-    "BUGZILLA_API_KEY",
-]
-
-
-def matches_pattern(file_path, pattern):
-    """Check if file_path matches glob pattern."""
-    expanded_path = os.path.expanduser(file_path)
-    expanded_pattern = os.path.expanduser(pattern)
-    return fnmatch(expanded_path, expanded_pattern)
-
-
-def is_safe_path(file_path):
-    """Check if path is explicitly safe."""
-    for pattern in SAFE_PATTERNS:
-        if matches_pattern(file_path, pattern):
-            return True
-    return False
-
-
-def is_sensitive_path(file_path):
-    """Check if path matches sensitive patterns."""
-    for pattern in SENSITIVE_PATTERNS:
-        if matches_pattern(file_path, pattern):
-            return True
-    return False
-
-
-def is_sensitive_env_file(file_path):
-    """Check if .env file contains sensitive data."""
-    if not (file_path.endswith(".env") or ".env." in file_path):
-        return False
 
+def reply_mac(key, nonce, block):
+    """MAC of a daemon verdict, as security_policy.reply_mac."""
     try:
-        expanded = os.path.expanduser(file_path)
-        if not os.path.exists(expanded):
-            return False
-
-        with open(expanded, "r") as f:
-            content = f.read().upper()
-            return any(keyword in content for keyword in SENSITIVE_KEYWORDS)
-    except:
-        return False
+        from _blake2 import blake2b  # hashlib's, without loading OpenSSL
+    except ImportError:
+        from hashlib import blake2b
+    text = json.dumps([nonce, block])
+    return blake2b(text.encode("utf-8"), key=key, digest_size=32).hexdigest()
 
 
-def is_whitelisted(file_path):
-    """Check if path is in whitelist.
+def query_daemon(hook_input):
+    """Ask a running --serve daemon for a verdict.
 
-    Whitelist entries are separated by os.pathsep (`:` on Unix, `;` on
-    Windows) so that absolute Windows paths like ``C:\\Users\\...`` are
-    not mis-split on the drive-letter colon.
+    Returns the daemon's reply dict, or None when no daemon is usable
+    (no socket or key, wrong owner, refused, timed out, stale, or a
+    reply not signed with the policy key). _socket is only imported
+    once a socket file exists.
     """
-    whitelist = os.getenv(WHITELIST_ENV, "")
-    if not whitelist:
-        return False
-
-    expanded_path = os.path.expanduser(file_path)
-    return expanded_path in [
-        os.path.expanduser(p.strip()) for p in whitelist.split(os.pathsep) if p.strip()
-    ]
-
-
-def log_block(hook_input, file_path, reason):
-    """Log blocked access."""
-    LOG_FILE.parent.mkdir(exist_ok=True)
-
-    entry = {
-        "timestamp": datetime.now().isoformat(),
-        "tool_name": hook_input.get("tool_name", "Unknown"),
-        "file_path": str(file_path),
-        "reason": reason,
-        "session_id": hook_input.get("session_id", "Unknown"),
-        "cwd": hook_input.get("cwd", "Unknown"),
+    try:
+        st = os.stat(SOCKET_FILE)
+        with open(POLICY_KEY_FILE, "rb") as f:
+            key = f.read()
+    except OSError:
+        return None
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        return None
+    if len(key) != 32:
+        return None
+
+    import _socket
+
+    nonce = os.urandom(16).hex()
+    request = {
+        "hook_input": hook_input,
+        "whitelist": os.getenv(WHITELIST_ENV, ""),
+        "sniff": os.getenv(SNIFF_ENV) == "true",
+        "cwd": os.getcwd(),
+        "nonce": nonce,
     }
-
     try:
-        with open(LOG_FILE, "a") as f:
-            f.write(json.dumps(entry) + "\n")
-    except:
+        sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+        try:
+            sock.settimeout(DAEMON_TIMEOUT)
+            sock.connect(SOCKET_FILE)
+            sock.sendall(json.dumps(request).encode("utf-8"))
+            sock.shutdown(_socket.SHUT_WR)
+            chunks = []
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+        finally:
+            sock.close()
+        reply = json.loads(b"".join(chunks))
+    except (OSError, AttributeError, ValueError):
+        return None
+    if not isinstance(reply, dict) or "block" not in reply:
+        return None
+    if reply.get("mac") != reply_mac(key, nonce, reply["block"]):
+        return None
+    return reply
+
+
+def record_allow(tool_name, started_ns):
+    """Journal a daemon-answered allow, as security_policy.record_metric."""
+    if not (isinstance(tool_name, str) and tool_name.isidentifier()):
+        tool_name = "Unknown"
+    micros = (time.perf_counter_ns() - started_ns) // 1000
+    line = f"{tool_name}\tallow\tdaemon\t{micros}\n"
+    try:
+        fd = os.open(METRICS_JOURNAL, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line.encode("utf-8"))
+            size = os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+        if size >= METRICS_FOLD_BYTES:
+            from security_metrics import fold
+
+            fold(LOG_DIR)
+    except Exception:  # metrics must never change a verdict
         pass
 
-    sys.stderr.write(f"\n{'='*60}\n")
-    sys.stderr.write(f"🔒 SECURITY HOOK: Blocked access to sensitive file\n")
-    sys.stderr.write(f"{'='*60}\n")
-    sys.stderr.write(f"Time:     {entry['timestamp']}\n")
-    sys.stderr.write(f"Tool:     {entry['tool_name']}\n")
-    sys.stderr.write(f"File:     {file_path}\n")
-    sys.stderr.write(f"Reason:   {reason}\n")
-    sys.stderr.write(f"Session:  {entry['session_id']}\n")
-    sys.stderr.write(f"Directory: {entry['cwd']}\n")
-    sys.stderr.write(f"\nThis access was blocked to protect sensitive credentials.\n")
-    sys.stderr.write(f"Log file: {LOG_FILE}\n")
-    sys.stderr.write(f"\nTo override (use with extreme caution):\n")
-    sys.stderr.write(f"  export {DISABLE_ENV}=true\n")
-    sys.stderr.write(f"{'='*60}\n\n")
 
+def main():
+    started = time.perf_counter_ns()
+    if len(sys.argv) > 1:
+        from security_policy import run_hook
 
-def check_bash_command(hook_input, command):
-    """Check if bash command accesses sensitive files."""
-    for pattern in SENSITIVE_PATTERNS:
-        pattern_simple = pattern.replace("*", "").replace("~/", "")
-        if pattern_simple in command:
-            return True
-    return False
-
+        run_hook()
 
-def main():
     # Emergency override
     if os.getenv(DISABLE_ENV) == "true":
         sys.exit(0)
@@ -224,47 +169,16 @@ def main():
     except:
         sys.exit(0)
 
-    tool_name = hook_input.get("tool_name", "")
-    tool_input = hook_input.get("tool_input", {})
-    file_path = None
-
-    # Extract file path
-    if tool_name == "Read":
-        file_path = tool_input.get("file_path")
-    elif tool_name == "Bash":
-        command = tool_input.get("command", "")
-        if check_bash_command(hook_input, command):
-            log_block(hook_input, command, "Bash command accessing sensitive file")
-            sys.exit(2)
-    elif tool_name in ["Grep", "Glob"]:
-        file_path = tool_input.get("path", "")
-
-    # Check file path
-    if file_path:
-        # Check safe patterns first
-        if is_safe_path(file_path):
-            sys.exit(0)
-
-        # Check whitelist
-        if is_whitelisted(file_path):
-            sys.exit(0)
-
-        # Check .env files
-        if file_path.endswith(".env") or ".env." in file_path:
-            if is_sensitive_env_file(file_path):
-                log_block(
-                    hook_input, file_path, "Contains sensitive environment variables"
-                )
-                sys.exit(2)
-            else:
-                sys.exit(0)
+    reply = query_daemon(hook_input) if isinstance(hook_input, dict) else None
+    if reply is not None and not reply["block"]:
+        if os.getenv(METRICS_ENV) != "false":
+            record_allow(hook_input.get("tool_name"), started)
+        sys.exit(0)
 
-        # Check sensitive patterns
-        if is_sensitive_path(file_path):
-            log_block(hook_input, file_path, "Contains sensitive credentials or keys")
-            sys.exit(2)
+    # No daemon answered, or it blocked: evaluate and/or log in-process
+    from security_policy import run_hook
 
-    sys.exit(0)
+    run_hook(hook_input, reply, started)
 
 
 if __name__ == "__main__":
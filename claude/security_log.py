@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""Rotating block log for the Claude Code security hook.
+
+Usage (query CLI):
+    python3 claude/security_log.py                      # last 20 blocks
+    python3 claude/security_log.py --since 1d --tool Bash --tail 50
+    python3 claude/security_log.py --session SESSION_ID --tail 0
+    python3 claude/security_log.py --stats [--since 7d] [--json]
+
+The hook (security-read-blocker.py) appends one JSON line per blocked
+tool call to ``security-blocks.log`` in its log dir. This module owns
+that file:
+
+- Size and age rotation into numbered segments
+  (``security-blocks.log.1`` is the newest), optionally gzipped.
+- A sidecar index per segment (``<segment>.idx``) of fixed-size
+  ``(offset, timestamp, crc32(session_id))`` records, so readers can
+  seek by time or session without parsing the whole history.
+
+Writers hold an advisory lock on ``security-blocks.lock`` while they
+append and rotate, so concurrent hook processes never interleave a line
+with its index record. The JSON lines themselves are unchanged; a log
+written before the index existed is indexed on first append.
+
+Part of: dotfiles (github.com/chunminchang/dotfiles)
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+LOG_NAME = "security-blocks.log"
+LOCK_NAME = "security-blocks.lock"
+INDEX_SUFFIX = ".idx"
+# offset in the uncompressed segment, unix time, crc32 of the session id
+INDEX_RECORD = struct.Struct("<QdI")
+
+DEFAULT_MAX_BYTES = 1024 * 1024  # rotate the active segment past this size
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # ... or once its first entry is this old
+DEFAULT_KEEP = 5  # rotated segments kept
+
+# =============================================================================
+# Index records
+# =============================================================================
+
+
+def session_key(session_id):
+    """Index key of a session id (crc32 of its utf-8 form)."""
+    return zlib.crc32(str(session_id).encode("utf-8"))
+
+
+def entry_time(entry):
+    """Unix time of a log entry: its "ts", else its ISO "timestamp"."""
+    if isinstance(entry.get("ts"), (int, float)):
+        return float(entry["ts"])
+    try:
+        from datetime import datetime
+
+        return datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+def read_index(index_path):
+    """List of (offset, ts, session_key) records, [] if there is none."""
+    try:
+        with open(index_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    usable = len(data) - len(data) % INDEX_RECORD.size  # drop a torn tail
+    return list(INDEX_RECORD.iter_unpack(data[:usable]))
+
+
+def build_index(log_path):
+    """Index records for an unindexed log, by scanning it once."""
+    records = []
+    offset = 0
+    with open(log_path, "rb") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                records.append(
+                    (
+                        offset,
+                        entry_time(entry),
+                        session_key(entry.get("session_id", "Unknown")),
+                    )
+                )
+            except (ValueError, AttributeError):
+                pass
+            offset += len(line)
+    return records
+
+
+# =============================================================================
+# Writer
+# =============================================================================
+
+
+class _Lock:
+    """Advisory exclusive lock on a file (no-op where fcntl is missing)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        flags = os.O_RDWR | os.O_CREAT
+        try:
+            self.fd = os.open(self.path, flags, 0o600)
+        except FileNotFoundError:  # first block ever: no log dir yet
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.fd = os.open(self.path, flags, 0o600)
+        try:
+            import fcntl
+
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        except ImportError:
+            pass
+        return self
+
+    def __exit__(self, *exc):
+        os.close(self.fd)  # closing releases the flock
+
+
+class SecurityLog:
+    """The block log in one directory: active segment plus rotations."""
+
+    def __init__(
+        self,
+        log_dir,
+        max_bytes=DEFAULT_MAX_BYTES,
+        max_age=DEFAULT_MAX_AGE,
+        keep=DEFAULT_KEEP,
+        compress=False,
+    ):
+        self.log_dir = log_dir
+        self.path = os.path.join(log_dir, LOG_NAME)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.keep = keep
+        self.compress = compress
+
+    # -- paths ---------------------------------------------------------------
+
+    def segment_path(self, n):
+        """Path of rotated segment n (1 = newest), without .gz."""
+        return f"{self.path}.{n}"
+
+    def segments(self):
+        """Existing segments oldest first, as (log_path, index_path).
+
+        Rotated segments may be gzipped (log_path ends in .gz); their
+        index offsets refer to the uncompressed data.
+        """
+        found = []
+        for n in range(self.keep, 0, -1):
+            base = self.segment_path(n)
+            for log_path in (base, base + ".gz"):
+                if os.path.exists(log_path):
+                    found.append((log_path, base + INDEX_SUFFIX))
+                    break
+        if os.path.exists(self.path):
+            found.append((self.path, self.path + INDEX_SUFFIX))
+        return found
+
+    # -- writing -------------------------------------------------------------
+
+    def append(self, entry):
+        """Append one entry; see append_many."""
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        """Append entries with one write to the log and one to its index.
+
+        Each entry gets a "ts" (unix time) unless it has one. Rotates
+        first when the active segment is too big or too old.
+        """
+        if not entries:
+            return
+        lines = []
+        for entry in entries:
+            entry.setdefault("ts", time.time())
+            lines.append((json.dumps(entry) + "\n").encode("utf-8"))
+        with _Lock(os.path.join(self.log_dir, LOCK_NAME)):
+            self._append_locked(entries, lines)
+
+    def _append_locked(self, entries, lines):
+        index_path = self.path + INDEX_SUFFIX
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size and not os.path.exists(index_path):
+            self._write_index(index_path, build_index(self.path))
+        if size and self._needs_rotation(size + sum(map(len, lines)), index_path):
+            self.rotate()
+            size = 0
+
+        records = []
+        offset = size
+        for entry, line in zip(entries, lines):
+            key = session_key(entry.get("session_id", "Unknown"))
+            records.append(INDEX_RECORD.pack(offset, entry["ts"], key))
+            offset += len(line)
+        with open(self.path, "ab") as f:
+            f.write(b"".join(lines))
+        with open(index_path, "ab") as f:
+            f.write(b"".join(records))
+
+    @staticmethod
+    def _write_index(index_path, records):
+        with open(index_path, "wb") as f:
+            f.write(b"".join(INDEX_RECORD.pack(*r) for r in records))
+
+    def _needs_rotation(self, new_size, index_path):
+        if new_size > self.max_bytes:
+            return True
+        try:
+            with open(index_path, "rb") as f:
+                first = f.read(INDEX_RECORD.size)
+        except OSError:
+            return False
+        if len(first) < INDEX_RECORD.size:
+            return False
+        return time.time() - INDEX_RECORD.unpack(first)[1] > self.max_age
+
+    def rotate(self):
+        """Shift segments up by one and start a new active segment.
+
+        Callers other than append_many must hold the lock themselves.
+        """
+        oldest = self.segment_path(self.keep)
+        for path in (oldest, oldest + ".gz", oldest + INDEX_SUFFIX):
+            if os.path.exists(path):
+                os.unlink(path)
+        for n in range(self.keep - 1, 0, -1):
+            src, dst = self.segment_path(n), self.segment_path(n + 1)
+            for suffix in ("", ".gz", INDEX_SUFFIX):
+                if os.path.exists(src + suffix):
+                    os.replace(src + suffix, dst + suffix)
+        first = self.segment_path(1)
+        os.replace(self.path, first)
+        if os.path.exists(self.path + INDEX_SUFFIX):
+            os.replace(self.path + INDEX_SUFFIX, first + INDEX_SUFFIX)
+        if self.compress:
+            import gzip
+            import shutil
+
+            with open(first, "rb") as src, gzip.open(first + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.unlink(first)
+
+    # -- reading -------------------------------------------------------------
+
+    def open_segment(self, log_path):
+        """Open a segment for binary reading, decompressing .gz."""
+        if log_path.endswith(".gz"):
+            import gzip
+
+            return gzip.open(log_path, "rb")
+        return open(log_path, "rb")
+
+    def iter_entries(
+        self, since=None, until=None, session_id=None, tool=None, reason=None
+    ):
+        """Yield entries oldest first, optionally filtered (see LogFilter).
+
+        Indexed segments are seeked into rather than scanned: a segment
+        whose records all fall outside the time range or session is
+        skipped, and only lines whose index record matches are parsed.
+        Unindexed segments are scanned line by line.
+        """
+        filt = LogFilter(since, until, session_id, tool, reason)
+        for log_path, index_path in self.segments():
+            records = read_index(index_path)
+            if not records:
+                with self.open_segment(log_path) as f:
+                    yield from filt.entries(f)
+                continue
+            offsets = [offset for offset, ts, key in records if filt.indexed(ts, key)]
+            if offsets:
+                yield from self._read_at(log_path, offsets, filt)
+
+    def tail(
+        self, n, since=None, until=None, session_id=None, tool=None, reason=None
+    ):
+        """The last n matching entries, oldest first.
+
+        Segments are read newest first and from their end (backwards
+        through the index, or backwards in blocks when unindexed), so
+        the cost depends on n and not on the size of the history.
+        """
+        filt = LogFilter(since, until, session_id, tool, reason)
+        found = []
+        for log_path, index_path in reversed(self.segments()):
+            records = read_index(index_path)
+            if records:
+                records = reversed(records)
+                offsets = [o for o, ts, key in records if filt.indexed(ts, key)]
+                entries = self._read_at(log_path, offsets, filt)
+            elif log_path.endswith(".gz"):  # gzip cannot be read backwards
+                with self.open_segment(log_path) as f:
+                    entries = list(filt.entries(f))[::-1]
+            else:
+                entries = self._reverse_entries(log_path, filt)
+            for entry in entries:
+                found.append(entry)
+                if len(found) >= n:
+                    return found[::-1]
+        return found[::-1]
+
+    def count(self):
+        """Number of entries, from the indexes where they exist."""
+        total = 0
+        for log_path, index_path in self.segments():
+            records = read_index(index_path)
+            if records:
+                total += len(records)
+            else:
+                with self.open_segment(log_path) as f:
+                    total += sum(1 for line in f if line.strip())
+        return total
+
+    def _read_at(self, log_path, offsets, filt):
+        with self.open_segment(log_path) as f:
+            for offset in offsets:
+                f.seek(offset)
+                entry = _parse(f.readline())
+                if entry is not None and filt.matches(entry):
+                    yield entry
+
+    def _reverse_entries(self, log_path, filt, block_size=64 * 1024):
+        with open(log_path, "rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            rest = b""
+            while pos > 0:
+                step = min(block_size, pos)
+                pos -= step
+                f.seek(pos)
+                lines = (f.read(step) + rest).split(b"\n")
+                rest = lines.pop(0)  # may continue in the previous block
+                for line in reversed(lines):
+                    entry = _parse(line)
+                    if entry is not None and filt.matches(entry):
+                        yield entry
+            entry = _parse(rest)
+            if entry is not None and filt.matches(entry):
+                yield entry
+
+
+def _parse(line):
+    """A log line as a dict, or None for blank or corrupt lines."""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+class LogFilter:
+    """Entry filter: time range, session, tool and reason substring.
+
+    ``since``/``until`` are unix times (inclusive), ``reason`` matches
+    case-insensitively. Time and session are also checked against index
+    records so non-matching lines are never read.
+    """
+
+    def __init__(self, since=None, until=None, session_id=None, tool=None, reason=None):
+        self.since = since
+        self.until = until
+        self.session_id = session_id
+        self.session_key = None if session_id is None else session_key(session_id)
+        self.tool = tool
+        self.reason = reason.lower() if reason else None
+
+    def indexed(self, ts, key):
+        """True if an index record may belong to a matching entry."""
+        return (
+            (self.since is None or ts >= self.since)
+            and (self.until is None or ts <= self.until)
+            and (self.session_key is None or key == self.session_key)
+        )
+
+    def matches(self, entry):
+        """True if a parsed entry passes every filter."""
+        if self.since is not None or self.until is not None:
+            ts = entry_time(entry)
+            if self.since is not None and ts < self.since:
+                return False
+            if self.until is not None and ts > self.until:
+                return False
+        if self.session_id is not None and entry.get("session_id") != self.session_id:
+            return False
+        if self.tool is not None and entry.get("tool_name") != self.tool:
+            return False
+        if self.reason is not None:
+            return self.reason in str(entry.get("reason", "")).lower()
+        return True
+
+    def entries(self, f):
+        """Matching entries of an open segment, scanned forward."""
+        for line in f:
+            entry = _parse(line)
+            if entry is not None and self.matches(entry):
+                yield entry
+
+
+# =============================================================================
+# Query CLI
+# =============================================================================
+
+
+def aggregate(entries):
+    """Counts of entries by pattern, session and tool.
+
+    Entries logged without a pattern (.env content blocks, or logs from
+    before patterns were recorded) are counted under their reason.
+    """
+    from collections import Counter
+
+    total = 0
+    by_pattern, by_session, by_tool = Counter(), Counter(), Counter()
+    for entry in entries:
+        total += 1
+        by_pattern[entry.get("pattern") or entry.get("reason", "Unknown")] += 1
+        by_session[entry.get("session_id", "Unknown")] += 1
+        by_tool[entry.get("tool_name", "Unknown")] += 1
+    return {
+        "total": total,
+        "by_pattern": dict(by_pattern.most_common()),
+        "by_session": dict(by_session.most_common()),
+        "by_tool": dict(by_tool.most_common()),
+    }
+
+
+def parse_when(text, now=None):
+    """Unix time of an ISO date/time or a relative age like 30m, 12h, 7d."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    if text and text[-1] in units and text[:-1].isdigit():
+        return (time.time() if now is None else now) - int(text[:-1]) * units[text[-1]]
+    from datetime import datetime
+
+    return datetime.fromisoformat(text).timestamp()
+
+
+def default_log_dir():
+    """The hook's log dir: $DOTFILES_CLAUDE_SECURITY_LOG_DIR or ~/.claude."""
+    return os.getenv("DOTFILES_CLAUDE_SECURITY_LOG_DIR") or os.path.join(
+        os.path.expanduser("~"), ".claude"
+    )
+
+
+def print_entry(entry):
+    print(f"\nBlocked: {entry.get('timestamp', 'Unknown')}")
+    print(f"  Tool:    {entry.get('tool_name', 'Unknown')}")
+    print(f"  File:    {entry.get('file_path', 'Unknown')}")
+    print(f"  Reason:  {entry.get('reason', 'Unknown')}")
+    if entry.get("pattern"):
+        print(f"  Pattern: {entry['pattern']}")
+    if entry.get("session_id", "Unknown") != "Unknown":
+        print(f"  Session: {entry['session_id']}")
+
+
+def print_stats(stats, top):
+    print(f"Blocked access attempts: {stats['total']}")
+    for title, key in (
+        ("By pattern", "by_pattern"),
+        ("By session", "by_session"),
+        ("By tool", "by_tool"),
+    ):
+        print(f"\n{title}:")
+        for name, count in list(stats[key].items())[:top]:
+            print(f"  {count:>6}  {name}")
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="security_log",
+        description="Query the Claude Code security hook's block log",
+    )
+    parser.add_argument("--log-dir", default=default_log_dir(), help="Log directory")
+    parser.add_argument(
+        "--tail", type=int, default=20, metavar="N", help="Last N entries (20; 0: all)"
+    )
+    parser.add_argument("--since", metavar="WHEN", help="ISO time or age (30m, 7d)")
+    parser.add_argument("--until", metavar="WHEN", help="ISO time or age (30m, 7d)")
+    parser.add_argument("--tool", help="Only this tool (Read, Bash, ...)")
+    parser.add_argument("--session", help="Only this session id")
+    parser.add_argument("--reason", help="Only reasons containing this text")
+    parser.add_argument(
+        "--stats", action="store_true", help="Counts by pattern, session and tool"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Rows per --stats group")
+    parser.add_argument("--json", action="store_true", help="Print JSON")
+    args = parser.parse_args(argv[1:])
+
+    try:
+        filters = {
+            "since": parse_when(args.since) if args.since else None,
+            "until": parse_when(args.until) if args.until else None,
+            "session_id": args.session,
+            "tool": args.tool,
+            "reason": args.reason,
+        }
+    except ValueError as e:
+        parser.error(str(e))
+
+    log = SecurityLog(args.log_dir)
+    if not log.segments():
+        print(f"No log file found in: {args.log_dir}", file=sys.stderr)
+        return 1
+
+    if args.stats:
+        stats = aggregate(log.iter_entries(**filters))
+        if args.json:
+            print(json.dumps(stats, indent=2))
+        else:
+            print_stats(stats, args.top)
+        return 0
+
+    if args.tail > 0:
+        entries = log.tail(args.tail, **filters)
+    else:
+        entries = log.iter_entries(**filters)
+    if args.json:
+        for entry in entries:
+            print(json.dumps(entry))
+        return 0
+
+    unfiltered = not any(filters.values())
+    total = log.count() if unfiltered else None
+    if total is not None:
+        print(f"Blocked access attempts: {total}")
+    shown = 0
+    for entry in entries:
+        print_entry(entry)
+        shown += 1
+    if total is not None and shown < total:
+        print(f"\n... showing last {shown} of {total} entries")
+    elif shown == 0:
+        print("No matching entries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
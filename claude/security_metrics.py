@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""Decision counters and latency histograms for the Claude Code security hook.
+
+Usage:
+    python3 claude/security_metrics.py                  # summary
+    python3 claude/security_metrics.py --json
+    python3 claude/security_metrics.py --prometheus
+    python3 claude/security_metrics.py --reset
+
+Each hook call appends one ``tool<TAB>decision<TAB>mode<TAB>micros``
+line to ``security-metrics.journal`` in its log dir with a single
+O_APPEND write, so recording costs a few microseconds and never parses
+anything. The journal is folded into ``security-metrics.json``
+(a call count, a latency sum and a fixed-bucket latency histogram per
+tool, decision and mode) and rendered as Prometheus text into
+``security-metrics.prom`` (for node_exporter's textfile collector):
+
+- by the hook call that pushes the journal past 64 KiB,
+- by a running ``--serve`` daemon every 30 seconds while it is busy,
+- whenever this CLI (or ``setup.py --show-claude-security-metrics``)
+  reads the metrics.
+
+Modes: ``daemon`` (a --serve daemon answered), ``inproc`` (no daemon
+is running), ``fallback`` (a daemon socket exists but nothing answered
+in time) and ``served`` (the daemon's own evaluation time for the
+calls it answered; these are not counted as decisions again).
+
+Latency runs from the hook's entry point to its verdict; interpreter
+start-up is not included (bench_security_hook.py measures that).
+
+Part of: dotfiles (github.com/chunminchang/dotfiles)
+"""
+
+import json
+import os
+import sys
+from bisect import bisect_left
+
+from security_log import _Lock, default_log_dir
+
+JOURNAL_NAME = "security-metrics.journal"
+METRICS_NAME = "security-metrics.json"
+PROM_NAME = "security-metrics.prom"
+LOCK_NAME = "security-metrics.lock"
+METRICS_VERSION = 1
+
+# Upper bounds of the latency buckets in microseconds; a final +Inf
+# bucket catches the rest.
+BUCKETS_US = (
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+    25000,
+    50000,
+    100000,
+    250000,
+    500000,
+    1000000,
+    5000000,
+)
+DECISIONS = ("allow", "block")
+HOOK_MODES = ("daemon", "inproc", "fallback")
+DAEMON_MODE = "served"
+
+# =============================================================================
+# Counters
+# =============================================================================
+
+
+def _new_series():
+    return {"count": 0, "sum_us": 0, "buckets": [0] * (len(BUCKETS_US) + 1)}
+
+
+def quantile(buckets, q):
+    """Upper bound (us) of the bucket holding quantile q; None past the last."""
+    total = sum(buckets)
+    if not total:
+        return 0
+    rank = q * total
+    seen = 0
+    for bound, count in zip(BUCKETS_US, buckets):
+        seen += count
+        if seen >= rank:
+            return bound
+    return None
+
+
+class Metrics:
+    """Counters and latency histograms keyed by (tool, decision, mode)."""
+
+    def __init__(self):
+        self.series = {}
+
+    def add(self, tool, decision, mode, micros):
+        series = self.series.get((tool, decision, mode))
+        if series is None:
+            series = self.series[(tool, decision, mode)] = _new_series()
+        series["count"] += 1
+        series["sum_us"] += micros
+        series["buckets"][bisect_left(BUCKETS_US, micros)] += 1
+
+    def merge(self, other):
+        for key, theirs in other.series.items():
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _new_series()
+            series["count"] += theirs["count"]
+            series["sum_us"] += theirs["sum_us"]
+            for i, count in enumerate(theirs["buckets"]):
+                series["buckets"][i] += count
+
+    def add_journal(self, data):
+        """Count the journal lines in data (bytes); torn lines are skipped."""
+        for line in data.decode("utf-8", "replace").splitlines():
+            fields = line.split("\t")
+            if len(fields) != 4 or not fields[3].isdigit():
+                continue
+            tool, decision, mode, micros = fields
+            if decision in DECISIONS and (mode in HOOK_MODES or mode == DAEMON_MODE):
+                self.add(tool, decision, mode, int(micros))
+
+    def to_json(self):
+        return {
+            "version": METRICS_VERSION,
+            "buckets_us": list(BUCKETS_US),
+            "series": [
+                {"tool": tool, "decision": decision, "mode": mode, **series}
+                for (tool, decision, mode), series in sorted(self.series.items())
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        """Metrics from to_json() output; empty if the layout has changed."""
+        metrics = cls()
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != METRICS_VERSION
+            or data.get("buckets_us") != list(BUCKETS_US)
+        ):
+            return metrics
+        for item in data.get("series", []):
+            try:
+                key = (item["tool"], item["decision"], item["mode"])
+                series = {
+                    "count": int(item["count"]),
+                    "sum_us": int(item["sum_us"]),
+                    "buckets": [int(n) for n in item["buckets"]],
+                }
+            except (KeyError, TypeError, ValueError):
+                continue
+            if len(series["buckets"]) == len(BUCKETS_US) + 1:
+                metrics.series[key] = series
+        return metrics
+
+    def rows(self, daemon=False):
+        """Per (tool, decision) totals of the hook (or the daemon) modes."""
+        merged = {}
+        for (tool, decision, mode), series in self.series.items():
+            if (mode == DAEMON_MODE) != daemon:
+                continue
+            row = merged.setdefault((tool, decision), _new_series())
+            row["count"] += series["count"]
+            row["sum_us"] += series["sum_us"]
+            for i, count in enumerate(series["buckets"]):
+                row["buckets"][i] += count
+        rows = []
+        for (tool, decision), row in sorted(
+            merged.items(), key=lambda item: -item[1]["count"]
+        ):
+            rows.append(
+                {
+                    "tool": tool,
+                    "decision": decision,
+                    "count": row["count"],
+                    "mean_us": row["sum_us"] // max(row["count"], 1),
+                    "p50_us": quantile(row["buckets"], 0.50),
+                    "p95_us": quantile(row["buckets"], 0.95),
+                    "p99_us": quantile(row["buckets"], 0.99),
+                }
+            )
+        return rows
+
+    def summary(self):
+        decisions = dict.fromkeys(DECISIONS, 0)
+        modes = dict.fromkeys(HOOK_MODES, 0)
+        for (tool, decision, mode), series in self.series.items():
+            if mode in modes:
+                decisions[decision] += series["count"]
+                modes[mode] += series["count"]
+        return {
+            "total": sum(decisions.values()),
+            "decisions": decisions,
+            "modes": modes,
+            "tools": self.rows(),
+            "daemon": self.rows(daemon=True),
+        }
+
+    def prometheus(self):
+        """Prometheus text exposition of the counters and histograms."""
+        lines = []
+
+        def histogram(name, labels, series):
+            for bound, cumulative in zip(
+                [f"{b / 1e6:g}" for b in BUCKETS_US] + ["+Inf"],
+                _cumulative(series["buckets"]),
+            ):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {series['sum_us'] / 1e6:g}")
+            lines.append(f"{name}_count{{{labels}}} {series['count']}")
+
+        hook = sorted(
+            (key, series)
+            for key, series in self.series.items()
+            if key[2] != DAEMON_MODE
+        )
+        served = sorted(
+            (key, series)
+            for key, series in self.series.items()
+            if key[2] == DAEMON_MODE
+        )
+        name = "claude_security_hook_decisions_total"
+        lines.append(f"# HELP {name} Security hook verdicts by tool and mode.")
+        lines.append(f"# TYPE {name} counter")
+        for (tool, decision, mode), series in hook:
+            labels = _labels(tool=tool, decision=decision, mode=mode)
+            lines.append(f"{name}{{{labels}}} {series['count']}")
+        name = "claude_security_hook_latency_seconds"
+        lines.append(f"# HELP {name} Security hook time from start to verdict.")
+        lines.append(f"# TYPE {name} histogram")
+        for (tool, decision, mode), series in hook:
+            histogram(name, _labels(tool=tool, decision=decision, mode=mode), series)
+        name = "claude_security_daemon_latency_seconds"
+        lines.append(f"# HELP {name} Security daemon evaluation time per request.")
+        lines.append(f"# TYPE {name} histogram")
+        for (tool, decision, _), series in served:
+            histogram(name, _labels(tool=tool, decision=decision), series)
+        return "\n".join(lines) + "\n"
+
+
+def _cumulative(buckets):
+    total = 0
+    for count in buckets:
+        total += count
+        yield total
+
+
+def _labels(**labels):
+    def escape(value):
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+# =============================================================================
+# Metrics files
+# =============================================================================
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def load(log_dir):
+    """The folded metrics in log_dir (without the pending journal)."""
+    try:
+        with open(os.path.join(log_dir, METRICS_NAME), encoding="utf-8") as f:
+            return Metrics.from_json(json.load(f))
+    except (OSError, ValueError):
+        return Metrics()
+
+
+def fold(log_dir, pending=None):
+    """Fold the journal (and pending in-memory Metrics) into the metrics files.
+
+    The journal is renamed before it is read, so hook calls that append
+    meanwhile start a fresh one; a rename left behind by an interrupted
+    fold is picked up by the next. Returns the folded Metrics.
+    """
+    journal = os.path.join(log_dir, JOURNAL_NAME)
+    folding = journal + ".folding"
+    with _Lock(os.path.join(log_dir, LOCK_NAME)):
+        data = b""
+        try:
+            with open(folding, "rb") as f:
+                data = f.read() + b"\n"
+        except FileNotFoundError:
+            pass
+        try:
+            os.replace(journal, folding)
+            with open(folding, "rb") as f:
+                data += f.read()
+        except FileNotFoundError:
+            pass
+        metrics = load(log_dir)
+        metrics.add_journal(data)
+        if pending is not None:
+            metrics.merge(pending)
+        _write_atomic(
+            os.path.join(log_dir, METRICS_NAME),
+            json.dumps(metrics.to_json(), separators=(",", ":")),
+        )
+        _write_atomic(os.path.join(log_dir, PROM_NAME), metrics.prometheus())
+        try:
+            os.unlink(folding)
+        except FileNotFoundError:
+            pass
+    return metrics
+
+
+def reset(log_dir):
+    """Delete the journal and the metrics files."""
+    with _Lock(os.path.join(log_dir, LOCK_NAME)):
+        for name in (JOURNAL_NAME, JOURNAL_NAME + ".folding", METRICS_NAME, PROM_NAME):
+            try:
+                os.unlink(os.path.join(log_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+
+def format_us(micros):
+    """Human-readable duration of a bucket bound (None: past the last one)."""
+    if micros is None:
+        return f">{BUCKETS_US[-1] // 1000000}s"
+    if micros >= 1000000:
+        return f"{micros / 1000000:.3g}s"
+    if micros >= 1000:
+        return f"{micros / 1000:.3g}ms"
+    return f"{micros}us"
+
+
+def print_summary(summary):
+    decisions = summary["decisions"]
+    modes = summary["modes"]
+    print(
+        f"Hook decisions: {summary['total']} "
+        f"(allow {decisions['allow']}, block {decisions['block']})"
+    )
+    print(
+        f"Answered by:    daemon {modes['daemon']}, in-process {modes['inproc']}, "
+        f"daemon fallback {modes['fallback']}"
+    )
+    for title, rows in (
+        ("Hook latency (start to verdict)", summary["tools"]),
+        ("Daemon evaluation time", summary["daemon"]),
+    ):
+        if not rows:
+            continue
+        print(f"\n{title}; percentiles are histogram bucket bounds:")
+        print(
+            f"  {'Tool':<14} {'Decision':<8} {'Calls':>8} {'Mean':>8}"
+            f" {'p50':>8} {'p95':>8} {'p99':>8}"
+        )
+        for row in rows:
+            print(
+                f"  {row['tool']:<14} {row['decision']:<8} {row['count']:>8}"
+                f" {format_us(row['mean_us']):>8} {format_us(row['p50_us']):>8}"
+                f" {format_us(row['p95_us']):>8} {format_us(row['p99_us']):>8}"
+            )
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="security_metrics",
+        description="Summarize the Claude Code security hook's metrics",
+    )
+    parser.add_argument("--log-dir", default=default_log_dir(), help="Log directory")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    output.add_argument(
+        "--prometheus", action="store_true", help="Print Prometheus text"
+    )
+    output.add_argument(
+        "--reset", action="store_true", help="Delete the collected metrics"
+    )
+    args = parser.parse_args(argv[1:])
+
+    if not os.path.isdir(args.log_dir):
+        print(f"No metrics found in: {args.log_dir}", file=sys.stderr)
+        return 1
+    if args.reset:
+        reset(args.log_dir)
+        print(f"Reset metrics in: {args.log_dir}")
+        return 0
+
+    metrics = fold(args.log_dir)
+    if args.prometheus:
+        sys.stdout.write(metrics.prometheus())
+    elif args.json:
+        print(json.dumps(metrics.summary(), indent=2))
+    elif not metrics.series:
+        print(f"No hook calls recorded yet in: {args.log_dir}")
+    else:
+        print_summary(metrics.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2207 @@
+#!/usr/bin/env python3
+"""Security policy for the Claude Code hooks: what may be read.
+
+security-read-blocker.py is a thin wrapper around run_hook() here; the
+policy lives in this importable module so that its bytecode is cached
+and so that other tooling (export redaction, setup checks, audits) can
+vet paths without spawning the hook:
+
+    from security_policy import check_many
+    verdicts = check_many(paths)  # None or (reason, pattern) per path
+
+check_many() shares the whitelist expansion, the directory
+canonicalization and the compiled matcher across its inputs.
+
+Usage (batch CLI, NDJSON in and out):
+    find ~ -type f | python3 claude/security_policy.py
+    python3 claude/security_policy.py --cwd PROJECT < inputs.ndjson
+
+Each input line is a JSON string (a path), a JSON object with a
+``"path"``, a hook input (an object with ``"tool_name"``), or a bare
+path. Each output line is ``{"path": ..., "block": false}`` or
+``{"path": ..., "block": true, "reason": ..., "pattern": ...}``, in
+input order (hook inputs report their ``"tool_name"`` and ``"target"``).
+
+Part of: dotfiles (github.com/chunminchang/dotfiles)
+"""
+
+# The hook imports this module on every tool call a daemon does not
+# answer, so its imports are on the critical path of most agent actions. The allow path only needs os,
+# sys, json, re (which json already pulls in), stat (which os already
+# pulls in) and time (which the interpreter loads at start-up); everything
+# else (fnmatch, datetime, socket, argparse) is imported where it is used.
+# pathlib and platform are avoided entirely.
+# test_claude_security.py checks this with `python -X importtime`.
+import json
+import re
+import stat
+import sys
+import time
+import os
+
+# Configuration
+LOG_DIR_ENV = "DOTFILES_CLAUDE_SECURITY_LOG_DIR"
+LOG_DIR = os.getenv(LOG_DIR_ENV, os.path.join(os.path.expanduser("~"), ".claude"))
+LOG_FILE = os.path.join(LOG_DIR, "security-blocks.log")
+LOG_GZIP_ENV = "DOTFILES_CLAUDE_SECURITY_LOG_GZIP"  # "true": gzip rotated logs
+DISABLE_ENV = "DOTFILES_CLAUDE_SECURITY_DISABLED"
+WHITELIST_ENV = "DOTFILES_CLAUDE_SECURITY_WHITELIST"
+USER_POLICY_ENV = "DOTFILES_CLAUDE_SECURITY_POLICY"  # path of the policy file
+USER_POLICY_FILE = os.getenv(USER_POLICY_ENV) or os.path.join(
+    LOG_DIR, "security-policy.json"
+)
+SOCKET_FILE = os.path.join(LOG_DIR, "security-hook.sock")
+POLICY_FILE = os.path.join(LOG_DIR, "security-policy.compiled.json")
+POLICY_KEY_FILE = os.path.join(LOG_DIR, "security-policy.key")  # signs POLICY_FILE
+POLICY_VERSION = 1
+DAEMON_TIMEOUT = 1.0  # seconds the hook waits for a daemon verdict
+DAEMON_IDLE_TIMEOUT = 3600  # seconds before an idle daemon exits
+ENV_CACHE_FILE = os.path.join(LOG_DIR, "security-env-cache.json")
+DECISION_CACHE_FILE = os.path.join(LOG_DIR, "security-decisions.json")
+DECISION_CACHE_SIZE = 256  # (tool, path) verdicts kept in DECISION_CACHE_FILE
+ENV_CACHE_SIZE = 256  # .env verdicts kept in ENV_CACHE_FILE
+ENV_SCAN_CHUNK = 64 * 1024  # bytes read per step when scanning a .env file
+ENV_SCAN_LIMIT = 1024 * 1024  # larger .env files are blocked without a scan
+SNIFF_ENV = "DOTFILES_CLAUDE_SECURITY_SNIFF"  # "true": sniff Read targets
+SNIFF_CACHE_FILE = os.path.join(LOG_DIR, "security-sniff-cache.json")
+SNIFF_CACHE_SIZE = 1024  # content verdicts kept in SNIFF_CACHE_FILE
+SNIFF_BYTES = 4096  # bytes of a Read target the sniffer looks at
+METRICS_ENV = "DOTFILES_CLAUDE_SECURITY_METRICS"  # "false": record nothing
+METRICS_JOURNAL = os.path.join(LOG_DIR, "security-metrics.journal")
+METRICS_FOLD_BYTES = 64 * 1024  # journal size at which the hook folds it
+METRICS_FLUSH_INTERVAL = 30  # seconds a busy daemon keeps metrics in memory
+
+# Sensitive file patterns (glob-style, ~ will be expanded)
+SENSITIVE_PATTERNS = [
+    # SSH keys
+    "~/.ssh/id_*",
+    "~/.ssh/*.pem",
+    "~/.ssh/*_rsa",
+    "~/.ssh/*_ed25519",
+    "~/.ssh/*_ecdsa",
+    "~/.ssh/*_dsa",
+    "~/.gnupg/*",
+    # Mozilla credentials
+    "~/.arcrc",
+    "~/.hgrc",
+    "~/.moz-phab-config",
+    "*/pernosco-submit",
+    # Cloud credentials
+    "~/.aws/credentials",
+    "~/.aws/config",
+    "~/.gcp/*.json",
+    "~/.azure/credentials",
+    "~/.config/gcloud/*credential*",
+    # Git credentials
+    "~/.git-credentials",
+    "~/.config/gh/hosts.yml",
+    "*/.git-credentials",
+    "~/AppData/Local/GitCredentialManager/*",
+    # API tokens
+    "~/.netrc",
+    "~/.npmrc",
+    "~/.pypirc",
+    # Password managers
+    "~/.password-store/*",
+    "~/Library/Keychains/*",
+    "~/.mozilla/firefox/*/key*.db",
+    "~/.mozilla/firefox/*/logins.json",
+    "~/AppData/Roaming/Mozilla/Firefox/Profiles/*/key*.db",
+    "~/AppData/Roaming/Mozilla/Firefox/Profiles/*/logins.json",
+    "~/.config/1Password/*",
+    "~/AppData/Local/Microsoft/Credentials/*",
+    "~/AppData/Roaming/Microsoft/Credentials/*",
+    # Containers & clusters
+    "~/.docker/config.json",
+    "~/.kube/config",
+    # Browser data
+    "*/Cookies",
+    "*/Login Data",
+    "*/Web Data",
+    # System
+    "/etc/shadow",
+    # This hook: whoever holds the key can forge a compiled policy
+    POLICY_KEY_FILE,
+]
+
+# Files that are fine to read but must not be modified (Write, Edit,
+# MultiEdit, NotebookEdit): changing them grants access to the machine.
+WRITE_PROTECTED_PATTERNS = [
+    "~/.ssh/*",  # authorized_keys, config, known_hosts
+]
+
+# The hook's own state: whoever rewrites one of these decides its
+# verdicts (allow globs, forged cache entries or matchers, a fake daemon
+# on the socket). No tool may modify them and no Bash command may name
+# them, or LOG_DIR itself; see hook_state_target.
+HOOK_STATE_FILES = [
+    USER_POLICY_FILE,
+    POLICY_FILE,
+    POLICY_KEY_FILE,
+    DECISION_CACHE_FILE,
+    ENV_CACHE_FILE,
+    SNIFF_CACHE_FILE,
+    SOCKET_FILE,
+]
+
+# Explicitly safe patterns (always allow)
+SAFE_PATTERNS = [
+    "~/.mozbuild/*",
+]
+
+# Sensitive keywords for .env files
+SENSITIVE_KEYWORDS = [
+    "API_KEY",
+    "APIKEY",
+    "API_SECRET",
+    "SECRET_KEY",
+    "SECRET",
+    "PRIVATE_KEY",
+    "PASSWORD",
+    "PASSWD",
+    "PWD",
+    "TOKEN",
+    "AUTH_TOKEN",
+    "ACCESS_TOKEN",
+    "CREDENTIAL",
+    "CLIENT_SECRET",
+    "AWS_SECRET",
+    "GCP_KEY",
+    "PERNOSCO_USER_SECRET_KEY",
+    "TASKCLUSTER_ACCESS_TOKEN",
+    "BUGZILLA_API_KEY",
+]
+
+
+def matches_pattern(file_path, pattern):
+    """Check if file_path matches glob pattern.
+
+    Reference semantics for the compiled matchers below.
+    """
+    from fnmatch import fnmatch
+
+    expanded_path = os.path.expanduser(file_path)
+    expanded_pattern = os.path.expanduser(pattern)
+    return fnmatch(expanded_path, expanded_pattern)
+
+
+def pattern_source(patterns):
+    """Regex source matching any of the glob patterns.
+
+    Patterns are home-expanded and case-normalized once, exactly as
+    fnmatch() would do per call, and each becomes a named group
+    ``p<index>`` so ``match.lastgroup`` tells which pattern fired.
+    """
+    from fnmatch import translate
+
+    parts = [
+        f"(?P<p{i}>{translate(os.path.normcase(os.path.expanduser(pattern)))})"
+        for i, pattern in enumerate(patterns)
+    ]
+    return "|".join(parts) or "(?!)"
+
+
+def compile_patterns(patterns):
+    """Compile glob patterns into a single alternation regex."""
+    return re.compile(pattern_source(patterns))
+
+
+def _literal_bounds(pattern):
+    """Literal text before the first and after the last glob metachar."""
+    starts = [i for i in (pattern.find(c) for c in "*?[") if i >= 0]
+    if not starts:
+        return pattern, pattern
+    ends = [pattern.rfind(c) for c in "*?]"]
+    return pattern[: min(starts)], pattern[max(ends) + 1 :]
+
+
+class PatternMatcher:
+    """Compiled matcher for one pattern list.
+
+    Every pattern match implies the path starts with the pattern's
+    literal prefix (or, for patterns starting with a wildcard, ends with
+    its literal suffix). Those two tuples are checked first with C-level
+    str.startswith/endswith, and the alternation regex is only compiled
+    (once) and run for paths that pass. Most allowed paths never pay
+    for the regex at all.
+    """
+
+    def __init__(self, patterns, compiled=None):
+        """Build from patterns, or from a to_dict() entry of the artifact."""
+        self.patterns = patterns
+        self._regex = None
+        if compiled is not None:
+            self.prefixes = tuple(compiled["prefixes"])
+            self.suffixes = tuple(compiled["suffixes"])
+            self.always = compiled["always"]
+            self.source = compiled["source"]
+            return
+        expanded = [os.path.normcase(os.path.expanduser(p)) for p in patterns]
+        bounds = [_literal_bounds(p) for p in expanded]
+        self.prefixes = tuple(pre for pre, _ in bounds if pre)
+        self.suffixes = tuple(suf for pre, suf in bounds if not pre and suf)
+        self.always = any(not pre and not suf for pre, suf in bounds)
+        self.source = None  # translated lazily, only for candidates
+
+    def to_dict(self):
+        """Serializable form for the compiled policy artifact."""
+        return {
+            "patterns": list(self.patterns),
+            "prefixes": list(self.prefixes),
+            "suffixes": list(self.suffixes),
+            "always": self.always,
+            "source": self.source or pattern_source(self.patterns),
+        }
+
+    def match(self, file_path):
+        """Return the first pattern matching file_path, or None."""
+        path = os.path.normcase(os.path.expanduser(file_path))
+        if not (
+            self.always
+            or path.startswith(self.prefixes)
+            or path.endswith(self.suffixes)
+        ):
+            return None
+        if self._regex is None:
+            self._regex = re.compile(self.source or pattern_source(self.patterns))
+        m = self._regex.match(path)
+        if m is None:
+            return None
+        return self.patterns[int(m.lastgroup[1:])]
+
+
+_MATCHERS = {}
+
+
+def match_pattern(file_path, patterns):
+    """Return the first pattern in patterns matching file_path, or None.
+
+    One prefilter plus at most one regex match per path instead of one
+    fnmatch() per pattern; matchers are built on first use per process.
+    """
+    matcher = _MATCHERS.get(id(patterns))
+    if matcher is None:
+        compiled = next(
+            (
+                m
+                for m in load_policy().get("matchers", {}).values()
+                if m.get("patterns") == patterns
+            ),
+            None,
+        )
+        matcher = _MATCHERS[id(patterns)] = PatternMatcher(patterns, compiled)
+    return matcher.match(file_path)
+
+
+# =============================================================================
+# Compiled policy artifact (--compile-policy)
+# =============================================================================
+
+_POLICY = None
+
+
+def _script_mtime_ns():
+    return os.stat(os.path.abspath(__file__)).st_mtime_ns
+
+
+def _expand_whitelist(whitelist):
+    return {
+        os.path.expanduser(p.strip()) for p in whitelist.split(os.pathsep) if p.strip()
+    }
+
+
+def compile_policy():
+    """Build the policy artifact: expanded matchers and whitelist.
+
+    Raises ValueError if the policy file (USER_POLICY_FILE) is invalid.
+    """
+    whitelist = os.getenv(WHITELIST_ENV, "")
+    return {
+        "version": POLICY_VERSION,
+        "script_mtime_ns": _script_mtime_ns(),
+        "home": os.path.expanduser("~"),
+        "whitelist_env": whitelist,
+        "whitelist": sorted(_expand_whitelist(whitelist)),
+        "matchers": {
+            "sensitive": PatternMatcher(SENSITIVE_PATTERNS).to_dict(),
+            "safe": PatternMatcher(SAFE_PATTERNS).to_dict(),
+            "write": PatternMatcher(WRITE_PROTECTED_PATTERNS).to_dict(),
+        },
+        "user_policy": {
+            "path": USER_POLICY_FILE,
+            "stamp": _user_policy_stamp(),
+            **read_user_policy().to_dict(),
+        },
+    }
+
+
+def _write_json(path, data):
+    """Atomically write data as JSON to path (a file in LOG_DIR)."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _policy_key(create=False):
+    """The key POLICY_FILE is signed with (b"" if there is none yet).
+
+    The key never leaves POLICY_KEY_FILE, which no tool may read or
+    write (it is both a SENSITIVE_PATTERNS entry and hook state).
+    """
+    try:
+        with open(POLICY_KEY_FILE, "rb") as f:
+            key = f.read()
+    except OSError:
+        key = b""
+    if len(key) == 32 or not create:
+        return key
+    key = os.urandom(32)
+    os.makedirs(LOG_DIR, exist_ok=True)
+    tmp_path = f"{POLICY_KEY_FILE}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, key)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, POLICY_KEY_FILE)
+    return key
+
+
+def _mac(key, text):
+    """Keyed BLAKE2b of text, in hex."""
+    try:
+        from _blake2 import blake2b  # hashlib's, without loading OpenSSL
+    except ImportError:
+        from hashlib import blake2b
+    return blake2b(text.encode("utf-8"), key=key, digest_size=32).hexdigest()
+
+
+def _policy_digest(policy, key):
+    """Keyed digest of a signed state file's contents (its "digest" aside).
+
+    Signs POLICY_FILE, ENV_CACHE_FILE and SNIFF_CACHE_FILE.
+    """
+    body = json.dumps(
+        {k: v for k, v in policy.items() if k != "digest"},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return _mac(key, body)
+
+
+def reply_mac(key, nonce, block):
+    """MAC of a daemon verdict for the request carrying nonce.
+
+    Only a process that can read POLICY_KEY_FILE can compute it, which
+    the agent's tools cannot; security-read-blocker.py has a copy.
+    """
+    return _mac(key, json.dumps([nonce, block]))
+
+
+def write_policy(policy):
+    """Atomically write the artifact to POLICY_FILE, signed.
+
+    Creates POLICY_KEY_FILE on first use.
+    """
+    digest = _policy_digest(policy, _policy_key(create=True))
+    _write_json(POLICY_FILE, {**policy, "digest": digest})
+
+
+def load_policy():
+    """Return the compiled policy artifact, or {} if there is none.
+
+    The artifact is read once per process. A stale one (this module or
+    the policy file changed since it was compiled, or $HOME moved) is
+    regenerated in place, best-effort, and so is one whose digest does
+    not match its contents (edited by hand or by a tool); a missing one
+    is left missing so that running the hook outside a setup.py install
+    never writes it.
+    """
+    global _POLICY
+    if _POLICY is not None:
+        return _POLICY
+    _POLICY = {}
+    try:
+        with open(POLICY_FILE, encoding="utf-8") as f:
+            policy = json.load(f)
+    except (OSError, ValueError):
+        return _POLICY
+    key = _policy_key()
+    if (
+        isinstance(policy, dict)
+        and key
+        and policy.get("digest") == _policy_digest(policy, key)
+        and policy.get("version") == POLICY_VERSION
+        and policy.get("script_mtime_ns") == _script_mtime_ns()
+        and policy.get("home") == os.path.expanduser("~")
+        and _user_policy_current(policy.get("user_policy"))
+    ):
+        _POLICY = policy
+        return _POLICY
+    try:
+        _POLICY = compile_policy()
+        write_policy(_POLICY)
+    except (OSError, ValueError):
+        pass
+    return _POLICY
+
+
+# =============================================================================
+# Policy file (allow/deny globs)
+# =============================================================================
+
+# The policy file is JSON with optional "allow" and "deny" glob lists
+# and optional per-project sections that apply while the session cwd is
+# inside the project root:
+#
+#     {
+#         "allow": ["~/work/test-keys/*.pem"],
+#         "deny": ["~/secrets/*", "*/service-account*.json"],
+#         "projects": {
+#             "~/src/firefox": {"allow": ["security/manager/ssl/tests/*"]}
+#         }
+#     }
+#
+# Relative globs in a project section are relative to its root. Deny
+# globs beat everything else; allow globs work like the whitelist.
+
+_USER_POLICY = (None, None)
+_USER_POLICY_KEYS = ("allow", "deny")
+
+
+def _user_policy_stamp():
+    """[mtime_ns, size] of the policy file, or None if there is none."""
+    try:
+        st = os.stat(USER_POLICY_FILE)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _user_policy_current(compiled):
+    """True if compiled (an artifact entry) matches the policy file."""
+    return (
+        isinstance(compiled, dict)
+        and compiled.get("path") == USER_POLICY_FILE
+        and compiled.get("stamp") == _user_policy_stamp()
+    )
+
+
+def _policy_globs(section, where, root=None):
+    """The allow and deny glob lists of one section, validated."""
+    if not isinstance(section, dict):
+        raise ValueError(f"{where}: expected an object")
+    known = _USER_POLICY_KEYS + (("projects",) if root is None else ())
+    unknown = set(section) - set(known)
+    if unknown:
+        raise ValueError(f"{where}: unknown keys {sorted(unknown)}")
+    globs = []
+    for key in _USER_POLICY_KEYS:
+        entries = section.get(key, [])
+        if not isinstance(entries, list) or not all(
+            isinstance(entry, str) and entry.strip() for entry in entries
+        ):
+            raise ValueError(f"{where}.{key}: expected a list of glob strings")
+        if root is not None:
+            entries = [
+                entry
+                if entry.startswith("*") or os.path.isabs(os.path.expanduser(entry))
+                else os.path.join(root, entry)
+                for entry in entries
+            ]
+        globs.append(entries)
+    return globs
+
+
+class UserPolicy:
+    """The policy file's allow/deny globs, compiled like the built-ins.
+
+    ``sections`` is a list of (root, allow, deny) with PatternMatchers
+    for allow and deny; root is None for the top-level globs and the
+    expanded project directory for a per-project section.
+    """
+
+    def __init__(self, sections):
+        self.sections = sections
+        self._scopes = {}
+
+    @classmethod
+    def from_json(cls, data):
+        """Parse the policy file's JSON; raises ValueError if invalid."""
+        sections = []
+        allow, deny = _policy_globs(data, "policy")
+        if allow or deny:
+            sections.append((None, PatternMatcher(allow), PatternMatcher(deny)))
+        projects = data.get("projects", {})
+        if not isinstance(projects, dict):
+            raise ValueError("policy.projects: expected an object")
+        for root, section in projects.items():
+            root = os.path.normpath(os.path.expanduser(root))
+            if not os.path.isabs(root):
+                raise ValueError(f"policy.projects: {root!r} is not absolute")
+            allow, deny = _policy_globs(section, f"policy.projects[{root!r}]", root)
+            sections.append((root, PatternMatcher(allow), PatternMatcher(deny)))
+        return cls(sections)
+
+    def to_dict(self):
+        """Serializable form for the compiled policy artifact."""
+        return {
+            "sections": [
+                {"root": root, "allow": allow.to_dict(), "deny": deny.to_dict()}
+                for root, allow, deny in self.sections
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, compiled):
+        return cls(
+            [
+                (
+                    section["root"],
+                    PatternMatcher(section["allow"]["patterns"], section["allow"]),
+                    PatternMatcher(section["deny"]["patterns"], section["deny"]),
+                )
+                for section in compiled["sections"]
+            ]
+        )
+
+    def _applicable(self, cwd):
+        cwd = os.path.normcase(cwd or os.getcwd())
+        for root, allow, deny in self.sections:
+            if root is not None:
+                root = os.path.normcase(root)
+                if cwd != root and not cwd.startswith(root.rstrip(os.sep) + os.sep):
+                    continue
+            yield allow, deny
+
+    def denied(self, file_path, cwd=None):
+        """Return the deny glob matching file_path, or None."""
+        for _, deny in self._applicable(cwd):
+            pattern = deny.match(file_path)
+            if pattern is not None:
+                return pattern
+        return None
+
+    def allowed(self, file_path, cwd=None):
+        """Return the allow glob matching file_path, or None."""
+        for allow, _ in self._applicable(cwd):
+            pattern = allow.match(file_path)
+            if pattern is not None:
+                return pattern
+        return None
+
+    def scope_overlap(self, path, cwd=None):
+        """Deny glob whose matches may lie under the search root path."""
+        for _, deny in self._applicable(cwd):
+            index = self._scopes.get(id(deny))
+            if index is None:
+                index = self._scopes[id(deny)] = ScopeIndex(deny.patterns)
+            pattern = index.overlap(path)
+            if pattern is not None:
+                return pattern
+        return None
+
+
+def read_user_policy():
+    """Parse USER_POLICY_FILE (an empty policy if there is none).
+
+    Raises ValueError if the file is not a valid policy.
+    """
+    try:
+        with open(USER_POLICY_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return UserPolicy([])
+    except OSError as e:
+        raise ValueError(str(e))
+    return UserPolicy.from_json(data)
+
+
+def user_policy():
+    """The policy file's UserPolicy, rebuilt whenever the file changes.
+
+    One stat per call checks the file's [mtime_ns, size] stamp. The
+    compiled artifact carries the parsed and pre-translated globs, so a
+    stamp change re-reads the file only until the artifact has been
+    regenerated. An invalid file is ignored here (the built-in patterns
+    still apply); --compile-policy reports the error.
+    """
+    global _USER_POLICY
+    stamp = _user_policy_stamp()
+    if _USER_POLICY[1] is not None and _USER_POLICY[0] == stamp:
+        return _USER_POLICY[1]
+    compiled = load_policy().get("user_policy")
+    policy = None
+    if _user_policy_current(compiled):
+        try:
+            policy = UserPolicy.from_dict(compiled)
+        except (KeyError, TypeError):
+            pass
+    if policy is None:
+        try:
+            policy = read_user_policy()
+        except ValueError:
+            policy = UserPolicy([])
+    _USER_POLICY = (stamp, policy)
+    return policy
+
+
+# =============================================================================
+# .env secret scanning
+# =============================================================================
+
+_ENV_SCANNER = None
+_ENV_CACHE = None
+
+
+def minimal_keywords(keywords):
+    """Upper-cased keywords minus those containing another keyword.
+
+    A keyword that contains another one (ACCESS_TOKEN contains TOKEN)
+    can never produce a match the shorter one would miss, so it only
+    slows the scan down.
+    """
+    kept = []
+    for keyword in sorted({k.upper() for k in keywords}, key=lambda k: (len(k), k)):
+        if not any(other in keyword for other in kept):
+            kept.append(keyword)
+    return kept
+
+
+def _env_scanner():
+    """(keywords, regex, longest keyword length), built once per process."""
+    global _ENV_SCANNER
+    if _ENV_SCANNER is None:
+        keywords = minimal_keywords(SENSITIVE_KEYWORDS)
+        regex = re.compile(
+            b"|".join(re.escape(k.encode("ascii")) for k in keywords), re.IGNORECASE
+        )
+        _ENV_SCANNER = (keywords, regex, max(len(k) for k in keywords))
+    return _ENV_SCANNER
+
+
+def scan_env_file(path):
+    """Return True if any sensitive keyword occurs in the file at path.
+
+    The file is read in ENV_SCAN_CHUNK-sized binary chunks; each chunk is
+    searched together with the last (longest keyword - 1) bytes of the
+    previous one so that keywords spanning a chunk boundary are found.
+    """
+    _, regex, longest = _env_scanner()
+    overlap = longest - 1
+    tail = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(ENV_SCAN_CHUNK)
+            if not chunk:
+                return False
+            window = tail + chunk
+            if regex.search(window):
+                return True
+            tail = window[-overlap:] if overlap else b""
+
+
+def _env_cache():
+    """The on-disk verdict cache as {key: bool}, loaded once per process.
+
+    The cache is dropped when the keyword set changes or its digest does
+    not match (a forged "not sensitive" verdict would skip the scan).
+    """
+    global _ENV_CACHE
+    if _ENV_CACHE is not None:
+        return _ENV_CACHE
+    _ENV_CACHE = {}
+    try:
+        with open(ENV_CACHE_FILE, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return _ENV_CACHE
+    key = _policy_key()
+    if (
+        isinstance(cache, dict)
+        and key
+        and cache.get("digest") == _policy_digest(cache, key)
+        and cache.get("keywords") == _env_scanner()[0]
+        and isinstance(cache.get("verdicts"), dict)
+    ):
+        _ENV_CACHE = cache["verdicts"]
+    return _ENV_CACHE
+
+
+def _store_env_verdict(real_path, key, verdict):
+    """Record a verdict, evicting stale and oldest entries, and persist."""
+    cache = _env_cache()
+    prefix = real_path + "|"
+    for old in [k for k in cache if k.startswith(prefix)]:
+        del cache[old]
+    cache[key] = verdict
+    while len(cache) > ENV_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    data = {"keywords": _env_scanner()[0], "verdicts": cache}
+    try:
+        data["digest"] = _policy_digest(data, _policy_key(create=True))
+        _write_json(ENV_CACHE_FILE, data)
+    except OSError:
+        pass
+
+
+def is_safe_path(file_path):
+    """Check if path is explicitly safe."""
+    return match_pattern(file_path, SAFE_PATTERNS) is not None
+
+
+def is_sensitive_path(file_path):
+    """Check if path matches sensitive patterns."""
+    return match_pattern(file_path, SENSITIVE_PATTERNS) is not None
+
+
+def is_sensitive_env_file(file_path, cwd=None, force=False):
+    """Check if .env file contains sensitive data.
+
+    Relative paths are resolved against ``cwd`` (the hook's cwd when
+    None), which lets the daemon evaluate on behalf of another process.
+    ``force`` scans file_path even if its name is not .env-like (a
+    symlink named .env resolved to its target).
+    Files larger than ENV_SCAN_LIMIT are treated as sensitive without
+    being read. Verdicts are cached in ENV_CACHE_FILE keyed by
+    (realpath, size, mtime_ns), so an unchanged file costs one stat.
+    """
+    if not (force or _is_env_name(file_path)):
+        return False
+
+    try:
+        expanded = os.path.expanduser(file_path)
+        if cwd:
+            expanded = os.path.join(cwd, expanded)
+        real_path = os.path.realpath(expanded)
+        st = os.stat(real_path)
+    except (OSError, ValueError):
+        return False
+    if not stat.S_ISREG(st.st_mode):
+        return False
+    if st.st_size > ENV_SCAN_LIMIT:
+        return True
+
+    key = f"{real_path}|{st.st_size}|{st.st_mtime_ns}"
+    verdict = _env_cache().get(key)
+    if verdict is None:
+        try:
+            verdict = scan_env_file(real_path)
+        except OSError:
+            return False
+        _store_env_verdict(real_path, key, verdict)
+    return verdict
+
+
+def is_whitelisted(file_path, whitelist=None):
+    """Check if path is in whitelist.
+
+    Whitelist entries are separated by os.pathsep (`:` on Unix, `;` on
+    Windows) so that absolute Windows paths like ``C:\\Users\\...`` are
+    not mis-split on the drive-letter colon. ``whitelist`` defaults to
+    $DOTFILES_CLAUDE_SECURITY_WHITELIST.
+    """
+    if whitelist is None:
+        whitelist = os.getenv(WHITELIST_ENV, "")
+    if not whitelist:
+        return False
+    return os.path.expanduser(file_path) in _whitelist_entries(whitelist)
+
+
+_WHITELIST = (None, frozenset())
+
+
+def _whitelist_entries(whitelist):
+    """Expanded whitelist entries, memoized for the last whitelist seen."""
+    global _WHITELIST
+    if _WHITELIST[0] != whitelist:
+        policy = load_policy()
+        if policy and policy.get("whitelist_env") == whitelist:
+            entries = policy["whitelist"]
+        else:
+            entries = _expand_whitelist(whitelist)
+        _WHITELIST = (whitelist, frozenset(entries))
+    return _WHITELIST[1]
+
+
+def log_block(hook_input, file_path, reason, pattern=None):
+    """Log blocked access, with the sensitive pattern that matched."""
+    from datetime import datetime
+
+    entry = {
+        "timestamp": datetime.now().isoformat(),
+        "tool_name": hook_input.get("tool_name", "Unknown"),
+        "file_path": str(file_path),
+        "reason": reason,
+        "session_id": hook_input.get("session_id", "Unknown"),
+        "cwd": hook_input.get("cwd", "Unknown"),
+    }
+    if pattern:
+        entry["pattern"] = pattern
+
+    # security_log sits next to this module (on sys.path) and handles
+    # rotation and the sidecar index; only blocks pay for importing it.
+    try:
+        from security_log import SecurityLog
+
+        SecurityLog(LOG_DIR, compress=os.getenv(LOG_GZIP_ENV) == "true").append(entry)
+    except:
+        pass
+
+    sys.stderr.write(f"\n{'='*60}\n")
+    sys.stderr.write(f"🔒 SECURITY HOOK: Blocked access to sensitive file\n")
+    sys.stderr.write(f"{'='*60}\n")
+    sys.stderr.write(f"Time:     {entry['timestamp']}\n")
+    sys.stderr.write(f"Tool:     {entry['tool_name']}\n")
+    sys.stderr.write(f"File:     {file_path}\n")
+    sys.stderr.write(f"Reason:   {reason}\n")
+    if pattern:
+        sys.stderr.write(f"Pattern:  {pattern}\n")
+    sys.stderr.write(f"Session:  {entry['session_id']}\n")
+    sys.stderr.write(f"Directory: {entry['cwd']}\n")
+    sys.stderr.write(f"\nThis access was blocked to protect sensitive credentials.\n")
+    sys.stderr.write(f"Log file: {LOG_FILE}\n")
+    sys.stderr.write(f"\nTo override (use with extreme caution):\n")
+    sys.stderr.write(f"  export {DISABLE_ENV}=true\n")
+    sys.stderr.write(f"{'='*60}\n\n")
+
+
+# =============================================================================
+# Content sniffing (opt-in, $DOTFILES_CLAUDE_SECURITY_SNIFF=true)
+# =============================================================================
+
+# Secrets recognizable from a file's first bytes, whatever it is called.
+# Each alternative is a named group, so match.lastgroup names the format.
+# Generic tokens only count as an assigned value (api_key = ..., "token":
+# ...) and must also pass _looks_random; bare random-looking strings
+# (hashes, lockfile integrity fields) are too common to flag.
+_SNIFF_SOURCE = rb"""
+    (?P<pem>-----BEGIN\ (?:[A-Z0-9]+\ )*PRIVATE\ KEY(?:\ BLOCK)?-----)
+  | (?P<putty>PuTTY-User-Key-File-\d)
+  | (?P<aws>(?<![A-Z0-9])(?:AKIA|ASIA)[A-Z0-9]{16}(?![A-Z0-9]))
+  | (?P<github>(?<!\w)(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_\w{22,}))
+  | (?P<slack>(?<!\w)xox[abposr]-[A-Za-z0-9-]{10,})
+  | (?P<google>(?<!\w)AIza[0-9A-Za-z_-]{35})
+  | (?P<stripe>(?<!\w)[rs]k_live_[0-9A-Za-z]{24,})
+  | (?P<api_key>(?<!\w)sk-(?:ant-)?[A-Za-z0-9_-]{32,})
+  | (?P<phabricator>(?<!\w)api-[a-z0-9]{28}(?![a-z0-9]))
+  | (?i:api[_-]?key|secret|token|passw(?:or)?d|auth)[\w.-]*["']?\s*[:=]\s*["']?
+    (?P<token>[A-Za-z0-9+/_.=-]{20,})
+"""
+_SNIFFER = None
+_SNIFF_CACHE = None
+
+
+def _sniffer():
+    global _SNIFFER
+    if _SNIFFER is None:
+        _SNIFFER = re.compile(_SNIFF_SOURCE, re.VERBOSE)
+    return _SNIFFER
+
+
+def _looks_random(token):
+    """True for a token with letters and digits and >= 3.5 bits/char."""
+    if not (any(c.isdigit() for c in token) and any(c.isalpha() for c in token)):
+        return False
+    from math import log2
+
+    counts = {}
+    for c in token:
+        counts[c] = counts.get(c, 0) + 1
+    n = len(token)
+    return -sum(k / n * log2(k / n) for k in counts.values()) >= 3.5
+
+
+def sniff_bytes(data):
+    """Name of the first secret format found in data, or None."""
+    for m in _sniffer().finditer(data):
+        if m.lastgroup != "token" or _looks_random(m.group("token").decode()):
+            return m.lastgroup
+    return None
+
+
+def _sniff_cache():
+    """The on-disk sniff verdicts as {"dev:ino": [mtime_ns, size, found]}.
+
+    Loaded once per process and dropped when this module changes, since
+    verdicts depend on the detectors above, or when its digest does not
+    match (a forged "nothing found" verdict would skip the read).
+    """
+    global _SNIFF_CACHE
+    if _SNIFF_CACHE is not None:
+        return _SNIFF_CACHE
+    _SNIFF_CACHE = {}
+    try:
+        with open(SNIFF_CACHE_FILE, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return _SNIFF_CACHE
+    key = _policy_key()
+    if (
+        isinstance(cache, dict)
+        and key
+        and cache.get("digest") == _policy_digest(cache, key)
+        and cache.get("script_mtime_ns") == _script_mtime_ns()
+        and isinstance(cache.get("verdicts"), dict)
+    ):
+        _SNIFF_CACHE = cache["verdicts"]
+    return _SNIFF_CACHE
+
+
+def sniff_file(path):
+    """Secret format detected in path's first SNIFF_BYTES, or None.
+
+    Verdicts are cached in SNIFF_CACHE_FILE by (device, inode) and
+    revalidated against (mtime_ns, size), so an unchanged file costs one
+    stat and an unseen one a single read of at most SNIFF_BYTES.
+    """
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        return None
+    cache = _sniff_cache()
+    inode = f"{st.st_dev}:{st.st_ino}"
+    stamp = [st.st_mtime_ns, st.st_size]
+    entry = cache.get(inode)
+    if entry is not None and entry[:2] == stamp:
+        return entry[2]
+    try:
+        with open(path, "rb") as f:
+            found = sniff_bytes(f.read(SNIFF_BYTES))
+    except OSError:
+        return None
+    cache.pop(inode, None)
+    cache[inode] = stamp + [found]
+    while len(cache) > SNIFF_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    data = {"script_mtime_ns": _script_mtime_ns(), "verdicts": cache}
+    try:
+        data["digest"] = _policy_digest(data, _policy_key(create=True))
+        _write_json(SNIFF_CACHE_FILE, data)
+    except OSError:
+        pass
+    return found
+
+
+# =============================================================================
+# Bash command analysis
+# =============================================================================
+
+# One left-to-right pass over the command. Every alternative consumes at
+# least one character and none of them can backtrack into another, so
+# tokenizing is linear in the command length. Heredoc bodies are skipped
+# with one search for their delimiter line (see shell_words). A word is
+# matched whole, quoted parts included; quotes are removed afterwards.
+_SHELL_TOKEN = re.compile(
+    r"""
+    [ \t\r]*
+    (?:
+        (?P<op>\n|&&|\|\||[;&|()`]|[<>]+[&|]?)
+      | (?P<word>(?:
+            '[^']*'?
+          | "(?:[^"\\]|\\.)*"?
+          | \\.
+          | [^\s'"\\;&|()`<>]
+        )+)
+      | (?P<other>.)
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_SHELL_UNQUOTE = re.compile(
+    r"""'([^']*)'?|"((?:[^"\\]|\\.)*)"?|\\(.)""", re.DOTALL
+)
+_SHELL_HOME = re.compile(r"\$(?:\{HOME\}|HOME\b)")
+_SHELL_ASSIGNMENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*=")
+# Words that are a plain file name relative to the working directory:
+# no expansion, no embedded path, no `=` split, no option, no . or ..
+_SHELL_PLAIN_WORD = re.compile(r"[^-/~$=*?\[.][^/~$=*?\[]*")
+# Absolute or home-relative paths embedded in a larger word, such as
+# open('/etc/shadow') inside a quoted python -c program.
+_EMBEDDED_PATH = re.compile(r"(?<![\w.~-])~?/[^\s'\"`,;:()<>|&=]+")
+_CD_COMMANDS = ("cd", "pushd")
+# Commands that run the command named by their first operand.
+_COMMAND_WRAPPERS = frozenset(
+    ["sudo", "doas", "env", "command", "exec", "nice", "nohup", "time", "xargs"]
+)
+# Commands whose plain operands (`cat notes`) are files they read. Other
+# commands' plain words are patterns, messages and the like.
+_FILE_READERS = frozenset(
+    (
+        "cat tac nl less more head tail bat view vi vim nvim nano emacs code "
+        "open xdg-open cp mv ln scp rsync install tee dd tar zip gzip bzip2 xz "
+        "zstd od xxd hexdump strings base64 file stat grep egrep fgrep rg ag "
+        "awk sed jq yq sort uniq cut wc diff cmp comm paste openssl gpg "
+        "ssh-keygen ssh-add source ."
+    ).split()
+)
+# Commands that may run a heredoc as a script, fed to them directly or
+# written to a file they run later, so its body is checked as commands.
+_SHELL_INTERPRETERS = frozenset(
+    (
+        "sh bash zsh dash ksh fish python python3 perl ruby node php lua "
+        "osascript source . eval xargs ssh su sudo doas"
+    ).split()
+)
+BASH_GLOB_LIMIT = 256  # paths a single command's globs may expand to
+BASH_GLOB_DIRS = 64  # directories a single command's globs may list
+
+
+def _unquote(match):
+    """re.sub callback for _SHELL_UNQUOTE."""
+    single, double, escaped = match.groups()
+    if single is not None:
+        return single
+    if double is not None:
+        return re.sub(r"\\(.)", r"\1", double, flags=re.DOTALL)
+    return escaped
+
+
+def shell_words(command, heredocs=None):
+    """Yield (word, starts_command, redirected) for each word of command.
+
+    Quotes are removed and backslash escapes resolved; ``starts_command``
+    is True for the first word of each simple command (after ``;``,
+    ``&&``, ``|``, a newline, etc.) and the assignments before it.
+    ``redirected`` is True for the target of a redirection (``> out``).
+    Heredoc delimiters are not yielded. When a ``heredocs`` list is
+    passed, heredoc bodies are appended to it instead of being tokenized.
+    """
+    at_command = True
+    redirect = False
+    delimiter = None  # after `<<`: "" awaiting the word, "-" for `<<-`
+    pending = []  # (delimiter, strip_tabs) of heredocs opened on this line
+    pos = 0
+    while True:
+        m = _SHELL_TOKEN.match(command, pos)
+        if m is None:
+            break
+        pos = m.end()
+        word = m.group("word")
+        if word is None:
+            op = m.group("op")
+            if op == "\n" and pending:
+                if heredocs is not None:
+                    pos = _skip_heredocs(command, pos, pending, heredocs)
+                pending = []
+            if op and not op.startswith(("<", ">")):
+                at_command = True
+            # Heredoc delimiters and here-strings (<<<) are not file names
+            redirect = bool(op) and op[0] in "<>" and op not in ("<<", "<<<")
+            if op == "<<":
+                delimiter = ""
+            continue
+        if "'" in word or '"' in word or "\\" in word:
+            word = _SHELL_UNQUOTE.sub(_unquote, word)
+        if delimiter is not None:
+            if not delimiter and word.startswith("-"):
+                delimiter, word = "-", word[1:]
+            if word:
+                pending.append((word, delimiter == "-"))
+                delimiter = None
+            continue
+        if redirect:
+            redirect = False
+            yield word, False, True
+            continue
+        yield word, at_command, False
+        at_command = at_command and bool(_SHELL_ASSIGNMENT.match(word))
+
+
+def _skip_heredocs(command, pos, pending, bodies):
+    """Append the bodies of the pending heredocs (starting at pos) to bodies.
+
+    Returns the position just past the delimiter line of the last one.
+    """
+    for delimiter, strip_tabs in pending:
+        tabs = r"\t*" if strip_tabs else ""
+        end = re.compile(rf"^{tabs}{re.escape(delimiter)}\r?$", re.M).search(
+            command, pos
+        )
+        if end is None:  # unterminated: the body runs to the end
+            bodies.append(command[pos:])
+            return len(command)
+        bodies.append(command[pos : end.start()])
+        pos = end.end()
+    return pos
+
+
+def _expand_shell_path(text, home):
+    """Expand $HOME, ${HOME} and a leading ~ in text.
+
+    Quoting is deliberately not honoured here: treating a quoted "~" as
+    the home directory can only make the hook block more, never less.
+    """
+    text = _SHELL_HOME.sub(lambda _: home, text)
+    if text == "~" or text.startswith("~/"):
+        text = home + text[1:]
+    return text
+
+
+def _bounded_glob(pattern, budget):
+    """Yield the paths matching an absolute glob pattern, like glob.iglob.
+
+    Each directory listed costs one unit of ``budget`` (a one-item list
+    shared by the whole command) and expansion stops when it runs out,
+    so ``/*/*/*/x`` or ``/**/x`` cannot walk a huge tree. As in the
+    shell (without globstar), ``**`` matches within one component.
+    """
+    import fnmatch
+
+    drive, rest = os.path.splitdrive(pattern)
+    parts = [part for part in rest.split(os.sep) if part]
+    paths = [drive + os.sep]
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if not any(c in part for c in "*?["):
+            exists = os.path.lexists if last else os.path.isdir
+            paths = [os.path.join(path, part) for path in paths]
+            paths = [path for path in paths if exists(path)]
+            continue
+        matched = []
+        for path in paths:
+            if budget[0] <= 0:
+                break
+            budget[0] -= 1
+            try:
+                with os.scandir(path) as entries:
+                    names = [e.name for e in entries if last or e.is_dir()]
+            except OSError:
+                continue
+            if not part.startswith("."):
+                names = [name for name in names if not name.startswith(".")]
+            matched.extend(os.path.join(path, n) for n in fnmatch.filter(names, part))
+        paths = matched
+    yield from paths
+
+
+def bash_path_candidates(command, cwd):
+    """Yield the absolute paths a Bash command may touch.
+
+    Every argument and redirection target is split on ``=`` (for
+    ``--file=...`` and ``VAR=...``), home-expanded and resolved against
+    the working directory, which follows ``cd`` within the command.
+    Absolute paths embedded in larger words are extracted too, and glob
+    arguments are expanded on disk (up to BASH_GLOB_LIMIT paths, listing
+    at most BASH_GLOB_DIRS directories, in all) in addition to being
+    matched literally. Plain names without any path
+    syntax (``Cookies``, not ``./Cookies``) are only taken as files when
+    they are redirection targets, or operands of a _FILE_READERS command
+    that exist in the working directory or name hook state (a cache not
+    written yet). Heredoc bodies are data, and
+    are only checked (as commands) when the command runs one of
+    _SHELL_INTERPRETERS, which might execute them.
+    """
+    home = os.path.expanduser("~")
+    seen = set()
+    seen_words = set()
+    globbed = 0
+    glob_budget = [BASH_GLOB_DIRS]
+    cd_pending = False
+    name = ""  # the command the current word belongs to
+    wrapped = False  # name is a _COMMAND_WRAPPERS entry awaiting its command
+    names = set()
+    heredocs = []
+    for word, starts_command, redirected in shell_words(command, heredocs):
+        if cd_pending:
+            if starts_command:
+                cwd = home  # bare `cd`
+            elif word.startswith("-") and word != "-":
+                continue  # option, as in `cd -P dir`
+            elif word != "-":  # `cd -` goes somewhere unknown; keep cwd
+                cwd = os.path.join(cwd, _expand_shell_path(word, home))
+                cd_pending = False
+                continue  # entering a directory touches no file in it
+            cd_pending = False
+        if starts_command and word in _CD_COMMANDS:
+            cd_pending = True
+            continue
+        if (starts_command or wrapped and not word.startswith("-")) and (
+            not _SHELL_ASSIGNMENT.match(word)
+        ):
+            name = os.path.basename(word)
+            wrapped = name in _COMMAND_WRAPPERS
+            starts_command = True
+            names.add(name)
+            names.add(name.rstrip("0123456789.") or name)  # python3.11
+        reads = redirected or (not starts_command and name in _FILE_READERS)
+        # Generated commands repeat words a lot; each (cwd, word, reads)
+        # triple yields the same paths, so only the first one is expanded.
+        if (cwd, word, reads) in seen_words:
+            continue
+        seen_words.add((cwd, word, reads))
+        if _SHELL_PLAIN_WORD.fullmatch(word):
+            path = os.path.join(cwd, word)
+            if path not in seen and (
+                redirected
+                or reads
+                and (os.path.lexists(path) or hook_state_target(path) is not None)
+            ):
+                seen.add(path)
+                yield path
+            continue
+        for part in word.split("="):
+            part = _expand_shell_path(part, home)
+            texts = [
+                _expand_shell_path(m.group(), home)
+                for m in _EMBEDDED_PATH.finditer(part)
+            ]
+            if part and not part.startswith("-"):
+                texts.append(part)
+            for text in texts:
+                if _SHELL_PLAIN_WORD.fullmatch(text) and not (
+                    redirected
+                    or reads
+                    and os.path.lexists(os.path.join(cwd, text))
+                ):
+                    continue
+                path = os.path.normpath(os.path.join(cwd, text))
+                if path in seen:
+                    continue
+                seen.add(path)
+                yield path
+                if globbed < BASH_GLOB_LIMIT and any(c in path for c in "*?["):
+                    for match in _bounded_glob(path, glob_budget):
+                        yield match
+                        globbed += 1
+                        if globbed >= BASH_GLOB_LIMIT:
+                            break
+    if heredocs and not names.isdisjoint(_SHELL_INTERPRETERS):
+        for body in heredocs:
+            for path in bash_path_candidates(body, cwd):
+                if path not in seen:
+                    seen.add(path)
+                    yield path
+
+
+def check_bash_command(hook_input, command, whitelist=None, cwd=None):
+    """Return (path, reason, pattern) for the first sensitive path touched.
+
+    Paths are checked exactly like Read's file_path (see check_path),
+    except that naming the hook's own state blocks whatever the command
+    does with it, as reads and writes cannot be told apart here.
+    Relative arguments are resolved against the hook input's cwd.
+    """
+    base = hook_input.get("cwd") or cwd or os.getcwd()
+    if whitelist is None:
+        whitelist = os.getenv(WHITELIST_ENV, "")
+    dir_memo = {}
+    for path in bash_path_candidates(command, base):
+        canonical = canonical_path(path, dir_memo=dir_memo)
+        state = hook_state_target(path, canonical)
+        if state is not None:
+            return path, HOOK_STATE_REASON, state
+        found = check_path(path, whitelist, base, canonical)
+        if found:
+            return (path, *found)
+    return None
+
+
+# =============================================================================
+# Canonical paths
+# =============================================================================
+
+_CANONICAL_DIRS = {}
+_HOME_ALIAS = None
+CANONICAL_DIR_CACHE_SIZE = 1024  # directories remembered per process
+
+
+def _canonical_dir(path):
+    """realpath() of a directory, cached while its (dev, ino, mtime) holds.
+
+    One lstat validates the entry. lstat resolves every ancestor, so the
+    identity of the directory it reports changes whenever a symlink
+    above it is retargeted; a hit is therefore as good as a fresh
+    realpath() walk, which costs one lstat per component.
+    """
+    try:
+        st = os.lstat(path)
+    except (OSError, ValueError):
+        return os.path.realpath(path)
+    key = (st.st_dev, st.st_ino, st.st_mtime_ns)
+    hit = _CANONICAL_DIRS.get(path)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    real = os.path.realpath(path)
+    if len(_CANONICAL_DIRS) >= CANONICAL_DIR_CACHE_SIZE:
+        _CANONICAL_DIRS.clear()
+    _CANONICAL_DIRS[path] = (key, real)
+    return real
+
+
+def _rehome(path):
+    """Spell a path under the real home directory under $HOME instead."""
+    global _HOME_ALIAS
+    if _HOME_ALIAS is None:
+        home = os.path.expanduser("~")
+        _HOME_ALIAS = (home, os.path.realpath(home))
+    home, real_home = _HOME_ALIAS
+    if real_home != home and (
+        path == real_home or path.startswith(real_home.rstrip(os.sep) + os.sep)
+    ):
+        return home + path[len(real_home) :]
+    return path
+
+
+def canonical_path(file_path, cwd=None, dir_memo=None):
+    """Absolute, symlink-free form of file_path.
+
+    Relative paths are resolved against ``cwd`` (the process cwd when
+    None). ``..`` is applied after the symlinks before it, as the kernel
+    does. Paths under the real home directory are spelled under $HOME
+    as written, so ``~`` patterns still apply when $HOME is a symlink.
+    The parent directory comes from the _canonical_dir cache, so
+    a typical call costs two lstats whatever the path's depth. Callers
+    resolving many paths at once (a Bash command) pass a ``dir_memo``
+    dict to skip re-validating the same parents, leaving one lstat.
+    """
+    path = os.path.join(cwd or os.getcwd(), os.path.expanduser(file_path))
+    return _rehome(_resolve(path, dir_memo))
+
+
+def _resolve(path, dir_memo):
+    """Resolve symlinks in the absolute path; see canonical_path."""
+    for _ in range(40):  # symlink hops, as in the kernel's ELOOP limit
+        parent, name = os.path.split(path)
+        if not name or name in (".", ".."):
+            return _canonical_dir(path)
+        if dir_memo is None:
+            real_parent = _canonical_dir(parent)
+        else:
+            real_parent = dir_memo.get(parent)
+            if real_parent is None:
+                real_parent = dir_memo[parent] = _canonical_dir(parent)
+        candidate = os.path.join(real_parent, name)
+        try:
+            if not stat.S_ISLNK(os.lstat(candidate).st_mode):
+                return candidate
+            path = os.path.join(os.path.dirname(candidate), os.readlink(candidate))
+        except (OSError, ValueError):
+            return candidate
+    return os.path.realpath(path)
+
+
+# =============================================================================
+# Search scope index (Grep/Glob)
+# =============================================================================
+
+
+class ScopeIndex:
+    """Prefix trie of the directories sensitive patterns are rooted in.
+
+    Each pattern is indexed by the path components of its literal prefix
+    (``~/.ssh/id_*`` under ``/home/me/.ssh`` with partial name ``id_``).
+    A search root overlaps a pattern when walking its components either
+    ends on a trie node (the root contains the pattern's subtree) or
+    passes a wildcard entry whose partial name prefixes the next
+    component (the root is inside the pattern's subtree). The walk is
+    O(depth of the search root) and never touches the filesystem.
+    Patterns without a literal prefix (``*/Cookies``) can match anywhere
+    and are left to the per-file checks.
+    """
+
+    def __init__(self, patterns):
+        self.trie = self._node()
+        for pattern in patterns:
+            expanded = os.path.normcase(os.path.expanduser(pattern))
+            literal, _ = _literal_bounds(expanded)
+            if not literal:
+                continue
+            parts = literal.split(os.sep)
+            partial = parts.pop() if literal != expanded else None
+            node = self.trie
+            for part in parts:
+                node["pattern"] = node["pattern"] or pattern
+                node = node["children"].setdefault(part, self._node())
+            node["pattern"] = node["pattern"] or pattern
+            if partial is not None:
+                node["wildcards"].append((partial, pattern))
+
+    @staticmethod
+    def _node():
+        return {"children": {}, "wildcards": [], "pattern": None}
+
+    def overlap(self, path):
+        """Return a pattern whose matches may lie under path, or None.
+
+        ``path`` must be absolute and normalized.
+        """
+        node = self.trie
+        for part in os.path.normcase(path).rstrip(os.sep).split(os.sep):
+            for partial, pattern in node["wildcards"]:
+                if part.startswith(partial):
+                    return pattern
+            node = node["children"].get(part)
+            if node is None:
+                return None
+        return node["pattern"]
+
+
+_SCOPE_INDEX = None
+
+
+def scope_overlap(path):
+    """Sensitive pattern overlapping the search root path, or None."""
+    global _SCOPE_INDEX
+    if _SCOPE_INDEX is None:
+        _SCOPE_INDEX = ScopeIndex(SENSITIVE_PATTERNS)
+    return _SCOPE_INDEX.overlap(path)
+
+
+def check_search_scope(hook_input, whitelist=None, cwd=None):
+    """Return (root, reason, pattern) if a search covers sensitive files.
+
+    The search root is the tool's ``path`` (resolved against the session
+    cwd), or the session cwd itself when there is none, as the tools
+    then search there. For Glob, the literal directory of ``pattern``
+    joined onto that root (or replacing it, for absolute and
+    home-relative patterns) is checked too, so ``.ssh/*`` run from ~
+    is caught. Each root is checked both as written and canonical;
+    safe (by canonical path), whitelisted and policy-allowed roots are
+    allowed, unless a policy deny glob may match under them.
+    """
+    tool_input = hook_input.get("tool_input", {})
+    base = hook_input.get("cwd") or cwd or os.getcwd()
+    roots = [tool_input.get("path") or base]
+    pattern = tool_input.get("pattern", "")
+    if hook_input.get("tool_name") == "Glob" and pattern:
+        top = os.path.join(
+            base, os.path.expanduser(roots[0]), os.path.expanduser(pattern)
+        )
+        roots.append(os.path.dirname(_literal_bounds(top)[0]) or os.sep)
+    policy = user_policy()
+    for root in roots:
+        path = os.path.normpath(os.path.join(base, os.path.expanduser(root)))
+        canonical = canonical_path(path)
+        denied = policy.scope_overlap(path, base) or policy.scope_overlap(
+            canonical, base
+        )
+        if denied:
+            return root, f"Search scope may contain files matching {denied}", denied
+        if (
+            is_safe_path(canonical)
+            or is_whitelisted(path, whitelist)
+            or policy.allowed(path, base)
+        ):
+            continue
+        sensitive = scope_overlap(path) or scope_overlap(canonical)
+        if sensitive:
+            reason = f"Search scope may contain files matching {sensitive}"
+            return root, reason, sensitive
+    return None
+
+
+# =============================================================================
+# Tool call evaluation
+# =============================================================================
+
+
+# Tools that act on one file, and the tool_input field naming it. Adding
+# a tool here also needs its name in the hook matcher (setup.py's
+# CLAUDE_SECURITY_MATCHER). WebFetch is handled by file_url_path.
+PATH_TOOLS = {
+    "Read": "file_path",
+    "Write": "file_path",
+    "Edit": "file_path",
+    "MultiEdit": "file_path",
+    "NotebookEdit": "notebook_path",
+}
+WRITE_TOOLS = frozenset(["Write", "Edit", "MultiEdit", "NotebookEdit"])
+
+
+def _is_env_name(file_path):
+    return file_path.endswith(".env") or ".env." in file_path
+
+
+def file_url_path(url):
+    """The local path of a file: URL, or None for any other URL."""
+    if url[:5].lower() != "file:":
+        return None
+    path = url[5:]
+    if path.startswith("//"):  # file://host/path; the host is not trusted
+        path = "/" + path[2:].partition("/")[2]
+    path = path.partition("?")[0].partition("#")[0]
+    if "%" in path:
+        from urllib.parse import unquote
+
+        path = unquote(path)
+    if os.name == "nt" and re.match(r"/[A-Za-z]:", path):
+        path = path[1:]
+    return path
+
+
+def tool_path(tool_name, tool_input):
+    """The file a single-file tool call touches, or None."""
+    field = PATH_TOOLS.get(tool_name)
+    if field is not None:
+        return tool_input.get(field) or None
+    if tool_name == "WebFetch":
+        return file_url_path(tool_input.get("url") or "")
+    return None
+
+
+_HOOK_STATE = None
+HOOK_STATE_REASON = "Controls the security hook's own verdicts"
+
+
+def hook_state_target(file_path, canonical=None):
+    """The LOG_DIR or HOOK_STATE_FILES entry file_path names, or None.
+
+    Both the path as written and its canonical form (when given) are
+    compared with both forms of each entry, so a symlinked ~/.claude
+    does not hide it.
+    """
+    global _HOOK_STATE
+    if _HOOK_STATE is None:
+        _HOOK_STATE = {}
+        for state in [LOG_DIR, *HOOK_STATE_FILES]:
+            state = os.path.abspath(os.path.expanduser(state))
+            _HOOK_STATE.setdefault(state, state)
+            _HOOK_STATE.setdefault(canonical_path(state), state)
+    for path in (file_path, canonical):
+        if path:
+            found = _HOOK_STATE.get(os.path.normpath(path))
+            if found is not None:
+                return found
+    return None
+
+
+def check_path(
+    file_path, whitelist=None, cwd=None, canonical=None, write=False, sniff=False
+):
+    """Return (reason, pattern) if file_path must be blocked, else None.
+
+    ``pattern`` is the sensitive pattern that matched, or None for a
+    .env file blocked for its content.
+
+    Both the literal path and its canonical form (see canonical_path)
+    are checked, so ``../`` segments and symlinks cannot hide a
+    sensitive target. The whitelist may match either form; the safe
+    pattern exemption only applies to where the path really leads.
+    ``canonical`` may be passed in when the caller already resolved it.
+    The policy file's deny globs are checked before anything else and
+    its allow globs alongside the whitelist (see user_policy), with the
+    sections for ``cwd``. ``write`` also checks WRITE_PROTECTED_PATTERNS,
+    for tools that modify the file, and before any exemption, the hook's
+    own state (see hook_state_target), whose POLICY_KEY_FILE no tool may
+    read either. ``sniff`` also looks for secrets
+    in the content (see sniff_file); the pattern is then
+    ``content:<format>``.
+    """
+    if canonical is None:
+        canonical = canonical_path(file_path, cwd)
+    forms = (file_path,) if canonical == file_path else (file_path, canonical)
+
+    # The hook's state comes first: the policy file cannot allow itself
+    literal = os.path.join(cwd or os.getcwd(), os.path.expanduser(file_path))
+    state = hook_state_target(literal, canonical)
+    if state is not None and (write or state == POLICY_KEY_FILE):
+        return HOOK_STATE_REASON, state
+
+    # Check the policy file's deny globs first: they beat every exemption
+    policy = user_policy()
+    for path in forms:
+        pattern = policy.denied(path, cwd)
+        if pattern is not None:
+            return "Denied by the security policy file", pattern
+
+    # Check safe patterns
+    if is_safe_path(canonical):
+        return None
+
+    # Check whitelist and the policy file's allow globs
+    if any(
+        is_whitelisted(path, whitelist) or policy.allowed(path, cwd) for path in forms
+    ):
+        return None
+
+    # Check .env files
+    if any(_is_env_name(path) for path in forms):
+        if is_sensitive_env_file(canonical, cwd, force=True):
+            return "Contains sensitive environment variables", None
+
+    # Check sensitive patterns
+    for path in forms:
+        pattern = match_pattern(path, SENSITIVE_PATTERNS)
+        if pattern is not None:
+            return "Contains sensitive credentials or keys", pattern
+        if write:
+            pattern = match_pattern(path, WRITE_PROTECTED_PATTERNS)
+            if pattern is not None:
+                return "Grants access to this machine if modified", pattern
+
+    # Sniff the content last: only files no pattern decided get read
+    if sniff:
+        found = sniff_file(os.path.expanduser(canonical))
+        if found:
+            return "Content looks like a private key or token", f"content:{found}"
+
+    return None
+
+
+def evaluate(hook_input, whitelist=None, cwd=None, sniff=None):
+    """Return (target, reason, pattern) if the call must be blocked, else None.
+
+    ``pattern`` is the sensitive pattern responsible, when there is one.
+    Relative paths of every tool are resolved against the hook input's
+    cwd (the session's working directory), falling back to ``cwd`` and
+    then the process cwd.
+    ``sniff`` (default: $DOTFILES_CLAUDE_SECURITY_SNIFF == "true") enables
+    content sniffing of Read targets.
+    """
+    tool_name = hook_input.get("tool_name", "")
+    tool_input = hook_input.get("tool_input", {})
+    cwd = hook_input.get("cwd") or cwd
+
+    # Extract file path
+    file_path = tool_path(tool_name, tool_input)
+    if tool_name == "Bash":
+        command = tool_input.get("command", "")
+        block = check_bash_command(hook_input, command, whitelist, cwd)
+        if block:
+            path, reason, pattern = block
+            reason = f"Bash command accessing sensitive file {path}: {reason}"
+            return command, reason, pattern
+    elif tool_name in ["Grep", "Glob"]:
+        file_path = tool_input.get("path", "")
+        block = check_search_scope(hook_input, whitelist, cwd)
+        if block:
+            return block
+
+    if not file_path:
+        return None
+
+    if tool_name != "Read":
+        sniff = False
+    elif sniff is None:
+        sniff = os.getenv(SNIFF_ENV) == "true"
+    write = tool_name in WRITE_TOOLS
+    found = check_path(file_path, whitelist, cwd, write=write, sniff=sniff)
+    if found:
+        return (file_path, *found)
+    return None
+
+
+# =============================================================================
+# Decision cache
+# =============================================================================
+
+_DECISIONS = None
+
+
+def _policy_fingerprint(whitelist, sniff=False):
+    """Everything besides the tool input that a verdict depends on."""
+    home = os.path.expanduser("~")
+    user = _user_policy_stamp()
+    script = _script_mtime_ns()
+    return f"{POLICY_VERSION}|{script}|{home}|{whitelist}|{sniff:d}|{user}"
+
+
+def decision_key(hook_input, cwd=None):
+    """Cache key for hook_input, or None if its verdict is not cacheable.
+
+    Single-file (PATH_TOOLS, file: WebFetch), Grep and Glob verdicts
+    depend only on the target path as written, where it canonically
+    leads, the session cwd and, for .env files, the file's content,
+    which the (size, mtime_ns) stamp stands in for. Bash verdicts depend
+    on glob expansion and are never cached.
+    """
+    tool_name = hook_input.get("tool_name", "")
+    tool_input = hook_input.get("tool_input", {})
+    if tool_name in ["Grep", "Glob"]:
+        target = tool_input.get("path") or ""
+    else:
+        target = tool_path(tool_name, tool_input)
+        if target is None:
+            return None
+    base = hook_input.get("cwd") or cwd or os.getcwd()
+    canonical = canonical_path(target, base)
+    try:
+        st = os.stat(canonical)
+        stamp = f"{st.st_size}|{st.st_mtime_ns}"
+    except (OSError, ValueError):
+        stamp = "-"
+    key = f"{tool_name}|{base}|{target}|{canonical}|{stamp}"
+    if tool_name == "Glob":
+        key += "|" + tool_input.get("pattern", "")
+    return key
+
+
+def _decision_cache(fingerprint):
+    """The {key: block} LRU for fingerprint, loaded once per process.
+
+    A cache written under another fingerprint (policy, script, $HOME or
+    whitelist changed) is discarded.
+    """
+    global _DECISIONS
+    if _DECISIONS is not None and _DECISIONS[0] == fingerprint:
+        return _DECISIONS[1]
+    entries = {}
+    if _DECISIONS is None:
+        try:
+            with open(DECISION_CACHE_FILE, encoding="utf-8") as f:
+                cache = json.load(f)
+            if cache.get("fingerprint") == fingerprint:
+                entries = dict(cache["entries"])
+        except (OSError, ValueError, AttributeError, KeyError, TypeError):
+            pass
+    _DECISIONS = (fingerprint, entries)
+    return entries
+
+
+def _cached_allow_holds(hook_input, cwd, sniff):
+    """True if a cached allow for hook_input may be returned as is.
+
+    The cache file is data the hook does not fully control, so only an
+    allow no cheap check contradicts is trusted: a single-file call
+    whose target matches no deny, sensitive or write-protected pattern
+    or hook state, and is neither a .env file nor a sniffed Read. Any
+    other allow (Grep and Glob included) is evaluated again; the
+    expensive parts of that have caches of their own.
+    """
+    tool_name = hook_input.get("tool_name", "")
+    target = tool_path(tool_name, hook_input.get("tool_input", {}))
+    if target is None or (tool_name == "Read" and sniff):
+        return False
+    literal = os.path.join(cwd, os.path.expanduser(target))
+    policy = user_policy()
+    write = tool_name in WRITE_TOOLS
+    for path in (literal, canonical_path(target, cwd)):
+        if (
+            _is_env_name(path)
+            or policy.denied(path, cwd) is not None
+            or match_pattern(path, SENSITIVE_PATTERNS) is not None
+        ):
+            return False
+        if write and (
+            match_pattern(path, WRITE_PROTECTED_PATTERNS) is not None
+            or hook_state_target(path) is not None
+        ):
+            return False
+    return True
+
+
+def evaluate_cached(hook_input, whitelist=None, cwd=None, sniff=None):
+    """evaluate() answered from the decision cache where possible.
+
+    Entries are kept most recently used last. Hits reorder the in-memory
+    LRU only; it is written back (and trimmed to DECISION_CACHE_SIZE) on
+    misses, so a repeat verdict costs a stat and a cache read. The key
+    and the verdict resolve relative paths against the same directory,
+    so a verdict is never stored under a target it was not computed for.
+    Cached blocks are returned as they are; cached allows only when
+    _cached_allow_holds(), since a forged allow would open a hole.
+    """
+    cwd = hook_input.get("cwd") or cwd or os.getcwd()
+    key = decision_key(hook_input, cwd)
+    if key is None:
+        return evaluate(hook_input, whitelist, cwd, sniff)
+    if whitelist is None:
+        whitelist = os.getenv(WHITELIST_ENV, "")
+    if sniff is None:
+        sniff = os.getenv(SNIFF_ENV) == "true"
+    fingerprint = _policy_fingerprint(whitelist, sniff)
+    cache = _decision_cache(fingerprint)
+    stale = False
+    if key in cache:
+        block = cache.pop(key)
+        if block or _cached_allow_holds(hook_input, cwd, sniff):
+            cache[key] = block
+            return tuple(block) if block else None
+        stale = True
+
+    block = evaluate(hook_input, whitelist, cwd, sniff)
+    cache[key] = list(block) if block else None
+    if stale and block is None:
+        return None  # the entry was right: nothing to write back
+    while len(cache) > DECISION_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    try:
+        _write_json(DECISION_CACHE_FILE, {"fingerprint": fingerprint, "entries": cache})
+    except OSError:
+        pass
+    return block
+
+
+# =============================================================================
+# Metrics
+# =============================================================================
+
+
+def metric_tool(tool_name):
+    """Tool name as recorded in the metrics (a single journal field)."""
+    if isinstance(tool_name, str) and tool_name.isidentifier():
+        return tool_name
+    return "Unknown"
+
+
+def record_metric(tool_name, decision, mode, started_ns):
+    """Append one verdict and its latency to the metrics journal.
+
+    Recording is a single O_APPEND write; only the call that pushes the
+    journal past METRICS_FOLD_BYTES pays for importing security_metrics
+    and folding it into the metrics files.
+    """
+    micros = (time.perf_counter_ns() - started_ns) // 1000
+    line = f"{metric_tool(tool_name)}\t{decision}\t{mode}\t{micros}\n"
+    flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+    try:
+        try:
+            fd = os.open(METRICS_JOURNAL, flags, 0o600)
+        except FileNotFoundError:  # first call ever: no log dir yet
+            os.makedirs(LOG_DIR, exist_ok=True)
+            fd = os.open(METRICS_JOURNAL, flags, 0o600)
+        try:
+            os.write(fd, line.encode("utf-8"))
+            size = os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+        if size >= METRICS_FOLD_BYTES:
+            from security_metrics import fold
+
+            fold(LOG_DIR)
+    except Exception:  # metrics must never change a verdict
+        pass
+
+
+def _daemon_metrics():
+    """In-memory Metrics for serve(), or None when metrics are off."""
+    if os.getenv(METRICS_ENV) == "false":
+        return None
+    try:
+        from security_metrics import Metrics
+    except ImportError:
+        return None
+    return Metrics()
+
+
+def _flush_metrics(metrics):
+    """Fold the daemon's in-memory metrics (and the journal) to disk."""
+    if metrics is None or not metrics.series:
+        return
+    try:
+        from security_metrics import fold
+
+        fold(LOG_DIR, pending=metrics)
+    except Exception:  # keep them for the next flush
+        return
+    metrics.series.clear()
+
+
+# =============================================================================
+# Resident policy daemon (--serve)
+# =============================================================================
+
+
+def _handle_request(conn, metrics=None):
+    """Read one request from conn and answer it.
+
+    The client is query_daemon() in security-read-blocker.py, which
+    sends {"hook_input", "whitelist", "sniff", "cwd", "nonce"} and reads
+    back {"block": [target, reason, pattern] or None, "mac": ...}. The
+    mac (see reply_mac) shows the verdict comes from a process holding
+    the policy key, not from whatever else listens on the socket.
+    """
+    chunks = []
+    while True:
+        data = conn.recv(65536)
+        if not data:
+            break
+        chunks.append(data)
+    try:
+        request = json.loads(b"".join(chunks))
+        started = time.perf_counter_ns()
+        hook_input = request.get("hook_input", {})
+        block = evaluate_cached(
+            hook_input,
+            whitelist=request.get("whitelist", ""),
+            cwd=request.get("cwd"),
+            sniff=bool(request.get("sniff")),
+        )
+        reply = {"block": list(block) if block else None}
+        reply["mac"] = reply_mac(
+            _policy_key(create=True), str(request.get("nonce", "")), reply["block"]
+        )
+        if metrics is not None:
+            metrics.add(
+                metric_tool(hook_input.get("tool_name")),
+                "block" if block else "allow",
+                "served",
+                (time.perf_counter_ns() - started) // 1000,
+            )
+    except Exception as e:  # never let one bad request kill the daemon
+        reply = {"error": str(e)}
+    conn.sendall(json.dumps(reply).encode("utf-8"))
+
+
+def serve(idle_timeout=DAEMON_IDLE_TIMEOUT):
+    """Serve verdicts on SOCKET_FILE until idle or the policy changes.
+
+    The daemon exits as soon as this module is modified so that edited
+    patterns are never served stale; the next hook call falls back to
+    in-process evaluation until the daemon is restarted.
+    """
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: Unix sockets are not available on this platform")
+        return 1
+
+    module = os.path.abspath(__file__)
+    script_mtime = os.stat(module).st_mtime_ns
+    os.makedirs(LOG_DIR, exist_ok=True)
+    _policy_key(create=True)  # clients only trust replies signed with it
+    try:
+        os.unlink(SOCKET_FILE)
+    except FileNotFoundError:
+        pass
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)  # socket usable by this user only
+    try:
+        server.bind(SOCKET_FILE)
+    finally:
+        os.umask(old_umask)
+    server.listen(64)
+    print(f"Serving security policy on {SOCKET_FILE}", flush=True)
+
+    # Requests are counted in memory and folded to disk at most every
+    # METRICS_FLUSH_INTERVAL seconds (and on exit), so the accept
+    # timeout is the sooner of the idle deadline and the next flush.
+    metrics = _daemon_metrics()
+    flushed = time.monotonic()
+    deadline = flushed + idle_timeout
+    try:
+        while True:
+            now = time.monotonic()
+            if metrics is not None and metrics.series:
+                if now - flushed >= METRICS_FLUSH_INTERVAL:
+                    _flush_metrics(metrics)
+                    flushed = now
+            if now >= deadline:
+                break
+            wait = deadline - now
+            if metrics is not None and metrics.series:
+                wait = min(wait, flushed + METRICS_FLUSH_INTERVAL - now)
+            server.settimeout(max(wait, 0.001))
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            deadline = time.monotonic() + idle_timeout
+            with conn:
+                if os.stat(module).st_mtime_ns != script_mtime:
+                    break
+                conn.settimeout(DAEMON_TIMEOUT)
+                try:
+                    _handle_request(conn, metrics)
+                except OSError:
+                    pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _flush_metrics(metrics)
+        server.close()
+        try:
+            os.unlink(SOCKET_FILE)
+        except FileNotFoundError:
+            pass
+    return 0
+
+
+# =============================================================================
+# Hook entry point
+# =============================================================================
+
+
+def run_hook(hook_input=None, reply=None, started=None):
+    """Hook entry point (security-read-blocker.py).
+
+    With arguments, runs --serve or --compile-policy. Otherwise acts on
+    ``hook_input`` (read from stdin when None): the script passes it in
+    after asking the daemon itself, with the daemon's ``reply`` (None
+    when no daemon answered, so the call is evaluated here). Logs a
+    block, records the metric and exits 2 to block or 0 to allow.
+    """
+    if started is None:
+        started = time.perf_counter_ns()
+    if len(sys.argv) > 1:
+        import argparse
+
+        parser = argparse.ArgumentParser(description="Claude Code security hook")
+        parser.add_argument(
+            "--serve", action="store_true", help="Run the resident policy daemon"
+        )
+        parser.add_argument(
+            "--compile-policy",
+            action="store_true",
+            help=f"Write the compiled policy artifact ({POLICY_FILE})",
+        )
+        parser.add_argument(
+            "--idle-timeout",
+            type=float,
+            default=DAEMON_IDLE_TIMEOUT,
+            help=f"Exit after N idle seconds (default: {DAEMON_IDLE_TIMEOUT})",
+        )
+        args = parser.parse_args()
+        if args.compile_policy:
+            try:
+                write_policy(compile_policy())
+            except ValueError as e:
+                print(f"Error: {USER_POLICY_FILE}: {e}", file=sys.stderr)
+                sys.exit(1)
+            print(f"Wrote {POLICY_FILE}")
+            sys.exit(0)
+        if args.serve:
+            sys.exit(serve(args.idle_timeout))
+        parser.print_help()
+        sys.exit(1)
+
+    if hook_input is None:
+        # Emergency override
+        if os.getenv(DISABLE_ENV) == "true":
+            sys.exit(0)
+
+        # Parse input
+        try:
+            hook_input = json.loads(sys.stdin.read())
+        except:
+            sys.exit(0)
+
+    if reply is not None:
+        block = reply["block"]
+    else:
+        block = evaluate_cached(hook_input)
+
+    if block:
+        log_block(hook_input, *block)
+
+    if os.getenv(METRICS_ENV) != "false":
+        if reply is not None:
+            mode = "daemon"
+        elif os.path.exists(SOCKET_FILE):
+            mode = "fallback"  # a daemon is up but did not answer in time
+        else:
+            mode = "inproc"
+        decision = "block" if block else "allow"
+        record_metric(hook_input.get("tool_name"), decision, mode, started)
+
+    sys.exit(2 if block else 0)
+
+
+# =============================================================================
+# Batch evaluation
+# =============================================================================
+
+
+def check_many(paths, whitelist=None, cwd=None, write=False, sniff=False):
+    """Verdict of check_path() for each of paths, in order.
+
+    The whitelist is looked up and the working directory resolved once,
+    directories are canonicalized once per batch, and repeated paths are
+    evaluated once, so large batches cost little more per path than the
+    compiled matcher itself. ``write`` judges the paths as write targets,
+    ``sniff`` also sniffs the content of files no pattern blocks.
+    """
+    if whitelist is None:
+        whitelist = os.getenv(WHITELIST_ENV, "")
+    if cwd is None:
+        cwd = os.getcwd()
+    dir_memo = {}
+    verdicts = {}
+    results = []
+    for path in paths:
+        if path not in verdicts:
+            canonical = canonical_path(path, cwd, dir_memo)
+            verdicts[path] = check_path(path, whitelist, cwd, canonical, write, sniff)
+        results.append(verdicts[path])
+    return results
+
+
+def _parse_line(line):
+    """An NDJSON input line as a path string or a hook input dict."""
+    text = line.strip()
+    if not text.startswith(('"', "{")):
+        return text  # a bare path, e.g. from find
+    item = json.loads(text)
+    if isinstance(item, dict) and "tool_name" not in item:
+        item = item.get("path")
+    if not isinstance(item, (str, dict)):
+        raise ValueError("expected a path or a hook input")
+    return item
+
+
+def _verdict(found, **fields):
+    fields["block"] = bool(found)
+    if found:
+        fields["reason"], fields["pattern"] = found
+    return json.dumps(fields) + "\n"
+
+
+def check_lines(lines, whitelist=None, cwd=None, write=False, sniff=False):
+    """Yield one NDJSON verdict per non-blank input line (see Usage)."""
+    items = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            items.append(_parse_line(line))
+        except ValueError as e:
+            items.append(e)
+    paths = [item for item in items if isinstance(item, str)]
+    verdicts = iter(check_many(paths, whitelist, cwd, write, sniff))
+    for item in items:
+        if isinstance(item, str):
+            yield _verdict(next(verdicts), path=item)
+        elif isinstance(item, dict):
+            block = evaluate(item, whitelist, cwd, sniff)
+            target = block[0] if block else None
+            found = block[1:] if block else None
+            yield _verdict(found, tool_name=item.get("tool_name"), target=target)
+        else:
+            yield json.dumps({"error": str(item)}) + "\n"
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    import argparse
+    from itertools import islice
+
+    parser = argparse.ArgumentParser(
+        prog="security_policy",
+        description="Check paths against the Claude Code security policy",
+    )
+    parser.add_argument("--cwd", help="Resolve relative paths here (default: .)")
+    parser.add_argument(
+        "--whitelist", help=f"os.pathsep-separated paths (default: ${WHITELIST_ENV})"
+    )
+    parser.add_argument(
+        "--write", action="store_true", help="Judge paths as write targets"
+    )
+    parser.add_argument(
+        "--sniff", action="store_true", help="Also sniff file content for secrets"
+    )
+    parser.add_argument(
+        "--batch", type=int, default=4096, help="Lines evaluated per batch (4096)"
+    )
+    args = parser.parse_args(argv[1:])
+
+    cwd = os.path.abspath(args.cwd) if args.cwd else os.getcwd()
+    while True:
+        lines = list(islice(sys.stdin, max(1, args.batch)))
+        if not lines:
+            break
+        out = list(check_lines(lines, args.whitelist, cwd, args.write, args.sniff))
+        sys.stdout.write("".join(out))
+    sys.stdout.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
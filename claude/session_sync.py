@@ -4,18 +4,34 @@
 Usage:
     claude-session-sync export <session.jsonl> [dest] [--format markdown|raw] [--force]
     claude-session-sync sync-all [dest] [--project-filter PATH] [--format ...] [--force]
+                                 [--dedup [--dedup-min-bytes N]]
+                                 [--profile] [--profile-dump cprofile|tracemalloc]
     claude-session-sync status [dest] [--project-filter PATH]
     claude-session-sync export-current [dest] [--project-dir CWD] [--format ...]
+    claude-session-sync prune [dest] [--max-age-days N] [--max-total-mb N]
+                              [--project-quota-mb N] [--dry-run]
+    claude-session-sync archive [dest] [--older-than-days N] [--dry-run]
 
-Set $CLAUDE_TRANSCRIPT_DIR to avoid passing <dest> every time.
+Set $CLAUDE_TRANSCRIPT_DIR to avoid passing <dest> every time. A dest of
+s3://bucket/prefix uploads to an S3-compatible store (see --endpoint-url).
 """
 
 import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import hmac
+import http.client
+import io
 import json
 import os
 import sys
 import datetime
 import shutil
+import tarfile
+import threading
+import time
+import urllib.parse
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -33,6 +49,9 @@ def get_home_dir():
 
 
 MANIFEST_FILENAME = ".claude-sync-manifest.json"
+ARCHIVE_DIRNAME = ".archive"
+BLOCKS_DIRNAME = ".blocks"
+DEFAULT_DEDUP_MIN_BYTES = 2048
 CLAUDE_PROJECTS_DIR = os.path.join(get_home_dir(), ".claude", "projects")
 TRANSCRIPT_DIR_ENV = "CLAUDE_TRANSCRIPT_DIR"
 
@@ -269,11 +288,83 @@ def needs_sync(manifest, jsonl_path, force=False):
     return current_mtime != entry.get("source_mtime")
 
 
+# ---------------------------------------------------------------------------
+# Shared block store (--dedup)
+# ---------------------------------------------------------------------------
+
+
+class BlockStore:
+    """Content-addressed store for tool output repeated across sessions.
+
+    Blocks live in ``<dest>/.blocks/<xx>/<sha256>.txt``. A block only
+    moves into the store the second time its hash is seen (hashes seen
+    once are kept in ``.blocks/index.json``), so one-off output stays
+    inline and readable where it occurred.
+    """
+
+    def __init__(self, dest_dir, min_bytes=DEFAULT_DEDUP_MIN_BYTES):
+        self.root = os.path.join(dest_dir, BLOCKS_DIRNAME)
+        self.index_path = os.path.join(self.root, "index.json")
+        self.min_bytes = min_bytes
+        self.seen = set()
+        self.stored = set()
+        self.refs = 0
+        self.bytes_saved = 0
+        self._dirty = False
+        try:
+            with open(self.index_path) as f:
+                self.seen.update(json.load(f).get("seen", []))
+        except (OSError, json.JSONDecodeError, ValueError, AttributeError):
+            pass
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest + ".txt")
+
+    def ref(self, text):
+        """Return the stored block path for repeated text, or None to inline."""
+        data = text.encode("utf-8")
+        if len(data) < self.min_bytes:
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if digest not in self.stored:
+            if not os.path.exists(path):
+                if digest not in self.seen:
+                    self.seen.add(digest)
+                    self._dirty = True
+                    return None
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            self.stored.add(digest)
+        self.refs += 1
+        self.bytes_saved += len(data)
+        return path
+
+    def save(self):
+        """Persist the seen-once index (atomic, only when it changed)."""
+        if not self._dirty:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+            json.dump({"version": 1, "seen": sorted(self.seen)}, f)
+            f.write("\n")
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+
 # ---------------------------------------------------------------------------
 # Markdown rendering (Pass 2 — streaming)
 # ---------------------------------------------------------------------------
 
 
+# Record types render_markdown drops without output.
+_SKIPPED_TYPES = frozenset(("file-history-snapshot", "hook_progress"))
+
+
 def render_tool_input(tool_name, tool_input):
     """Render tool input for markdown."""
     if not isinstance(tool_input, dict):
@@ -339,8 +430,12 @@ def render_tool_input(tool_name, tool_input):
         return str(tool_input)
 
 
-def render_tool_result(result_content, is_error=False):
-    """Render tool result in <details> block."""
+def render_tool_result(result_content, is_error=False, block_ref=None):
+    """Render tool result in <details> block.
+
+    ``block_ref(text)`` may return a link to a shared copy of the text
+    (see BlockStore), which is then emitted instead of the text itself.
+    """
     summary = "**Error**" if is_error else "Result"
 
     # Extract text from result content
@@ -355,6 +450,18 @@ def render_tool_result(result_content, is_error=False):
     else:
         text = str(result_content) if result_content else ""
 
+    ref = block_ref(text) if block_ref is not None else None
+    if ref is not None:
+        return "\n".join(
+            [
+                f"<details><summary>{summary}</summary>",
+                "",
+                f"See [shared block]({ref}) ({len(text)} chars)",
+                "",
+                "</details>",
+            ]
+        )
+
     lines = [
         f"<details><summary>{summary}</summary>",
         "",
@@ -372,10 +479,14 @@ def render_thinking_block(thinking_text):
     return f"<details><summary>Thinking</summary>\n\n{thinking_text}\n\n</details>"
 
 
-def render_markdown(jsonl_path, out_file, include_subagents=False):
+def render_markdown(
+    jsonl_path, out_file, include_subagents=False, profile=None, block_ref=None
+):
     """Pass 2: Stream JSONL and write markdown to out_file.
 
-    State machine that pairs tool_use with tool_result by id.
+    State machine that pairs tool_use with tool_result by id. When a
+    SyncProfile is passed, records are tallied by ``type`` as parsed or
+    skipped. ``block_ref`` is passed through to render_tool_result.
     """
     meta = scan_metadata(jsonl_path)
     if not meta:
@@ -403,15 +514,26 @@ def render_markdown(jsonl_path, out_file, include_subagents=False):
     pending_tool_uses = {}  # tool_use_id -> {name, input}
     subagent_messages = []  # collected progress messages
 
+    count = profile.count_record if profile is not None else None
+
     with open(jsonl_path) as f:
         for line in f:
             record = parse_line(line)
             if record is None:
+                if count:
+                    count("(invalid)", skipped=True)
                 continue
 
             msg_type = record.get("type")
             is_sidechain = record.get("isSidechain", False)
 
+            if count:
+                count(
+                    msg_type,
+                    skipped=msg_type in _SKIPPED_TYPES
+                    or (msg_type == "progress" and not include_subagents),
+                )
+
             # Skip file-history-snapshot
             if msg_type == "file-history-snapshot":
                 continue
@@ -469,14 +591,12 @@ def render_markdown(jsonl_path, out_file, include_subagents=False):
                         tool_use_id = tr.get("tool_use_id", "")
                         tr_content = tr.get("content", "")
                         tr_is_error = tr.get("is_error", False)
-                        if tool_use_id in pending_tool_uses:
-                            rendered = render_tool_result(tr_content, tr_is_error)
-                            out_file.write(rendered + "\n\n")
-                            del pending_tool_uses[tool_use_id]
-                        else:
-                            # Orphan tool result — still render it
-                            rendered = render_tool_result(tr_content, tr_is_error)
-                            out_file.write(rendered + "\n\n")
+                        rendered = render_tool_result(
+                            tr_content, tr_is_error, block_ref
+                        )
+                        out_file.write(rendered + "\n\n")
+                        # Orphan tool results are rendered too
+                        pending_tool_uses.pop(tool_use_id, None)
                     continue
 
                 # User typed text
@@ -616,8 +736,15 @@ def export_session(
     manifest,
     force=False,
     include_subagents=False,
+    profile=None,
+    destination=None,
 ):
-    """Export a single session. Returns True on success."""
+    """Export a single session. Returns True on success.
+
+    With a remote ``destination`` the export is rendered in memory and
+    queued for upload; its manifest entry is only recorded once the
+    upload is confirmed (see S3Destination.flush).
+    """
     meta = scan_metadata(jsonl_path)
     if not meta:
         print(f"Warning: Could not read metadata from {jsonl_path}", file=sys.stderr)
@@ -627,33 +754,818 @@ def export_session(
         return False
 
     output_name = make_output_filename(meta, fmt)
-    project_dir = os.path.join(dest_dir, project_name)
-    os.makedirs(project_dir, exist_ok=True)
-    output_path = os.path.join(project_dir, output_name)
-
-    if fmt == "raw":
-        shutil.copy2(jsonl_path, output_path)
-    else:
-        with open(output_path, "w", encoding="utf-8", newline="\n") as out:
-            render_markdown(jsonl_path, out, include_subagents=include_subagents)
 
-    # Update manifest
     try:
         source_mtime = os.path.getmtime(jsonl_path)
     except OSError:
         source_mtime = 0
 
-    manifest.setdefault("sessions", {})[jsonl_path] = {
+    entry = {
         "session_id": meta.get("sessionId", ""),
         "project_name": project_name,
         "source_mtime": source_mtime,
         "exported_path": os.path.join(project_name, output_name),
         "format": fmt,
     }
+    sessions = manifest.setdefault("sessions", {})
+
+    if destination is not None and destination.remote:
+        if fmt == "raw":
+            with open(jsonl_path, "rb") as f:
+                data = f.read()
+        else:
+            buf = io.StringIO()
+            render_markdown(
+                jsonl_path, buf, include_subagents=include_subagents, profile=profile
+            )
+            data = buf.getvalue().encode("utf-8")
+        destination.put(
+            entry["exported_path"].replace(os.sep, "/"),
+            data,
+            commit=lambda: sessions.__setitem__(jsonl_path, entry),
+        )
+        if profile is not None:
+            profile.add_io(jsonl_path)
+            profile.bytes_written += len(data)
+        return True
+
+    project_dir = os.path.join(dest_dir, project_name)
+    os.makedirs(project_dir, exist_ok=True)
+    output_path = os.path.join(project_dir, output_name)
+
+    blocks = getattr(destination, "blocks", None)
+    block_ref = None
+    if blocks is not None:
 
+        def block_ref(text):
+            path = blocks.ref(text)
+            if path is None:
+                return None
+            return os.path.relpath(path, project_dir).replace(os.sep, "/")
+
+    if fmt == "raw":
+        shutil.copy2(jsonl_path, output_path)
+    else:
+        with open(output_path, "w", encoding="utf-8", newline="\n") as out:
+            render_markdown(
+                jsonl_path,
+                out,
+                include_subagents=include_subagents,
+                profile=profile,
+                block_ref=block_ref,
+            )
+
+    if profile is not None:
+        profile.add_io(jsonl_path, output_path)
+
+    sessions[jsonl_path] = entry
     return True
 
 
+# ---------------------------------------------------------------------------
+# Destinations (local directory or S3-compatible object store)
+# ---------------------------------------------------------------------------
+
+
+class DestinationError(Exception):
+    """A remote destination request failed."""
+
+
+def is_remote_dest(dest):
+    return dest.startswith("s3://")
+
+
+class LocalDestination:
+    """Plain directory destination; exports are streamed straight to disk.
+
+    ``blocks`` is an optional BlockStore used to deduplicate repeated
+    tool output across exports.
+    """
+
+    remote = False
+
+    def __init__(self, root, blocks=None):
+        self.root = root
+        self.blocks = blocks
+
+    def prepare(self):
+        os.makedirs(self.root, exist_ok=True)
+
+    def load_manifest(self):
+        return load_manifest(self.root)
+
+    def save_manifest(self, manifest):
+        """Write the manifest. Returns a list of failed uploads (always [])."""
+        if self.blocks is not None:
+            self.blocks.save()
+        save_manifest(self.root, manifest)
+        return []
+
+    def close(self):
+        pass
+
+
+def _sha256_hex(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hmac_sha256(key, msg):
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def sign_v4(
+    method,
+    path,
+    query,
+    headers,
+    payload_hash,
+    access_key,
+    secret_key,
+    region,
+    amz_date,
+    service="s3",
+):
+    """Return the AWS Signature Version 4 Authorization header value.
+
+    ``path`` must already be URI-encoded; every header in ``headers``
+    (including ``host`` and ``x-amz-date``) is signed.
+    """
+    signed = sorted((k.lower(), " ".join(str(v).split())) for k, v in headers.items())
+    canonical_headers = "".join(f"{k}:{v}\n" for k, v in signed)
+    signed_headers = ";".join(k for k, _ in signed)
+    canonical_request = "\n".join(
+        [method, path, query, canonical_headers, signed_headers, payload_hash]
+    )
+    date = amz_date[:8]
+    scope = f"{date}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            _sha256_hex(canonical_request.encode("utf-8")),
+        ]
+    )
+    key = _hmac_sha256(("AWS4" + secret_key).encode("utf-8"), date)
+    for part in (region, service, "aws4_request"):
+        key = _hmac_sha256(key, part)
+    signature = hmac.new(
+        key, string_to_sign.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    return (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+
+
+class S3Destination:
+    """S3-compatible object store destination (AWS S3, MinIO, ...).
+
+    ``url`` is ``s3://bucket/prefix``. With an endpoint URL (or
+    $AWS_ENDPOINT_URL) requests use path-style addressing against that
+    host, which is what MinIO and other local stand-ins expect.
+    Credentials come from the usual AWS_* environment variables.
+
+    Uploads are queued by put() and grouped into batches; each batch is
+    one task on a bounded thread pool, and each worker thread keeps one
+    persistent HTTP connection. flush() waits for every batch and runs
+    the commit callbacks of the objects that were stored, so a manifest
+    saved afterwards only lists confirmed uploads and an interrupted
+    sync resumes from it.
+    """
+
+    remote = True
+
+    def __init__(
+        self,
+        url,
+        endpoint_url=None,
+        region=None,
+        access_key=None,
+        secret_key=None,
+        session_token=None,
+        workers=8,
+        batch_size=32,
+        batch_bytes=8 * 1024 * 1024,
+        timeout=60,
+    ):
+        parsed = urllib.parse.urlsplit(url)
+        env = os.environ
+        self.url = url
+        self.bucket = parsed.netloc
+        self.prefix = parsed.path.strip("/")
+        self.region = (
+            region
+            or env.get("AWS_REGION")
+            or env.get("AWS_DEFAULT_REGION")
+            or "us-east-1"
+        )
+        self.access_key = access_key or env.get("AWS_ACCESS_KEY_ID")
+        self.secret_key = secret_key or env.get("AWS_SECRET_ACCESS_KEY")
+        self.session_token = session_token or env.get("AWS_SESSION_TOKEN")
+        endpoint_url = endpoint_url or env.get("AWS_ENDPOINT_URL")
+        if endpoint_url:
+            ep = urllib.parse.urlsplit(endpoint_url)
+            self.scheme = ep.scheme or "https"
+            self.host = ep.netloc
+            self.base_path = "/" + self.bucket
+        else:
+            self.scheme = "https"
+            self.host = f"{self.bucket}.s3.{self.region}.amazonaws.com"
+            self.base_path = ""
+        self.batch_size = max(1, batch_size)
+        self.batch_bytes = batch_bytes
+        self.checkpoint_interval = self.batch_size * max(1, workers)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._conn_lock = threading.Lock()
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers))
+        self._batch = []
+        self._batch_size_bytes = 0
+        self._inflight = []  # (future, batch)
+
+    def prepare(self):
+        if not self.bucket:
+            raise DestinationError(f"No bucket in destination URL: {self.url}")
+        if not (self.access_key and self.secret_key):
+            raise DestinationError(
+                "S3 destination needs AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY"
+            )
+
+    # -- HTTP ---------------------------------------------------------------
+
+    def _key(self, rel_path):
+        return f"{self.prefix}/{rel_path}" if self.prefix else rel_path
+
+    def _connection(self, fresh=False):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and not fresh:
+            return conn
+        if conn is not None:
+            conn.close()
+        cls = (
+            http.client.HTTPSConnection
+            if self.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        conn = cls(self.host, timeout=self.timeout)
+        self._local.conn = conn
+        with self._conn_lock:
+            self._connections.append(conn)
+        return conn
+
+    def request(self, method, rel_path, body=b""):
+        """Issue one signed request. Returns (status, body bytes)."""
+        path = self.base_path + "/" + urllib.parse.quote(self._key(rel_path), safe="/~")
+        payload_hash = _sha256_hex(body)
+        amz_date = datetime.datetime.now(datetime.timezone.utc).strftime(
+            "%Y%m%dT%H%M%SZ"
+        )
+        headers = {
+            "host": self.host,
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": amz_date,
+        }
+        if self.session_token:
+            headers["x-amz-security-token"] = self.session_token
+        headers["Authorization"] = sign_v4(
+            method,
+            path,
+            "",
+            headers,
+            payload_hash,
+            self.access_key,
+            self.secret_key,
+            self.region,
+            amz_date,
+        )
+        headers["Content-Length"] = str(len(body))
+
+        # A pooled connection may have been closed by the server while
+        # idle; retry once on a fresh connection.
+        for attempt in range(2):
+            conn = self._connection(fresh=attempt > 0)
+            try:
+                conn.request(method, path, body=body or None, headers=headers)
+                resp = conn.getresponse()
+                return resp.status, resp.read()
+            except (http.client.HTTPException, ConnectionError, OSError) as e:
+                if attempt:
+                    raise DestinationError(f"{method} {path}: {e}") from e
+
+    # -- Uploads ------------------------------------------------------------
+
+    def _upload_batch(self, batch):
+        """Upload one batch on this worker's connection; return failures."""
+        failures = {}
+        for rel_path, data, _ in batch:
+            try:
+                status, body = self.request("PUT", rel_path, data)
+            except DestinationError as e:
+                failures[rel_path] = str(e)
+                continue
+            if status >= 300:
+                failures[rel_path] = f"HTTP {status}: {body[:200]!r}"
+        return failures
+
+    def _submit_batch(self):
+        if not self._batch:
+            return
+        batch = self._batch
+        self._batch = []
+        self._batch_size_bytes = 0
+        self._inflight.append((self._pool.submit(self._upload_batch, batch), batch))
+
+    def put(self, rel_path, data, commit=None):
+        """Queue an object upload; ``commit`` runs after it is confirmed."""
+        self._batch.append((rel_path, data, commit))
+        self._batch_size_bytes += len(data)
+        if (
+            len(self._batch) >= self.batch_size
+            or self._batch_size_bytes >= self.batch_bytes
+        ):
+            self._submit_batch()
+
+    def flush(self):
+        """Wait for all queued uploads. Returns [(rel_path, error), ...]."""
+        self._submit_batch()
+        errors = []
+        inflight, self._inflight = self._inflight, []
+        for future, batch in inflight:
+            try:
+                failures = future.result()
+            except Exception as e:  # worker crashed: whole batch failed
+                failures = {rel_path: str(e) for rel_path, _, _ in batch}
+            for rel_path, _, commit in batch:
+                if rel_path in failures:
+                    errors.append((rel_path, failures[rel_path]))
+                elif commit is not None:
+                    commit()
+        return errors
+
+    # -- Manifest -----------------------------------------------------------
+
+    def load_manifest(self):
+        status, body = self.request("GET", MANIFEST_FILENAME)
+        if status == 404:
+            return {"version": 1, "sessions": {}}
+        if status >= 300:
+            raise DestinationError(f"GET {MANIFEST_FILENAME}: HTTP {status}")
+        try:
+            data = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError, ValueError):
+            data = None
+        if isinstance(data, dict) and "version" in data:
+            return data
+        return {"version": 1, "sessions": {}}
+
+    def save_manifest(self, manifest):
+        """Flush uploads, then store the manifest. Returns upload failures."""
+        errors = self.flush()
+        manifest["last_sync"] = datetime.datetime.now(
+            datetime.timezone.utc
+        ).strftime("%Y-%m-%dT%H:%M:%SZ")
+        body = (json.dumps(manifest, indent=2) + "\n").encode("utf-8")
+        status, resp = self.request("PUT", MANIFEST_FILENAME, body)
+        if status >= 300:
+            raise DestinationError(f"PUT {MANIFEST_FILENAME}: HTTP {status}")
+        return errors
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        with self._conn_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
+
+def open_destination(dest, args=None):
+    """Return a LocalDestination or S3Destination for a resolved dest."""
+    if not is_remote_dest(dest):
+        blocks = None
+        if getattr(args, "dedup", False):
+            blocks = BlockStore(dest, args.dedup_min_bytes)
+        return LocalDestination(dest, blocks=blocks)
+    return S3Destination(
+        dest,
+        endpoint_url=getattr(args, "endpoint_url", None),
+        workers=getattr(args, "upload_workers", None) or 8,
+        batch_size=getattr(args, "batch_size", None) or 32,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Profiling (sync-all --profile)
+# ---------------------------------------------------------------------------
+
+
+class SyncProfile:
+    """Per-phase wall/CPU time, I/O volume and record counts for one run."""
+
+    def __init__(self):
+        self.phases = {}  # name -> [wall, cpu, calls]
+        self.records = {}  # type -> [parsed, skipped]
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.session_times = []  # (wall seconds, jsonl_path) per export
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.phases.setdefault(name, [0.0, 0.0, 0])
+            totals[0] += time.perf_counter() - wall0
+            totals[1] += time.process_time() - cpu0
+            totals[2] += 1
+
+    def count_record(self, msg_type, skipped=False):
+        counts = self.records.setdefault(msg_type or "(none)", [0, 0])
+        counts[1 if skipped else 0] += 1
+
+    def add_io(self, read_path=None, written_path=None):
+        for path, attr in ((read_path, "bytes_read"), (written_path, "bytes_written")):
+            if path:
+                try:
+                    setattr(self, attr, getattr(self, attr) + os.path.getsize(path))
+                except OSError:
+                    pass
+
+    def slowest(self, n):
+        return sorted(self.session_times, reverse=True)[:n]
+
+    def print_summary(self, out=None, top=5):
+        out = out or sys.stdout
+        out.write("\nProfile\n")
+        out.write(f"{'phase':<16} {'wall s':>10} {'cpu s':>10} {'calls':>7}\n")
+        for name, (wall, cpu, calls) in self.phases.items():
+            out.write(f"{name:<16} {wall:>10.4f} {cpu:>10.4f} {calls:>7}\n")
+        out.write(
+            f"bytes read: {self.bytes_read}  bytes written: {self.bytes_written}\n"
+        )
+        if self.records:
+            out.write(f"\n{'record type':<24} {'parsed':>9} {'skipped':>9}\n")
+            for msg_type, (parsed, skipped) in sorted(self.records.items()):
+                out.write(f"{msg_type:<24} {parsed:>9} {skipped:>9}\n")
+        if self.session_times:
+            out.write(f"\nSlowest {min(top, len(self.session_times))} sessions:\n")
+            for wall, path in self.slowest(top):
+                out.write(f"  {wall:8.4f}s  {path}\n")
+
+
+def _phase(profile, name):
+    """profile.phase(name), or a no-op context when profiling is off."""
+    return profile.phase(name) if profile is not None else contextlib.nullcontext()
+
+
+def dump_session_profiles(profile, top, mode, out_dir, include_subagents=False):
+    """Re-render the slowest sessions under cProfile or tracemalloc.
+
+    Output is discarded; one ``<session>.prof`` (pstats) or
+    ``<session>.tracemalloc`` (tracemalloc.Snapshot.dump) file per
+    session is written to out_dir. Returns the written paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for _, jsonl_path in profile.slowest(top):
+        stem = os.path.splitext(os.path.basename(jsonl_path))[0]
+        sink = open(os.devnull, "w", encoding="utf-8")
+        try:
+            if mode == "cprofile":
+                import cProfile
+
+                target = os.path.join(out_dir, stem + ".prof")
+                prof = cProfile.Profile()
+                prof.runcall(render_markdown, jsonl_path, sink, include_subagents)
+                prof.dump_stats(target)
+            else:
+                import tracemalloc
+
+                target = os.path.join(out_dir, stem + ".tracemalloc")
+                tracemalloc.start()
+                try:
+                    render_markdown(jsonl_path, sink, include_subagents)
+                    tracemalloc.take_snapshot().dump(target)
+                finally:
+                    tracemalloc.stop()
+        finally:
+            sink.close()
+        written.append(target)
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Retention & archival
+# ---------------------------------------------------------------------------
+
+
+def _live_exports(dest_dir, manifest):
+    """Yield (jsonl_path, entry, abs_path, size) for exports still on disk.
+
+    Entries already pruned or archived, and entries whose exported file
+    has gone missing, are skipped.
+    """
+    for jsonl_path, entry in manifest.get("sessions", {}).items():
+        if entry.get("pruned") or entry.get("archived"):
+            continue
+        rel = entry.get("exported_path")
+        if not rel:
+            continue
+        abs_path = os.path.join(dest_dir, rel)
+        try:
+            size = os.path.getsize(abs_path)
+        except OSError:
+            continue
+        yield jsonl_path, entry, abs_path, size
+
+
+def plan_prune(
+    dest_dir,
+    manifest,
+    max_age_days=None,
+    max_total_bytes=None,
+    project_quota_bytes=None,
+    now=None,
+):
+    """Decide which exports to delete. Does not touch the filesystem.
+
+    Policies are applied in order: orphaned (source JSONL gone), expired
+    (source older than max_age_days), per-project quota, total size cap.
+    Quota policies evict the least recently modified sessions first.
+
+    Returns a list of dicts with source, reason, path (absolute or None)
+    and size.
+    """
+    if now is None:
+        now = time.time()
+    plan = []
+
+    # Orphans are dropped even when their export was already pruned or
+    # archived, so the manifest stops tracking sessions that are gone.
+    live = {}
+    for jsonl_path, entry, abs_path, size in _live_exports(dest_dir, manifest):
+        live[jsonl_path] = (entry, abs_path, size)
+    for jsonl_path in manifest.get("sessions", {}):
+        if os.path.exists(jsonl_path):
+            continue
+        _, abs_path, size = live.pop(jsonl_path, (None, None, 0))
+        plan.append(
+            {"source": jsonl_path, "reason": "orphaned", "path": abs_path, "size": size}
+        )
+
+    if max_age_days is not None:
+        cutoff = now - max_age_days * 86400
+        for jsonl_path, (entry, abs_path, size) in list(live.items()):
+            if (entry.get("source_mtime") or 0) < cutoff:
+                del live[jsonl_path]
+                plan.append(
+                    {
+                        "source": jsonl_path,
+                        "reason": "expired",
+                        "path": abs_path,
+                        "size": size,
+                    }
+                )
+
+    def evict(paths, budget, reason):
+        oldest_first = sorted(paths, key=lambda p: live[p][0].get("source_mtime") or 0)
+        total = sum(live[p][2] for p in oldest_first)
+        for jsonl_path in oldest_first:
+            if total <= budget:
+                break
+            _, abs_path, size = live.pop(jsonl_path)
+            total -= size
+            plan.append(
+                {"source": jsonl_path, "reason": reason, "path": abs_path, "size": size}
+            )
+
+    if project_quota_bytes is not None:
+        by_project = {}
+        for jsonl_path, (entry, _, _) in live.items():
+            by_project.setdefault(entry.get("project_name", ""), []).append(jsonl_path)
+        for paths in by_project.values():
+            evict(paths, project_quota_bytes, "over-quota")
+
+    if max_total_bytes is not None:
+        evict(list(live), max_total_bytes, "over-total")
+
+    return plan
+
+
+def _remove_empty_parents(dest_dir, path):
+    """rmdir the directories above ``path`` up to (not including) dest_dir."""
+    parent = os.path.dirname(path)
+    while os.path.abspath(parent) != os.path.abspath(dest_dir):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            return
+        parent = os.path.dirname(parent)
+
+
+def apply_prune(dest_dir, manifest, plan):
+    """Apply a prune plan as one transaction. Returns bytes freed.
+
+    The manifest is committed before any file is unlinked: a crash mid-way
+    leaves stray files for the next prune to pick up, never manifest
+    entries pointing at deleted exports. Pruned sessions keep their entry
+    (marked ``pruned``) so sync-all does not re-export them until the
+    source changes; orphaned sessions are dropped entirely.
+    """
+    sessions = manifest.setdefault("sessions", {})
+    for item in plan:
+        if item["reason"] == "orphaned":
+            sessions.pop(item["source"], None)
+        elif item["source"] in sessions:
+            sessions[item["source"]]["pruned"] = item["reason"]
+    save_manifest(dest_dir, manifest)
+
+    freed = 0
+    for item in plan:
+        if not item["path"]:
+            continue
+        try:
+            os.unlink(item["path"])
+        except OSError:
+            continue
+        freed += item["size"]
+        _remove_empty_parents(dest_dir, item["path"])
+    return freed
+
+
+def _archive_month(entry):
+    """Month bucket (YYYY-MM) for an export: from its filename, else mtime."""
+    name = os.path.basename(entry.get("exported_path", ""))
+    if len(name) >= 7 and name[4] == "-" and name[:4].isdigit() and name[5:7].isdigit():
+        return name[:7]
+    mtime = entry.get("source_mtime") or 0
+    return datetime.datetime.fromtimestamp(mtime, datetime.timezone.utc).strftime(
+        "%Y-%m"
+    )
+
+
+def plan_archive(dest_dir, manifest, older_than_days, now=None):
+    """Group exports whose source is older than the cutoff by month.
+
+    Returns {"YYYY-MM": [(jsonl_path, abs_path), ...]}.
+    """
+    if now is None:
+        now = time.time()
+    cutoff = now - older_than_days * 86400
+    months = {}
+    for jsonl_path, entry, abs_path, _ in _live_exports(dest_dir, manifest):
+        if (entry.get("source_mtime") or 0) >= cutoff:
+            continue
+        months.setdefault(_archive_month(entry), []).append((jsonl_path, abs_path))
+    return months
+
+
+def apply_archive(dest_dir, manifest, plan):
+    """Bundle planned exports into per-month .tar.gz files. Returns count.
+
+    Existing month archives are rewritten with the new members appended
+    (members with the same name are replaced). Archives are written via
+    .tmp + os.replace(), then the manifest is committed once, and only
+    then are the bundled exports unlinked.
+    """
+    archive_dir = os.path.join(dest_dir, ARCHIVE_DIRNAME)
+    sessions = manifest.setdefault("sessions", {})
+    archived = 0
+
+    for month, items in sorted(plan.items()):
+        os.makedirs(archive_dir, exist_ok=True)
+        rel_archive = os.path.join(ARCHIVE_DIRNAME, month + ".tar.gz")
+        archive_path = os.path.join(dest_dir, rel_archive)
+        tmp_path = archive_path + ".tmp"
+        arcnames = {
+            abs_path: os.path.relpath(abs_path, dest_dir).replace(os.sep, "/")
+            for _, abs_path in items
+        }
+        replaced = set(arcnames.values())
+        with tarfile.open(tmp_path, "w:gz") as out:
+            if os.path.exists(archive_path):
+                with tarfile.open(archive_path, "r:gz") as old:
+                    for member in old:
+                        if member.name in replaced:
+                            continue
+                        out.addfile(member, old.extractfile(member))
+            for _, abs_path in items:
+                out.add(abs_path, arcname=arcnames[abs_path])
+        os.replace(tmp_path, archive_path)
+
+        for jsonl_path, _ in items:
+            sessions[jsonl_path]["archived"] = rel_archive
+            archived += 1
+
+    save_manifest(dest_dir, manifest)
+
+    for items in plan.values():
+        for _, abs_path in items:
+            try:
+                os.unlink(abs_path)
+            except OSError:
+                continue
+            _remove_empty_parents(dest_dir, abs_path)
+    return archived
+
+
+_BLOCK_LINK = "[shared block]("
+
+
+def _block_links(lines):
+    """Digests of the shared blocks linked from an export's lines."""
+    for line in lines:
+        start = line.find(_BLOCK_LINK)
+        if start < 0:
+            continue
+        target = line[start + len(_BLOCK_LINK) :].split(")", 1)[0]
+        yield os.path.splitext(target.rsplit("/", 1)[-1])[0]
+
+
+def referenced_blocks(dest_dir, skip=()):
+    """Mark phase: digests of the shared blocks any export links to.
+
+    Every markdown file under dest_dir counts, as does every markdown
+    member of the month archives, except the paths in ``skip`` (exports
+    about to be pruned). Returns None if an export could not be read,
+    since its links are then unknown.
+    """
+    skip = {os.path.abspath(path) for path in skip}
+    marked = set()
+    for root, dirs, files in os.walk(dest_dir):
+        dirs[:] = [d for d in dirs if d != BLOCKS_DIRNAME]
+        for name in files:
+            path = os.path.abspath(os.path.join(root, name))
+            if path in skip:
+                continue
+            try:
+                if name.endswith(".md"):
+                    with open(path, encoding="utf-8", errors="replace") as f:
+                        marked.update(_block_links(f))
+                elif name.endswith(".tar.gz"):
+                    with tarfile.open(path, "r:gz") as archive:
+                        for member in archive:
+                            if not (member.isfile() and member.name.endswith(".md")):
+                                continue
+                            f = io.TextIOWrapper(
+                                archive.extractfile(member),
+                                encoding="utf-8",
+                                errors="replace",
+                            )
+                            marked.update(_block_links(f))
+            except (OSError, tarfile.TarError):
+                return None
+    return marked
+
+
+def plan_block_sweep(dest_dir, skip=()):
+    """Sweep phase: shared blocks (--dedup) no export links to any more.
+
+    Returns a list of (path, size). Nothing is swept when there is no
+    block store or when referenced_blocks() could not read every export.
+    Blocks created after the mark phase started are kept, but this is
+    not safe against a concurrent ``sync-all --dedup``: an older block
+    it starts linking to during the mark phase is still swept.
+    """
+    blocks_dir = os.path.join(dest_dir, BLOCKS_DIRNAME)
+    if not os.path.isdir(blocks_dir):
+        return []
+    started = time.time()
+    marked = referenced_blocks(dest_dir, skip)
+    if marked is None:
+        return []
+    sweep = []
+    for root, _, files in os.walk(blocks_dir):
+        for name in files:
+            digest, ext = os.path.splitext(name)
+            if ext != ".txt" or digest in marked:
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if st.st_mtime < started:
+                sweep.append((path, st.st_size))
+    return sorted(sweep)
+
+
+def apply_block_sweep(dest_dir, sweep):
+    """Delete the blocks planned by plan_block_sweep(). Returns bytes freed."""
+    freed = 0
+    for path, size in sweep:
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        freed += size
+        _remove_empty_parents(dest_dir, path)
+    return freed
+
+
 # ---------------------------------------------------------------------------
 # Subcommand handlers
 # ---------------------------------------------------------------------------
@@ -662,15 +1574,29 @@ def export_session(
 def resolve_dest(args):
     """Resolve destination directory from args or $CLAUDE_TRANSCRIPT_DIR.
 
-    Returns absolute path, or None if neither is set.
+    Returns absolute path (or an unchanged s3:// URL), or None if neither
+    is set.
     """
-    dest = getattr(args, "dest", None)
-    if dest:
-        return os.path.abspath(dest)
-    env_dir = os.environ.get(TRANSCRIPT_DIR_ENV)
-    if env_dir:
-        return os.path.abspath(env_dir)
-    return None
+    dest = getattr(args, "dest", None) or os.environ.get(TRANSCRIPT_DIR_ENV)
+    if not dest:
+        return None
+    return dest if is_remote_dest(dest) else os.path.abspath(dest)
+
+
+def _report_upload_errors(errors):
+    for rel_path, message in errors:
+        print(f"Error uploading {rel_path}: {message}", file=sys.stderr)
+    return len(errors)
+
+
+def _save_single_export(destination, manifest, jsonl_path):
+    """Save the manifest after a one-off export and report the result."""
+    errors = destination.save_manifest(manifest)
+    if _report_upload_errors(errors):
+        return 1
+    entry = manifest["sessions"][jsonl_path]
+    print(f"Exported: {entry['exported_path']}")
+    return 0
 
 
 def cmd_export(args):
@@ -690,9 +1616,6 @@ def cmd_export(args):
         print(f"Error: File not found: {jsonl_path}", file=sys.stderr)
         return 1
 
-    os.makedirs(dest_dir, exist_ok=True)
-    manifest = load_manifest(dest_dir)
-
     meta = scan_metadata(jsonl_path)
     if not meta:
         print(f"Error: Could not read metadata from {jsonl_path}", file=sys.stderr)
@@ -701,24 +1624,29 @@ def cmd_export(args):
     cwd = meta.get("cwd", "")
     project_name = os.path.basename(cwd) if cwd else "unknown"
 
-    exported = export_session(
-        jsonl_path,
-        dest_dir,
-        project_name,
-        fmt,
-        manifest,
-        force=args.force,
-        include_subagents=getattr(args, "include_subagents", False),
-    )
-
-    if exported:
-        save_manifest(dest_dir, manifest)
-        entry = manifest["sessions"][jsonl_path]
-        print(f"Exported: {entry['exported_path']}")
-    else:
-        print("Session already up to date (use --force to re-export)")
-
-    return 0
+    destination = open_destination(dest_dir, args)
+    try:
+        destination.prepare()
+        manifest = destination.load_manifest()
+        exported = export_session(
+            jsonl_path,
+            dest_dir,
+            project_name,
+            fmt,
+            manifest,
+            force=args.force,
+            include_subagents=getattr(args, "include_subagents", False),
+            destination=destination,
+        )
+        if not exported:
+            print("Session already up to date (use --force to re-export)")
+            return 0
+        return _save_single_export(destination, manifest, jsonl_path)
+    except DestinationError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        destination.close()
 
 
 def cmd_sync_all(args):
@@ -730,15 +1658,29 @@ def cmd_sync_all(args):
             file=sys.stderr,
         )
         return 1
+    profile = SyncProfile() if getattr(args, "profile", False) else None
+
+    destination = open_destination(dest_dir, args)
+    try:
+        destination.prepare()
+        with _phase(profile, "manifest-load"):
+            manifest = destination.load_manifest()
+        return _sync_all(args, dest_dir, destination, manifest, profile)
+    except DestinationError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        destination.close()
+
+
+def _sync_all(args, dest_dir, destination, manifest, profile):
+    """Body of sync-all once the destination and manifest are open."""
     fmt = args.format
-    project_filter = args.project_filter
     force = args.force
     include_subagents = args.include_subagents
 
-    os.makedirs(dest_dir, exist_ok=True)
-    manifest = load_manifest(dest_dir)
-
-    sessions = discover_sessions(project_filter)
+    with _phase(profile, "discovery"):
+        sessions = discover_sessions(args.project_filter)
     if not sessions:
         print("No sessions found.")
         return 0
@@ -746,45 +1688,91 @@ def cmd_sync_all(args):
     # Collect metadata for all sessions to compute project paths
     session_meta = {}
     cwds = []
-    for jsonl_path in sessions:
-        meta = scan_metadata(jsonl_path)
-        if meta and meta.get("cwd"):
-            session_meta[jsonl_path] = meta
-            cwds.append(meta["cwd"])
+    with _phase(profile, "metadata"):
+        for jsonl_path in sessions:
+            meta = scan_metadata(jsonl_path)
+            if meta and meta.get("cwd"):
+                session_meta[jsonl_path] = meta
+                cwds.append(meta["cwd"])
 
-    # Compute disambiguated project paths
-    path_map = compute_project_paths(cwds)
+        # Compute disambiguated project paths
+        path_map = compute_project_paths(cwds)
 
     exported_count = 0
     skipped_count = 0
     error_count = 0
+    since_checkpoint = 0  # exports not yet covered by a saved manifest
 
     for jsonl_path, meta in session_meta.items():
         cwd = meta["cwd"]
         project_name = path_map.get(cwd, os.path.basename(cwd))
 
+        start = time.perf_counter()
+        exported = False
         try:
-            exported = export_session(
-                jsonl_path,
-                dest_dir,
-                project_name,
-                fmt,
-                manifest,
-                force=force,
-                include_subagents=include_subagents,
-            )
+            with _phase(profile, "export"):
+                exported = export_session(
+                    jsonl_path,
+                    dest_dir,
+                    project_name,
+                    fmt,
+                    manifest,
+                    force=force,
+                    include_subagents=include_subagents,
+                    profile=profile,
+                    destination=destination,
+                )
             if exported:
                 exported_count += 1
+                since_checkpoint += 1
             else:
                 skipped_count += 1
+        except DestinationError:
+            raise
         except Exception as e:
             print(f"Error exporting {jsonl_path}: {e}", file=sys.stderr)
             error_count += 1
-
-    save_manifest(dest_dir, manifest)
+        # Only exports are ranked: a skipped or failed session's time
+        # says nothing about the export cost being profiled.
+        if profile is not None and exported:
+            profile.session_times.append((time.perf_counter() - start, jsonl_path))
+
+        # Checkpoint remote syncs so an interrupted run resumes from the
+        # last confirmed batch instead of re-uploading everything.
+        if destination.remote and since_checkpoint >= destination.checkpoint_interval:
+            failed = _report_upload_errors(destination.save_manifest(manifest))
+            exported_count -= failed
+            error_count += failed
+            since_checkpoint = 0
+
+    with _phase(profile, "manifest-save"):
+        failed = _report_upload_errors(destination.save_manifest(manifest))
+        exported_count -= failed
+        error_count += failed
+    if profile is not None and not destination.remote:
+        profile.add_io(written_path=os.path.join(dest_dir, MANIFEST_FILENAME))
     print(
         f"Sync complete: {exported_count} exported, {skipped_count} up-to-date, {error_count} errors"
     )
+    blocks = getattr(destination, "blocks", None)
+    if blocks is not None and blocks.refs:
+        print(
+            f"Deduplicated {blocks.refs} repeated blocks "
+            f"({blocks.bytes_saved} bytes not rewritten)"
+        )
+
+    if profile is not None:
+        top = args.profile_top
+        profile.print_summary(top=top)
+        if args.profile_dump:
+            out_dir = args.profile_dir
+            if not out_dir:
+                base = os.getcwd() if destination.remote else dest_dir
+                out_dir = os.path.join(base, ".profile")
+            for path in dump_session_profiles(
+                profile, top, args.profile_dump, out_dir, include_subagents
+            ):
+                print(f"  wrote {path}")
     return 0
 
 
@@ -799,7 +1787,15 @@ def cmd_status(args):
         return 0
 
     if dest_dir:
-        manifest = load_manifest(dest_dir)
+        destination = open_destination(dest_dir, args)
+        try:
+            destination.prepare()
+            manifest = destination.load_manifest()
+        except DestinationError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        finally:
+            destination.close()
     else:
         manifest = {"version": 1, "sessions": {}}
 
@@ -869,30 +1865,120 @@ def cmd_export_current(args):
     candidates.sort(key=lambda x: x[0], reverse=True)
     _, jsonl_path, meta = candidates[0]
 
-    os.makedirs(dest_dir, exist_ok=True)
-    manifest = load_manifest(dest_dir)
-
     cwd = meta.get("cwd", "")
     project_name = os.path.basename(cwd) if cwd else "unknown"
 
-    exported = export_session(
-        jsonl_path,
+    destination = open_destination(dest_dir, args)
+    try:
+        destination.prepare()
+        manifest = destination.load_manifest()
+        exported = export_session(
+            jsonl_path,
+            dest_dir,
+            project_name,
+            fmt,
+            manifest,
+            force=True,
+            include_subagents=getattr(args, "include_subagents", False),
+            destination=destination,
+        )
+        if not exported:
+            print("Export failed.", file=sys.stderr)
+            return 1
+        return _save_single_export(destination, manifest, jsonl_path)
+    except DestinationError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        destination.close()
+
+
+def _megabytes(value):
+    return None if value is None else int(value * 1024 * 1024)
+
+
+def cmd_prune(args):
+    """Delete exports by age, size and per-project quota policies.
+
+    Shared blocks (--dedup) that no remaining export links to are
+    removed as well.
+    """
+    dest_dir = resolve_dest(args)
+    if not dest_dir:
+        print(
+            f"Error: No destination. Pass <dest> or set ${TRANSCRIPT_DIR_ENV}.",
+            file=sys.stderr,
+        )
+        return 1
+    if is_remote_dest(dest_dir):
+        print("Error: prune only supports local destinations.", file=sys.stderr)
+        return 1
+
+    manifest = load_manifest(dest_dir)
+    plan = plan_prune(
         dest_dir,
-        project_name,
-        fmt,
         manifest,
-        force=True,
-        include_subagents=getattr(args, "include_subagents", False),
+        max_age_days=args.max_age_days,
+        max_total_bytes=_megabytes(args.max_total_mb),
+        project_quota_bytes=_megabytes(args.project_quota_mb),
     )
+    sweep = plan_block_sweep(dest_dir, [item["path"] for item in plan if item["path"]])
 
-    if exported:
-        save_manifest(dest_dir, manifest)
-        entry = manifest["sessions"][jsonl_path]
-        print(f"Exported: {entry['exported_path']}")
-    else:
-        print("Export failed.", file=sys.stderr)
+    if not plan and not sweep:
+        print("Nothing to prune.")
+        return 0
+
+    counts = {}
+    for item in plan:
+        counts[item["reason"]] = counts.get(item["reason"], 0) + 1
+    if sweep:
+        counts["unreferenced"] = len(sweep)
+    summary = ", ".join(f"{n} {reason}" for reason, n in sorted(counts.items()))
+    removed = len(plan) + len(sweep)
+
+    if args.dry_run:
+        for item in plan:
+            target = item["path"] or item["source"]
+            print(f"Would remove: {target} ({item['reason']})")
+        for path, _ in sweep:
+            print(f"Would remove: {path} (unreferenced)")
+        total = sum(item["size"] for item in plan) + sum(size for _, size in sweep)
+        print(f"Dry run: {removed} to remove ({summary}), {total} bytes")
+        return 0
+
+    freed = apply_prune(dest_dir, manifest, plan) if plan else 0
+    freed += apply_block_sweep(dest_dir, sweep)
+    print(f"Prune complete: {removed} removed ({summary}), {freed} bytes freed")
+    return 0
+
+
+def cmd_archive(args):
+    """Bundle old exports into per-month tar.gz archives."""
+    dest_dir = resolve_dest(args)
+    if not dest_dir:
+        print(
+            f"Error: No destination. Pass <dest> or set ${TRANSCRIPT_DIR_ENV}.",
+            file=sys.stderr,
+        )
+        return 1
+    if is_remote_dest(dest_dir):
+        print("Error: archive only supports local destinations.", file=sys.stderr)
         return 1
 
+    manifest = load_manifest(dest_dir)
+    plan = plan_archive(dest_dir, manifest, args.older_than_days)
+
+    if not plan:
+        print("Nothing to archive.")
+        return 0
+
+    if args.dry_run:
+        for month, items in sorted(plan.items()):
+            print(f"Would archive {len(items)} export(s) into {month}.tar.gz")
+        return 0
+
+    count = apply_archive(dest_dir, manifest, plan)
+    print(f"Archive complete: {count} export(s) into {len(plan)} monthly archive(s)")
     return 0
 
 
@@ -911,7 +1997,45 @@ def main(argv=None):
     )
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
-    env_hint = f"(or ${TRANSCRIPT_DIR_ENV})"
+    env_hint = f"(or ${TRANSCRIPT_DIR_ENV}); s3://bucket/prefix uploads to S3"
+
+    def add_dedup_args(p):
+        p.add_argument(
+            "--dedup",
+            action="store_true",
+            help=f"Store repeated tool output once under <dest>/{BLOCKS_DIRNAME} "
+            "and link to it (local destinations only)",
+        )
+        p.add_argument(
+            "--dedup-min-bytes",
+            type=int,
+            default=DEFAULT_DEDUP_MIN_BYTES,
+            metavar="N",
+            help="Only deduplicate blocks of at least N bytes "
+            f"(default: {DEFAULT_DEDUP_MIN_BYTES})",
+        )
+
+    def add_remote_args(p, uploads=False):
+        p.add_argument(
+            "--endpoint-url",
+            help="S3-compatible endpoint for s3:// destinations (or $AWS_ENDPOINT_URL)",
+        )
+        if not uploads:
+            return
+        p.add_argument(
+            "--upload-workers",
+            type=int,
+            default=8,
+            metavar="N",
+            help="Concurrent upload connections for s3:// destinations (default: 8)",
+        )
+        p.add_argument(
+            "--batch-size",
+            type=int,
+            default=32,
+            metavar="N",
+            help="Exports per upload batch for s3:// destinations (default: 32)",
+        )
 
     # export
     p_export = subparsers.add_parser("export", help="Export a single session")
@@ -933,6 +2057,8 @@ def main(argv=None):
         action="store_true",
         help="Include subagent messages in output",
     )
+    add_dedup_args(p_export)
+    add_remote_args(p_export)
 
     # sync-all
     p_sync = subparsers.add_parser("sync-all", help="Batch sync all sessions")
@@ -954,6 +2080,29 @@ def main(argv=None):
         action="store_true",
         help="Include subagent messages in output",
     )
+    p_sync.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-phase timing, I/O and record-type counts",
+    )
+    p_sync.add_argument(
+        "--profile-top",
+        type=int,
+        default=5,
+        metavar="N",
+        help="Number of slowest sessions to report/dump (default: 5)",
+    )
+    p_sync.add_argument(
+        "--profile-dump",
+        choices=["cprofile", "tracemalloc"],
+        help="Re-render the slowest sessions under this profiler (implies --profile)",
+    )
+    p_sync.add_argument(
+        "--profile-dir",
+        help="Where --profile-dump writes its files (default: <dest>/.profile)",
+    )
+    add_dedup_args(p_sync)
+    add_remote_args(p_sync, uploads=True)
 
     # status
     p_status = subparsers.add_parser("status", help="Show sync status")
@@ -963,6 +2112,7 @@ def main(argv=None):
     p_status.add_argument(
         "--project-filter", help="Only check sessions whose cwd starts with PATH"
     )
+    add_remote_args(p_status)
 
     # export-current
     p_current = subparsers.add_parser(
@@ -987,8 +2137,55 @@ def main(argv=None):
         action="store_true",
         help="Include subagent messages in output",
     )
+    add_dedup_args(p_current)
+    add_remote_args(p_current)
+
+    # prune
+    p_prune = subparsers.add_parser(
+        "prune", help="Delete old exports by age/size/quota policy"
+    )
+    p_prune.add_argument(
+        "dest", nargs="?", default=None, help=f"Destination directory {env_hint}"
+    )
+    p_prune.add_argument(
+        "--max-age-days",
+        type=int,
+        help="Remove exports whose source was last modified more than N days ago",
+    )
+    p_prune.add_argument(
+        "--max-total-mb",
+        type=float,
+        help="Keep total export size under N MB (oldest removed first)",
+    )
+    p_prune.add_argument(
+        "--project-quota-mb",
+        type=float,
+        help="Keep each project's exports under N MB (oldest removed first)",
+    )
+    p_prune.add_argument(
+        "--dry-run", action="store_true", help="Show what would be removed"
+    )
+
+    # archive
+    p_archive = subparsers.add_parser(
+        "archive", help="Bundle old exports into per-month tar.gz archives"
+    )
+    p_archive.add_argument(
+        "dest", nargs="?", default=None, help=f"Destination directory {env_hint}"
+    )
+    p_archive.add_argument(
+        "--older-than-days",
+        type=int,
+        default=90,
+        help="Archive exports whose source is older than N days (default: 90)",
+    )
+    p_archive.add_argument(
+        "--dry-run", action="store_true", help="Show what would be archived"
+    )
 
     args = parser.parse_args(argv[1:])
+    if getattr(args, "profile_dump", None):
+        args.profile = True
 
     if not args.command:
         parser.print_help()
@@ -999,6 +2196,8 @@ def main(argv=None):
         "sync-all": cmd_sync_all,
         "status": cmd_status,
         "export-current": cmd_export_current,
+        "prune": cmd_prune,
+        "archive": cmd_archive,
     }
 
     return dispatch[args.command](args)
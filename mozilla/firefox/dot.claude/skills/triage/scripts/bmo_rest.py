@@ -8,12 +8,27 @@ is never echoed in logs or exception reprs.
 Anonymous reads of public bugs work without a key. Write helpers
 require a key and raise BMOError("API key required for writes") before
 hitting the network if one isn't supplied.
+
+Requests go over keep-alive connections from a module-level pool, so a
+run of calls (get_bug, set_fields, post_comment, ...) pays for DNS, TCP
+and TLS once per host rather than once per call; get_bugs fetches many
+bugs in a few batched requests, optionally trimmed to chosen fields.
+
+Rate limiting (429), gateway errors and network failures are retried
+with backoff under a RetryPolicy (see there for which writes are safe
+to repeat); pass a Usage to any helper to count requests and retries.
 """
 
+import concurrent.futures
+import http.client
 import json
 import os
+import random
+import socket
+import ssl
 import sys
-import urllib.error
+import threading
+import time
 import urllib.parse
 import urllib.request
 
@@ -21,6 +36,10 @@ BMO_BASE = "https://bugzilla.mozilla.org/rest"
 API_KEY_HEADER = "X-BUGZILLA-API-KEY"
 USER_AGENT = "firefox-triage-skill/1 (mozilla)"
 DEFAULT_TIMEOUT = 30.0
+POOL_IDLE_TIMEOUT = 30.0  # seconds an idle connection stays reusable
+POOL_MAX_IDLE = 4  # idle connections kept per host
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+BUGS_PER_REQUEST = 100  # ids per GET /bug?id=... in get_bugs
 
 # ---------------------------------------------------------------------------
 # Errors
@@ -34,6 +53,7 @@ class BMOError(Exception):
       status_code: HTTP status (0 for network errors).
       body:        Parsed JSON body or raw text.
       retry_after: Float seconds from a Retry-After header, or None.
+      retries:     Retries made before giving up (0 if none).
     """
 
     def __init__(self, message, status_code=0, body=None, retry_after=None):
@@ -41,6 +61,7 @@ class BMOError(Exception):
         self.status_code = status_code
         self.body = body
         self.retry_after = retry_after
+        self.retries = 0
 
     def __repr__(self):
         return "BMOError(status={}, retry_after={}, msg={!r})".format(
@@ -48,6 +69,14 @@ class BMOError(Exception):
         )
 
 
+class _TransportError(BMOError):
+    """Network failure (status 0); ``sent`` tells if the request went out."""
+
+    def __init__(self, message, sent):
+        super().__init__(message, status_code=0)
+        self.sent = sent
+
+
 # ---------------------------------------------------------------------------
 # API key discovery
 # ---------------------------------------------------------------------------
@@ -99,6 +128,207 @@ def _redact(headers):
     return safe
 
 
+# ---------------------------------------------------------------------------
+# Connection pool
+# ---------------------------------------------------------------------------
+
+
+def _proxy_for(scheme, host):
+    """Split proxy URL for scheme://host from the environment, or None."""
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    return urllib.parse.urlsplit(proxy if "://" in proxy else "http://" + proxy)
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive HTTP(S) connections per host.
+
+    acquire() hands out an idle connection for (scheme, host, port), or
+    opens a new one, to one caller at a time; release() puts it back.
+    Connections idle for longer than ``idle_timeout`` are closed rather
+    than reused, since servers and load balancers drop them silently.
+    At most ``max_idle`` idle connections are kept per host.
+    """
+
+    def __init__(self, idle_timeout=POOL_IDLE_TIMEOUT, max_idle=POOL_MAX_IDLE):
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        self._idle = {}  # (scheme, host, port) -> [(conn, released_at)]
+        self._lock = threading.Lock()
+        self._ssl_context = None
+
+    def acquire(self, scheme, host, port, timeout):
+        """Return (connection, reused)."""
+        key = (scheme, host, port)
+        now = time.monotonic()
+        conn = None
+        expired = []
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle and conn is None:
+                candidate, released_at = idle.pop()
+                if now - released_at <= self.idle_timeout:
+                    conn = candidate
+                else:
+                    expired.append(candidate)
+        for stale in expired:
+            stale.close()
+        if conn is None:
+            return self._connect(scheme, host, port, timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def release(self, scheme, host, port, conn):
+        """Return conn to the pool for reuse."""
+        with self._lock:
+            idle = self._idle.setdefault((scheme, host, port), [])
+            idle.append((conn, time.monotonic()))
+            surplus = max(len(idle) - self.max_idle, 0)
+            excess = idle[:surplus]
+            del idle[:surplus]
+        for old, _ in excess:
+            old.close()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            conns = [conn for idle in self._idle.values() for conn, _ in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+    def _connect(self, scheme, host, port, timeout):
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            factory = http.client.HTTPSConnection
+            extra = {"context": self._ssl_context}
+        else:
+            factory = http.client.HTTPConnection
+            extra = {}
+        proxy = _proxy_for(scheme, host)
+        if proxy is None:
+            return factory(host, port, timeout=timeout, **extra)
+        conn = factory(proxy.hostname, proxy.port or 8080, timeout=timeout, **extra)
+        conn.set_tunnel(host, port)
+        return conn
+
+
+_POOL = ConnectionPool()
+
+
+def _send(method, url, data, headers, timeout):
+    """Send one request over a pooled connection.
+
+    Returns (status, headers, body bytes); raises _TransportError on
+    transport failure. A reused connection that the server closed while
+    it sat idle fails on first use; the request is then repeated on a
+    fresh connection, provided it never left this process or is a GET
+    (either way the server cannot have acted on it twice).
+    """
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme
+    host = parts.hostname
+    port = parts.port or (443 if scheme == "https" else 80)
+    target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+    while True:
+        conn, reused = _POOL.acquire(scheme, host, port, timeout)
+        sent = False
+        try:
+            conn.request(method, target, body=data, headers=headers)
+            sent = True
+            resp = conn.getresponse()
+            raw = resp.read()
+        except socket.timeout as e:
+            conn.close()
+            raise _TransportError(str(e), sent)
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            if reused and (not sent or method == "GET"):
+                continue
+            raise _TransportError(str(e), sent)
+        if resp.will_close:
+            conn.close()
+        else:
+            _POOL.release(scheme, host, port, conn)
+        return resp.status, resp.headers, raw
+
+
+# ---------------------------------------------------------------------------
+# Retries
+# ---------------------------------------------------------------------------
+
+
+class Usage:
+    """Running tally of REST traffic, for usage tracking.
+
+    Pass the same instance as ``usage=`` to any number of helper calls.
+
+    Attributes:
+      requests: HTTP requests sent, retries included.
+      retries:  Requests that repeated a failed attempt.
+      waited:   Seconds slept between attempts.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.waited = 0.0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "waited": round(self.waited, 3),
+        }
+
+
+class RetryPolicy:
+    """When _request repeats a failed call, and how long it waits first.
+
+    GETs are retried after any transport error and on HTTP 429, 502,
+    503 and 504. Writes are retried only when the server cannot have
+    applied them: after a 429 (rejected before processing) or a
+    transport error raised before the request was sent (refused
+    connection, DNS failure, ...). A 5xx or a dropped connection after
+    a write was sent may mean it went through, so it is not repeated.
+
+    Waits honour Retry-After when the server sends one and otherwise
+    back off exponentially from ``backoff`` seconds up to
+    ``max_backoff``, with full jitter. A call makes at most ``retries``
+    retries and gives up rather than wait past ``deadline`` seconds
+    from its start; each attempt's socket timeout is cut to what is
+    left of the deadline.
+    """
+
+    def __init__(self, retries=4, deadline=120.0, backoff=1.0, max_backoff=30.0):
+        self.retries = retries
+        self.deadline = deadline
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def retryable(self, method, error):
+        """True if the failed call (a BMOError) may be repeated."""
+        if method in ("GET", "HEAD"):
+            return error.status_code == 0 or error.status_code in RETRY_STATUSES
+        if error.status_code == 429:
+            return True
+        return isinstance(error, _TransportError) and not error.sent
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number ``attempt`` (0-based)."""
+        if retry_after is not None:
+            return max(retry_after, 0.0)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+
+DEFAULT_RETRY = RetryPolicy()
+NO_RETRY = RetryPolicy(retries=0)
+
+
 # ---------------------------------------------------------------------------
 # HTTP layer
 # ---------------------------------------------------------------------------
@@ -123,12 +353,22 @@ def _build_url(path, params=None):
 
 
 def _request(
-    method, path, params=None, body=None, api_key=None, timeout=DEFAULT_TIMEOUT
+    method,
+    path,
+    params=None,
+    body=None,
+    api_key=None,
+    timeout=DEFAULT_TIMEOUT,
+    retry=None,
+    usage=None,
 ):
     """Issue one REST call. Returns parsed JSON dict.
 
-    Raises BMOError on non-2xx or transport failure. The API key is sent
-    in a header (never the URL) and is redacted from any error path.
+    Raises BMOError on non-2xx or transport failure, once ``retry`` (a
+    RetryPolicy, DEFAULT_RETRY if None) gives up; its ``retries`` says
+    how many retries were made. ``usage`` (a Usage) is updated with the
+    requests sent. The API key is sent in a header (never the URL) and
+    is redacted from any error path.
     """
     url = _build_url(path, params)
     headers = {
@@ -142,46 +382,71 @@ def _request(
     if api_key:
         headers[API_KEY_HEADER] = api_key
 
-    req = urllib.request.Request(url, data=data, headers=headers, method=method)
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            raw = resp.read().decode("utf-8", errors="replace")
-            try:
-                return json.loads(raw) if raw else {}
-            except (json.JSONDecodeError, ValueError) as e:
-                raise BMOError(
-                    "non-JSON response from {} {}: {}".format(method, path, e),
-                    status_code=resp.status,
-                    body=raw,
-                )
-    except urllib.error.HTTPError as e:
-        body_text = ""
+    policy = DEFAULT_RETRY if retry is None else retry
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        remaining = policy.deadline - (time.monotonic() - start)
+        if usage is not None:
+            usage.requests += 1
         try:
-            body_text = e.read().decode("utf-8", errors="replace")
-        except Exception:  # pragma: no cover - defensive
-            pass
-        body_parsed = body_text
+            return _attempt(
+                method, path, url, data, headers, max(min(timeout, remaining), 0.1)
+            )
+        except BMOError as e:
+            error = e
+        wait = None
+        if attempt < policy.retries and policy.retryable(method, error):
+            wait = policy.delay(attempt, error.retry_after)
+            if time.monotonic() - start + wait >= policy.deadline:
+                wait = None
+        if wait is None:
+            error.retries = attempt
+            raise error
+        time.sleep(wait)
+        attempt += 1
+        if usage is not None:
+            usage.retries += 1
+            usage.waited += wait
+
+
+def _attempt(method, path, url, data, headers, timeout):
+    """Send the request once; returns parsed JSON or raises BMOError."""
+    try:
+        status, resp_headers, raw = _send(method, url, data, headers, timeout)
+    except _TransportError as e:
+        raise _TransportError(
+            "{} {} transport error: {}".format(method, path, e), e.sent
+        )
+    raw = raw.decode("utf-8", errors="replace")
+
+    if not 200 <= status < 300:
+        body_parsed = raw
         try:
-            body_parsed = json.loads(body_text)
+            body_parsed = json.loads(raw)
         except (json.JSONDecodeError, ValueError):
             pass
         retry_after = None
-        ra = e.headers.get("Retry-After") if e.headers else None
+        ra = resp_headers.get("Retry-After") if resp_headers else None
         if ra:
             try:
                 retry_after = float(ra)
             except (TypeError, ValueError):
                 retry_after = None
         raise BMOError(
-            "{} {} failed: HTTP {}".format(method, path, e.code),
-            status_code=e.code,
+            "{} {} failed: HTTP {}".format(method, path, status),
+            status_code=status,
             body=body_parsed,
             retry_after=retry_after,
         )
-    except urllib.error.URLError as e:
+
+    try:
+        return json.loads(raw) if raw else {}
+    except (json.JSONDecodeError, ValueError) as e:
         raise BMOError(
-            "{} {} transport error: {}".format(method, path, e.reason),
-            status_code=0,
+            "non-JSON response from {} {}: {}".format(method, path, e),
+            status_code=status,
+            body=raw,
         )
 
 
@@ -193,12 +458,44 @@ def _require_key(api_key):
 # ---------------------------------------------------------------------------
 # Read helpers
 # ---------------------------------------------------------------------------
+#
+# Every helper takes ``retry`` (a RetryPolicy; DEFAULT_RETRY if None,
+# NO_RETRY to fail fast) and ``usage`` (a Usage to add its requests and
+# retries to), and passes both to _request.
+
+
+def _fields_param(fields):
+    """Comma-join a field list for include_fields/exclude_fields."""
+    if fields is None or isinstance(fields, str):
+        return fields
+    return ",".join(fields)
+
+
+def get_bug(
+    bug_id,
+    api_key=None,
+    timeout=DEFAULT_TIMEOUT,
+    retry=None,
+    usage=None,
+    include_fields=None,
+    exclude_fields=None,
+):
+    """GET /bug/{id}. Returns the first bug dict from the response.
 
-
-def get_bug(bug_id, api_key=None, timeout=DEFAULT_TIMEOUT):
-    """GET /bug/{id}. Returns the first bug dict from the response."""
+    ``include_fields`` / ``exclude_fields`` (a list or comma-separated
+    string) trim the response server-side, as in get_bugs.
+    """
     resp = _request(
-        "GET", "/bug/{}".format(int(bug_id)), api_key=api_key, timeout=timeout
+        "GET",
+        "/bug/{}".format(int(bug_id)),
+        params={
+            "include_fields": _fields_param(include_fields),
+            "exclude_fields": _fields_param(exclude_fields),
+        },
+        api_key=api_key,
+        timeout=timeout,
+        retry=retry,
+        usage=usage,
     )
     bugs = resp.get("bugs") or []
     if not bugs:
@@ -210,10 +507,93 @@ def get_bug(bug_id, api_key=None, timeout=DEFAULT_TIMEOUT):
     return bugs[0]
 
 
-def get_bug_history(bug_id, api_key=None, timeout=DEFAULT_TIMEOUT):
+def get_bugs(
+    bug_ids,
+    api_key=None,
+    include_fields=None,
+    exclude_fields=None,
+    timeout=DEFAULT_TIMEOUT,
+    retry=None,
+    usage=None,
+    chunk_size=BUGS_PER_REQUEST,
+    max_workers=POOL_MAX_IDLE,
+):
+    """GET /bug?id=a,b,c for many bugs. Returns {id: bug dict}.
+
+    Ids are de-duplicated and fetched ``chunk_size`` at a time, with up
+    to ``max_workers`` chunks in flight (capped at POOL_MAX_IDLE so
+    every request gets a pooled keep-alive connection); each chunk
+    retries under ``retry`` on its own. The result keeps the order of
+    ``bug_ids``. Bugs that are missing or inaccessible are left out
+    (the request is sent with ``permissive``) rather than failing the
+    whole batch; any other error of any chunk is raised.
+
+    ``include_fields`` / ``exclude_fields`` (a list or comma-separated
+    string, e.g. ["id", "status", "depends_on"] or "_default,flags")
+    are passed through to BMO so only those fields are sent back;
+    ``id`` is always included so results can be keyed.
+    """
+    ids = list(dict.fromkeys(int(b) for b in bug_ids))
+    include = _fields_param(include_fields)
+    if include is not None and "id" not in include.split(","):
+        include += ",id"
+    exclude = _fields_param(exclude_fields)
+    if exclude is not None:
+        exclude = ",".join(f for f in exclude.split(",") if f != "id") or None
+    chunks = [ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+    # Usage is not thread-safe, so each chunk counts into its own and
+    # the totals are added up here.
+    tallies = [Usage() for _ in chunks]
+
+    def fetch(index):
+        return _request(
+            "GET",
+            "/bug",
+            params={
+                "id": ",".join(str(b) for b in chunks[index]),
+                "include_fields": include,
+                "exclude_fields": exclude,
+                "permissive": 1,
+            },
+            api_key=api_key,
+            timeout=timeout,
+            retry=retry,
+            usage=tallies[index],
+        )
+
+    workers = max(1, min(max_workers, POOL_MAX_IDLE, len(chunks)))
+    try:
+        if workers == 1:
+            responses = [fetch(i) for i in range(len(chunks))]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+                responses = list(executor.map(fetch, range(len(chunks))))
+    finally:
+        if usage is not None:
+            for tally in tallies:
+                usage.requests += tally.requests
+                usage.retries += tally.retries
+                usage.waited += tally.waited
+
+    found = {}
+    for resp in responses:
+        for bug in resp.get("bugs") or []:
+            found[bug["id"]] = bug
+    return {b: found[b] for b in ids if b in found}
+
+
+def get_bug_history(
+    bug_id, api_key=None, timeout=DEFAULT_TIMEOUT, retry=None, usage=None
+):
     """GET /bug/{id}/history. Returns the raw response dict."""
     return _request(
-        "GET", "/bug/{}/history".format(int(bug_id)), api_key=api_key, timeout=timeout
+        "GET",
+        "/bug/{}/history".format(int(bug_id)),
+        api_key=api_key,
+        timeout=timeout,
+        retry=retry,
+        usage=usage,
     )
 
 
@@ -222,7 +602,15 @@ def get_bug_history(bug_id, api_key=None, timeout=DEFAULT_TIMEOUT):
 # ---------------------------------------------------------------------------
 
 
-def post_comment(bug_id, comment, api_key, is_private=False, timeout=DEFAULT_TIMEOUT):
+def post_comment(
+    bug_id,
+    comment,
+    api_key,
+    is_private=False,
+    timeout=DEFAULT_TIMEOUT,
+    retry=None,
+    usage=None,
+):
     """POST /bug/{id}/comment. Returns the response dict."""
     _require_key(api_key)
     body = {"comment": comment, "is_private": bool(is_private)}
@@ -232,10 +620,14 @@ def post_comment(bug_id, comment, api_key, is_private=False, timeout=DEFAULT_TIM
         body=body,
         api_key=api_key,
         timeout=timeout,
+        retry=retry,
+        usage=usage,
     )
 
 
-def set_fields(bug_id, fields, api_key, timeout=DEFAULT_TIMEOUT):
+def set_fields(
+    bug_id, fields, api_key, timeout=DEFAULT_TIMEOUT, retry=None, usage=None
+):
     """PUT /bug/{id} bundling field changes.
 
     Accepted ``fields`` keys (all optional):
@@ -253,10 +645,14 @@ def set_fields(bug_id, fields, api_key, timeout=DEFAULT_TIMEOUT):
         body=dict(fields),
         api_key=api_key,
         timeout=timeout,
+        retry=retry,
+        usage=usage,
     )
 
 
-def set_needinfo(bug_id, requestee, api_key, timeout=DEFAULT_TIMEOUT):
+def set_needinfo(
+    bug_id, requestee, api_key, timeout=DEFAULT_TIMEOUT, retry=None, usage=None
+):
     """PUT /bug/{id} with a needinfo flag for the requestee."""
     _require_key(api_key)
     body = {"flags": [{"name": "needinfo", "status": "?", "requestee": requestee}]}
@@ -266,4 +662,6 @@ def set_needinfo(bug_id, requestee, api_key, timeout=DEFAULT_TIMEOUT):
         body=body,
         api_key=api_key,
         timeout=timeout,
+        retry=retry,
+        usage=usage,
     )
@@ -161,10 +161,12 @@ def run(bug_id, dry_run=False, assume_yes=False, stdin=None):
         )
         return 2
 
-    # Re-fetch (anonymous read works for public bugs).
+    # Re-fetch (anonymous read works for public bugs). Every REST call
+    # shares one Usage so the audit log records requests and retries.
     api_key = bmo_rest.get_api_key()
+    usage = bmo_rest.Usage()
     try:
-        bug = bmo_rest.get_bug(bug_id, api_key=api_key)
+        bug = bmo_rest.get_bug(bug_id, api_key=api_key, usage=usage)
     except bmo_rest.BMOError as e:
         sys.stderr.write("apply_pending: fetch failed: {}\n".format(e))
         return 1
@@ -211,7 +213,7 @@ def run(bug_id, dry_run=False, assume_yes=False, stdin=None):
     # 1. Fields
     if fields:
         try:
-            bmo_rest.set_fields(bug_id, fields, api_key=api_key)
+            bmo_rest.set_fields(bug_id, fields, api_key=api_key, usage=usage)
             succeeded.append("set_fields")
         except bmo_rest.BMOError as e:
             failed.append(("set_fields", str(e)))
@@ -221,7 +223,7 @@ def run(bug_id, dry_run=False, assume_yes=False, stdin=None):
     comment = pending.get("comment") or ""
     if comment.strip():
         try:
-            bmo_rest.post_comment(bug_id, comment, api_key=api_key)
+            bmo_rest.post_comment(bug_id, comment, api_key=api_key, usage=usage)
             succeeded.append("post_comment")
         except bmo_rest.BMOError as e:
             failed.append(("post_comment", str(e)))
@@ -230,7 +232,7 @@ def run(bug_id, dry_run=False, assume_yes=False, stdin=None):
     # 3. Needinfo flags (one PUT per requestee — keeps reporting clean).
     for target in pending.get("ni_targets") or []:
         try:
-            bmo_rest.set_needinfo(bug_id, target, api_key=api_key)
+            bmo_rest.set_needinfo(bug_id, target, api_key=api_key, usage=usage)
             succeeded.append("set_needinfo:{}".format(target))
         except bmo_rest.BMOError as e:
             failed.append(("set_needinfo:{}".format(target), str(e)))
@@ -251,6 +253,7 @@ def run(bug_id, dry_run=False, assume_yes=False, stdin=None):
         "ni_targets": pending.get("ni_targets") or [],
         "succeeded": succeeded,
         "failed": [f[0] for f in failed],
+        "rest": usage.as_dict(),
     }
     if failed:
         log_entry["decision"] = "apply_partial"
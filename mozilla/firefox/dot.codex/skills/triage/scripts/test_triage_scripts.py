@@ -13,7 +13,9 @@ import json
 import os
 import sys
 import tempfile
+import threading
 import unittest
+import urllib.parse
 from unittest import mock
 
 # Import the modules under test.
@@ -331,81 +333,310 @@ class TestBmoRestWriteGate(unittest.TestCase):
             bmo_rest.set_fields(1, {}, api_key="k")
 
 
-class TestBmoRestRequestShape(unittest.TestCase):
-    def _mock_response(self, payload, status=200):
-        class FakeResp:
-            def __init__(self, data, code):
-                self._data = data
-                self.status = code
+class _FakeResponse:
+    def __init__(self, status=200, payload=None, headers=None, will_close=False):
+        self.status = status
+        self.headers = headers or {}
+        self.will_close = will_close
+        self._data = json.dumps({} if payload is None else payload).encode("utf-8")
 
-            def read(self):
-                return self._data
+    def read(self):
+        return self._data
 
-            def __enter__(self):
-                return self
 
-            def __exit__(self, *a):
-                return False
+class _FailSend:
+    """Script item: raise ``error`` while sending, before any response."""
 
-        return FakeResp(json.dumps(payload).encode("utf-8"), status)
+    def __init__(self, error):
+        self.error = error
 
+
+class _FakeConnection:
+    """Stands in for http.client.HTTPSConnection.
+
+    ``script`` is shared by all connections of a test; each request pops
+    its next item, a _FakeResponse or an exception to raise instead
+    (a _FailSend one fails the send itself).
+    """
+
+    def __init__(self, script, host, port):
+        self.script = script
+        self.host = host
+        self.port = port
+        self.timeout = None
+        self.sock = None
+        self.requests = []
+        self.closed = False
+
+    def request(self, method, url, body=None, headers=None):
+        if isinstance(self.script[0], _FailSend):
+            raise self.script.pop(0).error
+        self.requests.append(
+            {"method": method, "url": url, "body": body, "headers": dict(headers)}
+        )
+
+    def getresponse(self):
+        reply = self.script.pop(0)
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply
+
+    def close(self):
+        self.closed = True
+
+
+class _BmoRestHttpTestCase(unittest.TestCase):
+    """Routes bmo_rest through a fresh pool of fake connections."""
+
+    def setUp(self):
+        self.script = []
+        self.connections = []
+        self.sleeps = []
+
+        def connect(host, port=None, timeout=None, context=None):
+            conn = _FakeConnection(self.script, host, port)
+            self.connections.append(conn)
+            return conn
+
+        for patcher in (
+            mock.patch("http.client.HTTPSConnection", side_effect=connect),
+            mock.patch.object(bmo_rest, "_POOL", bmo_rest.ConnectionPool()),
+            mock.patch("urllib.request.getproxies", return_value={}),
+            mock.patch("time.sleep", side_effect=self.sleeps.append),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def reply(self, payload=None, status=200, **kwargs):
+        self.script.append(_FakeResponse(status, payload, **kwargs))
+
+    @property
+    def requests(self):
+        return [req for conn in self.connections for req in conn.requests]
+
+
+class TestBmoRestRequestShape(_BmoRestHttpTestCase):
     def test_get_bug_returns_first_bug(self):
-        fake = self._mock_response({"bugs": [{"id": 1, "summary": "x"}]})
-        with mock.patch("urllib.request.urlopen", return_value=fake) as m:
-            bug = bmo_rest.get_bug(1)
+        self.reply({"bugs": [{"id": 1, "summary": "x"}]})
+        bug = bmo_rest.get_bug(1)
         self.assertEqual(bug["id"], 1)
         # Verify we issued GET and never set the Content-Type header
         # (no body on GET).
-        req = m.call_args[0][0]
-        self.assertEqual(req.get_method(), "GET")
+        req = self.requests[0]
+        self.assertEqual(req["method"], "GET")
+        self.assertEqual(req["url"], "/rest/bug/1")
+        self.assertNotIn("Content-Type", req["headers"])
+        self.assertEqual(self.connections[0].host, "bugzilla.mozilla.org")
+        self.assertEqual(self.connections[0].port, 443)
 
     def test_get_bug_missing_raises(self):
-        fake = self._mock_response({"bugs": []})
-        with mock.patch("urllib.request.urlopen", return_value=fake):
-            with self.assertRaises(bmo_rest.BMOError) as ctx:
-                bmo_rest.get_bug(99999999)
+        self.reply({"bugs": []})
+        with self.assertRaises(bmo_rest.BMOError) as ctx:
+            bmo_rest.get_bug(99999999)
         self.assertEqual(ctx.exception.status_code, 404)
 
     def test_post_comment_sends_body_and_key(self):
-        fake = self._mock_response({"id": 12345})
-        with mock.patch("urllib.request.urlopen", return_value=fake) as m:
-            bmo_rest.post_comment(1, "hello", api_key="K")
-        req = m.call_args[0][0]
-        self.assertEqual(req.get_method(), "POST")
-        body = json.loads(req.data.decode("utf-8"))
+        self.reply({"id": 12345})
+        bmo_rest.post_comment(1, "hello", api_key="K")
+        req = self.requests[0]
+        self.assertEqual(req["method"], "POST")
+        body = json.loads(req["body"].decode("utf-8"))
         self.assertEqual(body["comment"], "hello")
         self.assertFalse(body["is_private"])
-        # Header lookup is case-insensitive in urllib Request internals
-        # but the public dict uses the original casing; check via items.
-        headers = {k.lower(): v for k, v in req.header_items()}
+        headers = {k.lower(): v for k, v in req["headers"].items()}
         self.assertEqual(headers["x-bugzilla-api-key"], "K")
 
     def test_set_needinfo_sends_flag_shape(self):
-        fake = self._mock_response({"bugs": []})
-        with mock.patch("urllib.request.urlopen", return_value=fake) as m:
-            bmo_rest.set_needinfo(1, "user@example.com", api_key="K")
-        req = m.call_args[0][0]
-        self.assertEqual(req.get_method(), "PUT")
-        body = json.loads(req.data.decode("utf-8"))
+        self.reply({"bugs": []})
+        bmo_rest.set_needinfo(1, "user@example.com", api_key="K")
+        req = self.requests[0]
+        self.assertEqual(req["method"], "PUT")
+        body = json.loads(req["body"].decode("utf-8"))
         self.assertEqual(body["flags"][0]["name"], "needinfo")
         self.assertEqual(body["flags"][0]["status"], "?")
         self.assertEqual(body["flags"][0]["requestee"], "user@example.com")
 
     def test_http_error_parses_retry_after(self):
-        import urllib.error
-
-        err = urllib.error.HTTPError(
-            url="https://x",
-            code=429,
-            msg="Too Many",
-            hdrs={"Retry-After": "12"},
-            fp=io.BytesIO(b'{"error": true, "message": "slow down"}'),
+        self.reply(
+            {"error": True, "message": "slow down"},
+            status=429,
+            headers={"Retry-After": "12"},
         )
-        with mock.patch("urllib.request.urlopen", side_effect=err):
-            with self.assertRaises(bmo_rest.BMOError) as ctx:
-                bmo_rest.get_bug(1)
+        with self.assertRaises(bmo_rest.BMOError) as ctx:
+            bmo_rest.get_bug(1, retry=bmo_rest.NO_RETRY)
         self.assertEqual(ctx.exception.status_code, 429)
         self.assertEqual(ctx.exception.retry_after, 12.0)
+        self.assertEqual(ctx.exception.body["message"], "slow down")
+
+
+class TestBmoRestConnectionPool(_BmoRestHttpTestCase):
+    def test_calls_reuse_one_connection(self):
+        self.reply({"bugs": [{"id": 1}]})
+        self.reply({"bugs": []})
+        self.reply({"id": 2})
+        bmo_rest.get_bug(1)
+        bmo_rest.set_fields(1, {"priority": "P2"}, api_key="K")
+        bmo_rest.post_comment(1, "hi", api_key="K")
+        self.assertEqual(len(self.connections), 1)
+        self.assertEqual(
+            [req["method"] for req in self.requests], ["GET", "PUT", "POST"]
+        )
+
+    def test_stale_connection_reconnects_for_get(self):
+        import http.client
+
+        self.reply({"bugs": [{"id": 1}]})
+        bmo_rest.get_bug(1)
+        self.script.append(http.client.RemoteDisconnected("closed"))
+        self.reply({"bugs": [{"id": 1}]})
+        self.assertEqual(bmo_rest.get_bug(1)["id"], 1)
+        self.assertEqual(len(self.connections), 2)
+        self.assertTrue(self.connections[0].closed)
+
+    def test_stale_connection_is_not_replayed_for_writes(self):
+        import http.client
+
+        self.reply({"bugs": [{"id": 1}]})
+        bmo_rest.get_bug(1)
+        self.script.append(http.client.RemoteDisconnected("closed"))
+        with self.assertRaises(bmo_rest.BMOError) as ctx:
+            bmo_rest.post_comment(1, "hi", api_key="SECRET")
+        self.assertEqual(ctx.exception.status_code, 0)
+        self.assertNotIn("SECRET", str(ctx.exception))
+        self.assertEqual(len(self.connections), 1)
+
+    def test_idle_connections_expire(self):
+        bmo_rest._POOL.idle_timeout = -1
+        self.reply({"bugs": [{"id": 1}]})
+        self.reply({"bugs": [{"id": 1}]})
+        bmo_rest.get_bug(1)
+        bmo_rest.get_bug(1)
+        self.assertEqual(len(self.connections), 2)
+        self.assertTrue(self.connections[0].closed)
+
+    def test_connection_close_is_not_pooled(self):
+        self.reply({"bugs": [{"id": 1}]}, will_close=True)
+        self.reply({"bugs": [{"id": 1}]})
+        bmo_rest.get_bug(1)
+        bmo_rest.get_bug(1)
+        self.assertEqual(len(self.connections), 2)
+
+    def test_transport_error_maps_to_status_zero(self):
+        self.script.append(ConnectionRefusedError(111, "Connection refused"))
+        with self.assertRaises(bmo_rest.BMOError) as ctx:
+            bmo_rest.get_bug(1, retry=bmo_rest.NO_RETRY)
+        self.assertEqual(ctx.exception.status_code, 0)
+        self.assertIn("transport error", str(ctx.exception))
+
+
+class TestBmoRestRetry(_BmoRestHttpTestCase):
+    def test_get_retries_honouring_retry_after(self):
+        self.reply({}, status=429, headers={"Retry-After": "2"})
+        self.reply({}, status=503)
+        self.reply({"bugs": [{"id": 1}]})
+        usage = bmo_rest.Usage()
+        self.assertEqual(bmo_rest.get_bug(1, usage=usage)["id"], 1)
+        self.assertEqual(self.sleeps[0], 2.0)
+        self.assertTrue(0 <= self.sleeps[1] <= 2.0)  # backoff 1s * 2**1
+        self.assertEqual((usage.requests, usage.retries), (3, 2))
+        self.assertEqual(usage.waited, sum(self.sleeps))
+
+    def test_get_retries_transport_errors(self):
+        import http.client
+
+        self.script.append(http.client.RemoteDisconnected("reset"))
+        self.reply({"bugs": [{"id": 1}]})
+        self.assertEqual(bmo_rest.get_bug(1)["id"], 1)
+        self.assertEqual(len(self.sleeps), 1)
+
+    def test_writes_retry_only_when_not_applied(self):
+        self.reply({}, status=429)
+        self.reply({}, status=503)
+        usage = bmo_rest.Usage()
+        with self.assertRaises(bmo_rest.BMOError) as ctx:
+            bmo_rest.post_comment(1, "hi", api_key="K", usage=usage)
+        # The 429 is retried; the 503 might have been applied, so not.
+        self.assertEqual(ctx.exception.status_code, 503)
+        self.assertEqual(ctx.exception.retries, 1)
+        self.assertEqual((usage.requests, usage.retries), (2, 1))
+
+    def test_writes_retry_transport_errors_before_sending(self):
+        import http.client
+
+        self.script.append(_FailSend(ConnectionRefusedError(111, "refused")))
+        self.reply({"id": 7})
+        self.assertEqual(bmo_rest.post_comment(1, "hi", api_key="K")["id"], 7)
+        self.script.append(http.client.RemoteDisconnected("reset"))
+        with self.assertRaises(bmo_rest.BMOError) as ctx:
+            bmo_rest.post_comment(1, "hi", api_key="K")
+        self.assertEqual((ctx.exception.status_code, ctx.exception.retries), (0, 0))
+
+    def test_retry_limit_and_deadline(self):
+        for _ in range(3):
+            self.reply({}, status=503)
+        with self.assertRaises(bmo_rest.BMOError) as ctx:
+            bmo_rest.get_bug(1, retry=bmo_rest.RetryPolicy(retries=2))
+        self.assertEqual(ctx.exception.retries, 2)
+
+        # A Retry-After past the deadline is not waited for.
+        self.reply({}, status=429, headers={"Retry-After": "60"})
+        with self.assertRaises(bmo_rest.BMOError) as ctx:
+            bmo_rest.get_bug(1, retry=bmo_rest.RetryPolicy(deadline=30))
+        self.assertEqual(ctx.exception.retries, 0)
+        self.assertEqual(len(self.sleeps), 2)
+
+
+class TestBmoRestGetBugs(_BmoRestHttpTestCase):
+    def test_batched_request_shape(self):
+        self.reply({"bugs": [{"id": 2, "summary": "b"}, {"id": 1, "summary": "a"}]})
+        bugs = bmo_rest.get_bugs([1, 2, 1, 3], include_fields=["summary"])
+        # Request order kept, duplicates dropped, missing bug 3 left out.
+        self.assertEqual(list(bugs), [1, 2])
+        self.assertEqual(bugs[1]["summary"], "a")
+        self.assertEqual(len(self.requests), 1)
+        url = urllib.parse.urlsplit(self.requests[0]["url"])
+        self.assertEqual(url.path, "/rest/bug")
+        query = dict(urllib.parse.parse_qsl(url.query))
+        self.assertEqual(query["id"], "1,2,3")
+        self.assertEqual(query["include_fields"], "summary,id")
+        self.assertEqual(query["permissive"], "1")
+        self.assertNotIn("exclude_fields", query)
+
+    def test_chunks_run_concurrently(self):
+        calls = []
+        # Every chunk must be in flight at once to get past the barrier.
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fake_request(method, path, params=None, usage=None, **kwargs):
+            calls.append(params)
+            barrier.wait()
+            usage.requests += 1
+            ids = [int(b) for b in params["id"].split(",")]
+            return {"bugs": [{"id": b} for b in ids if b != 7]}
+
+        usage = bmo_rest.Usage()
+        with mock.patch.object(bmo_rest, "_request", side_effect=fake_request):
+            bugs = bmo_rest.get_bugs(
+                range(250, 0, -1),
+                exclude_fields="id,comments",
+                chunk_size=100,
+                usage=usage,
+            )
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sorted(len(c["id"].split(",")) for c in calls), [50, 100, 100])
+        self.assertEqual({c["exclude_fields"] for c in calls}, {"comments"})
+        self.assertEqual(list(bugs), [b for b in range(250, 0, -1) if b != 7])
+        self.assertEqual(usage.requests, 3)
+
+    def test_chunk_error_is_raised(self):
+        def fake_request(method, path, params=None, **kwargs):
+            if params["id"].startswith("3"):
+                raise bmo_rest.BMOError("boom", status_code=500)
+            return {"bugs": []}
+
+        with mock.patch.object(bmo_rest, "_request", side_effect=fake_request):
+            with self.assertRaises(bmo_rest.BMOError):
+                bmo_rest.get_bugs([1, 2, 3], chunk_size=2)
 
 
 # ---------------------------------------------------------------------------
@@ -553,6 +784,31 @@ class TestApplyPendingExitCodes(_ApplyTestCase):
         self.assertEqual(log[0]["decision"], "apply_partial")
         self.assertIn("post_comment", log[0]["failed"])
 
+    def test_log_records_rest_usage(self):
+        pending_store.save_pending(_make_pending(bug_id=7))
+        bug = _make_bug(bug_id=7, last_change_time="2026-05-14T09:00:00Z")
+
+        def retried_write(*args, usage=None, **kwargs):
+            usage.requests += 2
+            usage.retries += 1
+            return {}
+
+        with mock.patch.object(
+            bmo_rest, "get_bug", return_value=bug
+        ), mock.patch.object(
+            bmo_rest, "set_fields", side_effect=retried_write
+        ), mock.patch.object(
+            bmo_rest, "post_comment", return_value={}
+        ), mock.patch.object(
+            bmo_rest, "set_needinfo", return_value={}
+        ):
+            code = apply_pending.run(7, dry_run=False, assume_yes=True)
+        self.assertEqual(code, 0)
+        with open(pending_store.log_path(), "r", encoding="utf-8") as f:
+            log = json.load(f)
+        self.assertEqual(log[0]["rest"]["requests"], 2)
+        self.assertEqual(log[0]["rest"]["retries"], 1)
+
     def test_user_abort_exits_5(self):
         pending_store.save_pending(_make_pending(bug_id=6))
         bug = _make_bug(bug_id=6, last_change_time="2026-05-14T09:00:00Z")
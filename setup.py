@@ -3615,6 +3615,20 @@ def show_setup_summary(results):
 # Claude Code Security Hooks
 # ============================================================================
 
+# Tools the security hook runs for: every tool that reads or writes a file
+# (see PATH_TOOLS in claude/security_policy.py) plus Bash, Grep and Glob.
+CLAUDE_SECURITY_MATCHER = (
+    "Read|Write|Edit|MultiEdit|NotebookEdit|Bash|Grep|Glob|WebFetch"
+)
+
+
+def _claude_security_hook_entry(hook_path):
+    """The PreToolUse entry that runs the security hook."""
+    return {
+        "matcher": CLAUDE_SECURITY_MATCHER,
+        "hooks": [{"type": "command", "command": str(hook_path), "timeout": 5}],
+    }
+
 
 def claude_security_init(tracker, dry_run=False):
     """
@@ -3624,7 +3638,8 @@ def claude_security_init(tracker, dry_run=False):
     The hook command points directly at the in-repo script
     ``<repo>/claude/security-read-blocker.py``. No deployed copy or
     extra ``$HOME`` directory is created. Block events are appended
-    to ``~/.claude/security-blocks.log``.
+    to ``~/.claude/security-blocks.log``, and the compiled policy the
+    hook loads at start-up is written next to it.
     """
     print_title("Claude Code Security Hooks")
 
@@ -3632,34 +3647,33 @@ def claude_security_init(tracker, dry_run=False):
     claude_config = os.path.join(get_home_dir(), ".claude.json")
     legacy_dir = os.path.join(get_home_dir(), ".dotfiles-claude-hooks")
     log_file = os.path.join(get_home_dir(), ".claude", "security-blocks.log")
+    policy_file = _claude_security_policy_file()
 
     if dry_run:
         print(f"\n{colors.HINT}DRY RUN MODE - Would perform these actions:{colors.END}")
         print(f"  1. Use hook script in-place: {hook_path}")
+        step = 2
 
         if os.path.exists(claude_config):
             print(
-                f"  2. Backup: {claude_config} -> {claude_config}.backup-claude-security"
+                f"  {step}. Backup: {claude_config} -> "
+                f"{claude_config}.backup-claude-security"
             )
-            print(f"  3. Merge security hooks into: {claude_config}")
+            print(f"  {step + 1}. Merge security hooks into: {claude_config}")
+            step += 2
         else:
-            print(f"  2. Create: {claude_config} with security hooks")
+            print(f"  {step}. Create: {claude_config} with security hooks")
+            step += 1
+
+        print(f"  {step}. Compile policy artifact: {policy_file}")
+        step += 1
 
         if os.path.isdir(legacy_dir):
-            print(f"  4. Clean up legacy dir: {legacy_dir}")
+            print(f"  {step}. Clean up legacy dir: {legacy_dir}")
 
         print(f"\n{colors.HINT}Would add to ~/.claude.json:{colors.END}")
         security_hook_config = {
-            "hooks": {
-                "PreToolUse": [
-                    {
-                        "matcher": "Read|Bash|Grep|Glob",
-                        "hooks": [
-                            {"type": "command", "command": str(hook_path), "timeout": 5}
-                        ],
-                    }
-                ]
-            }
+            "hooks": {"PreToolUse": [_claude_security_hook_entry(hook_path)]}
         }
         print(json.dumps(security_hook_config, indent=2))
         print(f"\n{colors.HINT}Run without --dry-run to apply changes{colors.END}")
@@ -3670,22 +3684,20 @@ def claude_security_init(tracker, dry_run=False):
         print_error(f"Hook script not found: {hook_path}")
         return False
 
-    # 2. Backup and load ~/.claude.json
+    # 2. Load ~/.claude.json
     if os.path.exists(claude_config):
-        backup = os.path.dirname(claude_config) + "/.claude.json.backup-claude-security"
-        shutil.copy(claude_config, backup)
-        print_hint(f"Backed up config to: {backup}")
-
         with open(claude_config, "r", encoding="utf-8") as f:
             config = json.load(f)
     else:
         config = {}
         print_hint("Creating new ~/.claude.json")
+    original = json.dumps(config, sort_keys=True)
 
-    # 3. Merge security hooks (non-destructive). Replace any prior
-    # security-read-blocker.py entry (e.g. pointing at the legacy
-    # ~/.dotfiles-claude-hooks/ path) so the command field stays
-    # pointed at the current in-repo script.
+    # 3. Merge security hooks (non-destructive). Update any prior
+    # security-read-blocker.py entry in place (e.g. one pointing at the
+    # legacy ~/.dotfiles-claude-hooks/ path, or with an older matcher)
+    # so the command field stays pointed at the current in-repo script
+    # and the entry keeps its position; drop duplicates of it.
     if "hooks" not in config:
         config["hooks"] = {}
     if "PreToolUse" not in config["hooks"]:
@@ -3697,23 +3709,38 @@ def claude_security_init(tracker, dry_run=False):
             for h in entry.get("hooks", [])
         )
 
-    config["hooks"]["PreToolUse"] = [
-        e for e in config["hooks"]["PreToolUse"] if not _entry_is_ours(e)
-    ]
-    config["hooks"]["PreToolUse"].append(
-        {
-            "matcher": "Read|Bash|Grep|Glob",
-            "hooks": [{"type": "command", "command": str(hook_path), "timeout": 5}],
-        }
-    )
+    entries = config["hooks"]["PreToolUse"]
+    ours = [i for i, e in enumerate(entries) if _entry_is_ours(e)]
+    new_entry = _claude_security_hook_entry(hook_path)
+    if ours:
+        entries[ours[0]] = new_entry
+        for i in reversed(ours[1:]):
+            del entries[i]
+    else:
+        entries.append(new_entry)
 
-    # 4. Write back atomically
-    temp_file = claude_config + ".tmp"
-    with open(temp_file, "w", encoding="utf-8", newline="\n") as f:
-        json.dump(config, f, indent=2)
-    os.replace(temp_file, claude_config)
+    # 4. Back up and write back atomically, only if anything changed, so
+    # re-running the install leaves the config (and its backup) alone.
+    if json.dumps(config, sort_keys=True) == original:
+        print_hint("Security hook entry in ~/.claude.json is up to date")
+    else:
+        if os.path.exists(claude_config):
+            backup = os.path.join(
+                os.path.dirname(claude_config), ".claude.json.backup-claude-security"
+            )
+            shutil.copy(claude_config, backup)
+            print_hint(f"Backed up config to: {backup}")
+        temp_file = claude_config + ".tmp"
+        with open(temp_file, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(config, f, indent=2)
+        os.replace(temp_file, claude_config)
+
+    # 5. Compile the policy artifact (expanded patterns, whitelist,
+    # prebuilt regex) so each hook run loads it with a single read.
+    if not _compile_claude_security_policy(hook_path):
+        print_warning("Could not compile policy; the hook will compile in-process")
 
-    # 5. Migrate away from the legacy ~/.dotfiles-claude-hooks/ directory
+    # 6. Migrate away from the legacy ~/.dotfiles-claude-hooks/ directory
     # if a previous install left it behind. Move any existing log file
     # into ~/.claude/ so audit history is preserved.
     if os.path.isdir(legacy_dir):
@@ -3735,12 +3762,60 @@ def claude_security_init(tracker, dry_run=False):
     print_hint(f"  Hook script: {hook_path}")
     print_hint(f"  Config file: {claude_config}")
     print_hint(f"  Log file:    {log_file} (created on first block)")
+    print_hint(f"  Policy:      {policy_file}")
     print("")
     print_warning("IMPORTANT: Restart Claude Code for hooks to take effect")
 
     return True
 
 
+def _claude_security_log_dir():
+    """The hook's log/state directory (DOTFILES_CLAUDE_SECURITY_LOG_DIR)."""
+    return os.environ.get("DOTFILES_CLAUDE_SECURITY_LOG_DIR") or os.path.join(
+        get_home_dir(), ".claude"
+    )
+
+
+def _claude_security_policy_file():
+    """Path of the hook's compiled policy artifact."""
+    return os.path.join(_claude_security_log_dir(), "security-policy.compiled.json")
+
+
+def _claude_security_policy_key():
+    """Path of the key the hook signs its compiled policy with."""
+    return os.path.join(_claude_security_log_dir(), "security-policy.key")
+
+
+def _claude_security_cache_files():
+    """Paths of the hook's verdict caches (.env scans, sniffing, decisions)."""
+    log_dir = _claude_security_log_dir()
+    return [
+        os.path.join(log_dir, "security-env-cache.json"),
+        os.path.join(log_dir, "security-sniff-cache.json"),
+        os.path.join(log_dir, "security-decisions.json"),
+    ]
+
+
+def _compile_claude_security_policy(hook_path):
+    """Run the hook's --compile-policy. Returns True on success.
+
+    Re-run this whenever the patterns, the whitelist or the policy file
+    change; the hook also regenerates a stale artifact on its own.
+    """
+    try:
+        result = subprocess.run(
+            [sys.executable, hook_path, "--compile-policy"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    if result.returncode != 0 and result.stderr.strip():
+        print_warning(result.stderr.strip().splitlines()[-1])
+    return result.returncode == 0
+
+
 def claude_security_remove(dry_run=False):
     """Remove Claude Code security hooks from ~/.claude.json."""
     print_title("Remove Claude Security Hooks")
@@ -3755,6 +3830,12 @@ def claude_security_remove(dry_run=False):
         print(f"\n{colors.HINT}DRY RUN MODE - Would perform these actions:{colors.END}")
         print(f"  1. Backup: {claude_config} → {claude_config}.backup-before-removal")
         print(f"  2. Remove security hooks from: {claude_config}")
+        print(
+            f"  3. Delete compiled policy: {_claude_security_policy_file()} "
+            f"(and its key, {_claude_security_policy_key()})"
+        )
+        for step, cache_file in enumerate(_claude_security_cache_files(), start=4):
+            print(f"  {step}. Delete verdict cache: {cache_file}")
         print(f"\n{colors.HINT}Run without --dry-run to apply changes{colors.END}")
         return True
 
@@ -3806,6 +3887,19 @@ def claude_security_remove(dry_run=False):
     else:
         print_hint("No security hooks found to remove")
 
+    policy_file = _claude_security_policy_file()
+    if os.path.exists(policy_file):
+        os.unlink(policy_file)
+        print_hint(f"Deleted compiled policy: {policy_file}")
+    key_file = _claude_security_policy_key()
+    if os.path.exists(key_file):
+        os.unlink(key_file)
+        print_hint(f"Deleted compiled policy key: {key_file}")
+    for cache_file in _claude_security_cache_files():
+        if os.path.exists(cache_file):
+            os.unlink(cache_file)
+            print_hint(f"Deleted verdict cache: {cache_file}")
+
     return True
 
 
@@ -6120,59 +6214,83 @@ def show_claude_security_log():
     """Show blocked access log from security hooks."""
     print_title("Claude Security Blocks Log")
 
-    log_file = os.path.join(get_home_dir(), ".claude", "security-blocks.log")
-    legacy_log = os.path.join(
-        get_home_dir(), ".dotfiles-claude-hooks", "security-blocks.log"
-    )
+    log_dir = _claude_security_log_dir()
+    log_file = os.path.join(log_dir, "security-blocks.log")
+    legacy_dir = os.path.join(get_home_dir(), ".dotfiles-claude-hooks")
 
     # Fall back to the legacy location if the new file doesn't exist yet
     # but a pre-migration log is still around.
-    if not os.path.exists(log_file) and os.path.exists(legacy_log):
-        log_file = legacy_log
+    if not os.path.exists(log_file) and os.path.exists(
+        os.path.join(legacy_dir, "security-blocks.log")
+    ):
+        log_dir = legacy_dir
+        log_file = os.path.join(legacy_dir, "security-blocks.log")
 
     if not os.path.exists(log_file):
         print_hint(f"No log file found at: {log_file}")
         print_hint("This means no access has been blocked yet")
         return True
 
+    if os.path.getsize(log_file) == 0 and not os.path.exists(log_file + ".1"):
+        print_hint("Log file is empty - no blocks recorded")
+        return True
+
+    # The query tool seeks from the end of the log (via its index) rather
+    # than reading the whole history; it also takes filters, e.g.
+    # claude/security_log.py --since 1d --tool Bash, or --stats.
+    query = os.path.join(BASE_DIR, "claude", "security_log.py")
+    sys.stdout.flush()
     try:
-        with open(log_file, "r") as f:
-            lines = f.readlines()
+        result = subprocess.run(
+            [sys.executable, query, "--log-dir", log_dir, "--tail", "20"],
+            timeout=60,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        print_error(f"Error reading log file: {e}")
+        return False
+    if result.returncode != 0:
+        print_error("Error reading log file")
+        return False
 
-        if not lines:
-            print_hint("Log file is empty - no blocks recorded")
-            return True
+    print("\n" + "=" * 60)
+    print(f"Full log: {log_file}")
+    print(f"Query:    {query} --help")
 
-        print(f"Blocked access attempts: {len(lines)}")
-        print("=" * 60)
+    return True
 
-        # Show last 20 entries
-        for line in lines[-20:]:
-            try:
-                entry = json.loads(line)
-                timestamp = entry.get("timestamp", "Unknown")
-                tool = entry.get("tool_name", "Unknown")
-                file_path = entry.get("file_path", "Unknown")
-                reason = entry.get("reason", "Unknown")
-
-                print(f"\n{colors.WARNING}Blocked:{colors.END} {timestamp}")
-                print(f"  Tool:   {tool}")
-                print(f"  File:   {file_path}")
-                print(f"  Reason: {reason}")
-            except json.JSONDecodeError:
-                continue
 
-        if len(lines) > 20:
-            print(
-                f"\n{colors.HINT}... showing last 20 of {len(lines)} entries{colors.END}"
-            )
+def show_claude_security_metrics():
+    """Show the security hook's decision counts and latency histograms."""
+    print_title("Claude Security Hook Metrics")
 
-        print("\n" + "=" * 60)
-        print(f"Full log: {log_file}")
+    log_dir = _claude_security_log_dir()
+    recorded = [
+        os.path.join(log_dir, name)
+        for name in ("security-metrics.json", "security-metrics.journal")
+    ]
+    if not any(os.path.exists(path) for path in recorded):
+        print_hint(f"No metrics found in: {log_dir}")
+        print_hint("The hook records them on every call once it is installed")
+        return True
 
-    except Exception as e:
-        print_error(f"Error reading log file: {e}")
+    # security_metrics folds the hook's journal into the metrics files
+    # before summarizing them.
+    tool = os.path.join(BASE_DIR, "claude", "security_metrics.py")
+    sys.stdout.flush()
+    try:
+        result = subprocess.run(
+            [sys.executable, tool, "--log-dir", log_dir], timeout=60
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        print_error(f"Error reading metrics: {e}")
         return False
+    if result.returncode != 0:
+        print_error("Error reading metrics")
+        return False
+
+    print("\n" + "=" * 60)
+    print(f"Prometheus: {os.path.join(log_dir, 'security-metrics.prom')}")
+    print(f"Query:      {tool} --help")
 
     return True
 
@@ -6300,6 +6418,11 @@ Examples:
         action="store_true",
         help="Show log of blocked access attempts",
     )
+    parser.add_argument(
+        "--show-claude-security-metrics",
+        action="store_true",
+        help="Show the security hook's decision counts and latencies",
+    )
     parser.add_argument(
         "--all",
         action="store_true",
@@ -6358,6 +6481,9 @@ Examples:
     if args.show_claude_security_log:
         return 0 if show_claude_security_log() else 1
 
+    if args.show_claude_security_metrics:
+        return 0 if show_claude_security_metrics() else 1
+
     # Handle removal command (don't need tracker)
     if args.remove_claude_security:
         return 0 if claude_security_remove(DRY_RUN) else 1
@@ -645,6 +645,64 @@ class TestClaudeSecurityIntegration(unittest.TestCase):
         self.assertIn("Claude Code Security Hooks", result.stdout)
         self.assertEqual(result.returncode, 0)
 
+    def test_init_updates_existing_entry_in_place(self):
+        """Re-install rewrites an old hook entry in place, then is a no-op."""
+        import io
+        import json
+
+        with tempfile.TemporaryDirectory() as home:
+            config_file = os.path.join(home, ".claude.json")
+            other = {"matcher": "Bash", "hooks": [{"command": "lint.sh"}]}
+            old = {
+                "matcher": "Read|Bash|Grep|Glob",
+                "hooks": [{"command": "/old/security-read-blocker.py"}],
+            }
+            with open(config_file, "w") as f:
+                json.dump({"hooks": {"PreToolUse": [old, other, old]}}, f)
+
+            with patch("setup.get_home_dir", return_value=home), patch(
+                "setup._compile_claude_security_policy", return_value=True
+            ), patch("sys.stdout", new_callable=io.StringIO):
+                self.assertTrue(setup.claude_security_init(setup.ChangeTracker()))
+                with open(config_file) as f:
+                    first = f.read()
+                backup = os.path.join(home, ".claude.json.backup-claude-security")
+                os.unlink(backup)
+                self.assertTrue(setup.claude_security_init(setup.ChangeTracker()))
+
+            with open(config_file) as f:
+                second = f.read()
+            entries = json.loads(second)["hooks"]["PreToolUse"]
+            self.assertEqual(len(entries), 2)
+            self.assertEqual(entries[0]["matcher"], setup.CLAUDE_SECURITY_MATCHER)
+            self.assertIn("NotebookEdit", entries[0]["matcher"])
+            self.assertEqual(entries[1], other)
+            self.assertEqual(first, second)
+            self.assertFalse(os.path.exists(backup))
+
+    def test_dry_run_steps_are_numbered_consecutively(self):
+        """Dry-run install/removal steps count 1, 2, 3... with no gaps."""
+        import io
+        import re
+
+        def steps(fn, *args):
+            with patch("sys.stdout", new_callable=io.StringIO) as out:
+                self.assertTrue(fn(*args, dry_run=True))
+            return [int(n) for n in re.findall(r"^  (\d+)\. ", out.getvalue(), re.M)]
+
+        with tempfile.TemporaryDirectory() as home:
+            with patch("setup.get_home_dir", return_value=home):
+                numbers = steps(setup.claude_security_init, setup.ChangeTracker())
+                self.assertEqual(numbers, list(range(1, len(numbers) + 1)))
+
+                with open(os.path.join(home, ".claude.json"), "w") as f:
+                    f.write("{}")
+                numbers = steps(setup.claude_security_init, setup.ChangeTracker())
+                self.assertEqual(numbers, list(range(1, len(numbers) + 1)))
+                numbers = steps(setup.claude_security_remove)
+                self.assertEqual(numbers, list(range(1, len(numbers) + 1)))
+                self.assertGreater(len(numbers), 4)
+
 
 @requires_symlinks
 class TestInstallFirefoxClaude(unittest.TestCase):